@@ -0,0 +1,32 @@
+#!/bin/sh
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+# ----------------------------
+# call Quant Data Manager Console, passed as parameter 1, on Linux and macOS
+# counterpart of callExportQuotes.bat
+# ----------------------------
+
+# check for parameter 1, exit with error code 2
+if [ -z "$1" ]; then
+    exit 2
+fi
+
+# switch to the directory of the program
+cd "$(dirname "$1")" || exit 2
+
+# call the program, exit with its error code
+# Quant Data Manager Command Reference = https://strategyquant.com/doc/quant-data-manager-command-line-interface-help/
+echo "$1" -de symbols="$2" timeframe="$3" outputdir="$4"
+"$1" -de symbols="$2" timeframe="$3" outputdir="$4"
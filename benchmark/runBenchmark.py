@@ -0,0 +1,276 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+benchmark of the conversion with synthetic Quant Data Manager exports
+
+run from the project directory, e.g.
+    python -m benchmark.runBenchmark --symbols 4 --rows 1000000 --output bench.json
+    python -m benchmark.runBenchmark --compare bench.json --output bench-new.json
+
+every stage runs in a new process, so its peak RSS is not inflated by earlier stages,
+exportQuotes calls the stand-in of Quant Data Manager (benchmark/standInDataManager.py)
+via the scripts 'bat/*.sh' on Linux and macOS or 'bat/*.bat' on Windows,
+with --batchsize > 1 exportQuotesBatched calls it directly with groups of symbols,
+--startup simulates the start of Quant Data Manager, which every call pays
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, shutil, json, time, stat, argparse, platform, subprocess, tempfile
+import multiprocessing, concurrent.futures
+from datetime import datetime
+try:
+    import resource
+except ImportError: # not available on Windows
+    resource = None
+import core.basicLogger as minilog
+import core.basicConfigReader as miniConfig
+import core.quantDataConverter as dataConverter
+import core.batchCaller as quantBatchCaller
+import benchmark.syntheticData as syntheticData
+import benchmark.standInDataManager as standInDataManager
+# ----------------------------------------------------------------------------
+
+theProjectDirectory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+theStandInFileName = 'standInDataManager.py'
+theSymbolListSize = 10000
+
+def _getPeakRSS():
+    """returns peak resident set size of this process and its finished child processes in MB,
+       None if not available
+    """
+    if resource is None:
+        return None
+    thePeak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # kilobytes on Linux, bytes on macOS
+    return round(thePeak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def _getResult(aStage : str, anEngine, theSeconds : float, aNumberOfRows : int, aNumberOfBytes : int) -> dict:
+    theMegabytes = aNumberOfBytes / (1024 * 1024)
+    return {'stage'             : aStage,
+            'engine'            : anEngine,
+            'seconds'           : round(theSeconds, 4),
+            'rows'              : aNumberOfRows,
+            'megabytes'         : round(theMegabytes, 3),
+            'rowsPerSecond'     : round(aNumberOfRows / theSeconds) if theSeconds else None,
+            'megabytesPerSecond': round(theMegabytes / theSeconds, 3) if theSeconds else None,
+            'peakRSSMegabytes'  : _getPeakRSS()}
+
+def benchConvertQuotes(aWorkDirectory : str, aSymbol : str, anEngine : str, aNumberOfRows : int) -> dict:
+    """time convertQuotes of one export, the export is copied first, because it is removed"""
+    theExportFileName = syntheticData.getExportFileName(os.path.join(aWorkDirectory, 'qdm', 'database'), aSymbol)
+    theSourceFileName = os.path.join(aWorkDirectory, 'convert', os.path.basename(theExportFileName))
+    theTargetFileName = os.path.join(aWorkDirectory, 'convert', f"{aSymbol}-M1.csv")
+    shutil.copyfile(theExportFileName, theSourceFileName)
+    theSize = os.stat(theSourceFileName).st_size
+
+    theStart = time.perf_counter()
+    isOk = dataConverter.convertQuotes(theSourceFileName, theTargetFileName, anEngine)
+    theSeconds = time.perf_counter() - theStart
+    if not isOk:
+        raise RuntimeError(f"convertQuotes of '{aSymbol}' failed")
+    return _getResult('convertQuotes', anEngine, theSeconds, aNumberOfRows, theSize)
+
+def benchConvertSymbolList(aWorkDirectory : str, aNumberOfSymbols : int) -> dict:
+    """time convertSymbolList of a synthetic symbol list"""
+    theDate = syntheticData.theStartTime
+    theSourceFileName = os.path.join(aWorkDirectory, 'convert', 'symbols-qdm.csv')
+    theTargetFileName = os.path.join(aWorkDirectory, 'convert', 'symbols.csv')
+    syntheticData.writeSymbolList(theSourceFileName, {aSymbol : (theDate, theDate)
+                                  for aSymbol in syntheticData.getSymbolNames(aNumberOfSymbols)})
+    theSize = os.stat(theSourceFileName).st_size
+
+    theStart = time.perf_counter()
+    isOk = dataConverter.convertSymbolList(theSourceFileName, theTargetFileName)
+    theSeconds = time.perf_counter() - theStart
+    if not isOk:
+        raise RuntimeError("convertSymbolList failed")
+    return _getResult('convertSymbolList', None, theSeconds, aNumberOfSymbols, theSize)
+
+def benchNumberOfLines(aWorkDirectory : str, aSymbol : str) -> dict:
+    """time getNumberOfLinesOfFile of one export"""
+    theExportFileName = syntheticData.getExportFileName(os.path.join(aWorkDirectory, 'qdm', 'database'), aSymbol)
+    theSize = os.stat(theExportFileName).st_size
+
+    theStart = time.perf_counter()
+    theNumberOfRows = dataConverter.getNumberOfLinesOfFile(theExportFileName)
+    theSeconds = time.perf_counter() - theStart
+    return _getResult('getNumberOfLinesOfFile', None, theSeconds, theNumberOfRows, theSize)
+
+def benchExportQuotes(aWorkDirectory : str, anEngine : str, aNumberOfWorkers : int, aNumberOfRows : int,
+                      aBatchSize : int = 1) -> dict:
+    """time exportQuotes of all symbols from the stand-in of Quant Data Manager,
+       aBatchSize > 1 = the stand-in is called directly with groups of aBatchSize symbols
+    """
+    theDataDirectory = os.path.join(aWorkDirectory, 'data')
+    shutil.rmtree(theDataDirectory, ignore_errors=True)
+    os.makedirs(theDataDirectory)
+    theDatabaseDirectory = os.path.join(aWorkDirectory, 'qdm', 'database')
+    shutil.copyfile(os.path.join(theDatabaseDirectory, 'symbols.csv'), os.path.join(theDataDirectory, 'symbols.csv'))
+    theNumberOfSymbols = len(dataConverter.getSymbolsList(os.path.join(theDataDirectory, 'symbols.csv')))
+
+    theConfigFileName = _writeConfig(aWorkDirectory, anEngine, aNumberOfWorkers, aBatchSize)
+    # the scripts are looked up at directory 'bat' of the current directory
+    os.chdir(theProjectDirectory)
+    theDataManager = quantBatchCaller.callQuantDataManager(miniConfig.defaultConfig(theConfigFileName))
+
+    theStart = time.perf_counter()
+    isOk = theDataManager.exportQuotes(isForced=True)
+    theSeconds = time.perf_counter() - theStart
+    if not isOk:
+        raise RuntimeError("exportQuotes failed")
+    theSize = theNumberOfSymbols * os.stat(syntheticData.getExportFileName(theDatabaseDirectory,
+                                           syntheticData.getSymbolNames(1)[0])).st_size
+    theStage = 'exportQuotesBatched' if aBatchSize > 1 else 'exportQuotes'
+    return _getResult(theStage, anEngine, theSeconds, theNumberOfSymbols * aNumberOfRows, theSize)
+
+def _writeConfig(aWorkDirectory : str, anEngine : str, aNumberOfWorkers : int, aBatchSize : int = 1) -> str:
+    """write a config file for the stand-in of Quant Data Manager, returns its name"""
+    theScriptExtension = 'bat' if os.name == 'nt' else 'sh'
+    theConfigFileName = os.path.join(aWorkDirectory, f"benchmark-{anEngine}-{aBatchSize}.cnf")
+    with open(theConfigFileName, mode='w', encoding='UTF8') as configfile:
+        configfile.write(f"""[quantdatamanager]
+path={os.path.join(aWorkDirectory, 'qdm')}
+application={theStandInFileName}
+getsymbols=callListSymbols.{theScriptExtension}
+updatequotes=callQuotesUpdate.{theScriptExtension}
+exportquotes=callExportQuotes.{theScriptExtension}
+exportbackend={'direct' if aBatchSize > 1 else 'script'}
+exportbatchsize={aBatchSize}
+[data]
+path={os.path.join(aWorkDirectory, 'data')}
+symbollist=symbols.csv
+[converter]
+engine={anEngine}
+incremental=no
+[parallel]
+exportworkers={aNumberOfWorkers}
+convertworkers={aNumberOfWorkers}
+""")
+    return theConfigFileName
+
+def prepareWorkDirectory(aWorkDirectory : str, aNumberOfSymbols : int, aNumberOfRows : int) -> None:
+    """write synthetic exports and install the stand-in of Quant Data Manager"""
+    theDataManagerDirectory = os.path.join(aWorkDirectory, 'qdm')
+    syntheticData.createDatabase(os.path.join(theDataManagerDirectory, 'database'), aNumberOfSymbols, aNumberOfRows)
+    nameOfStandIn = os.path.join(theDataManagerDirectory, theStandInFileName)
+    shutil.copyfile(os.path.join(theProjectDirectory, 'benchmark', theStandInFileName), nameOfStandIn)
+    os.chmod(nameOfStandIn, os.stat(nameOfStandIn).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    os.makedirs(os.path.join(aWorkDirectory, 'convert'), exist_ok=True)
+
+def runStage(aFunction, *theArguments) -> dict:
+    """run a benchmark stage in a new process"""
+    theContext = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=theContext) as theExecutor:
+        theResult = theExecutor.submit(aFunction, *theArguments).result()
+    logger.info(f"{theResult['stage']:<24} {str(theResult['engine'] or ''):<6} "
+                f"{theResult['rowsPerSecond'] or 0:>12,} rows/s {theResult['megabytesPerSecond'] or 0:>9.2f} MB/s "
+                f"peak RSS {theResult['peakRSSMegabytes'] or 0:>8.1f} MB")
+    return theResult
+
+def getVersion() -> str:
+    """returns the git commit of the project, None outside of a git repository"""
+    try:
+        theResult = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=theProjectDirectory,
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True)
+        return theResult.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compareResults(thePreviousReport : dict, theReport : dict) -> None:
+    """log the change of throughput and peak RSS against a previous report"""
+    thePreviousResults = {(aResult['stage'], aResult['engine']) : aResult for aResult in thePreviousReport['results']}
+    logger.info(f"compared with version {thePreviousReport.get('version')} of {thePreviousReport.get('date')}:")
+    for aResult in theReport['results']:
+        aPreviousResult = thePreviousResults.get((aResult['stage'], aResult['engine']))
+        if not aPreviousResult or not aPreviousResult['rowsPerSecond'] or not aResult['rowsPerSecond']:
+            continue
+        theSpeedup = aResult['rowsPerSecond'] / aPreviousResult['rowsPerSecond']
+        theMemory = ''
+        if aResult['peakRSSMegabytes'] and aPreviousResult['peakRSSMegabytes']:
+            theMemory = f", peak RSS {aResult['peakRSSMegabytes'] - aPreviousResult['peakRSSMegabytes']:+.1f} MB"
+        logger.info(f"{aResult['stage']:<24} {str(aResult['engine'] or ''):<6} throughput x {theSpeedup:.2f}{theMemory}")
+
+def runBenchmark(aWorkDirectory : str, aNumberOfSymbols : int, aNumberOfRows : int,
+                 theEngines : tuple, aNumberOfWorkers : int, aBatchSize : int = 1) -> dict:
+    """run all stages, returns the report"""
+    prepareWorkDirectory(aWorkDirectory, aNumberOfSymbols, aNumberOfRows)
+    theSymbol = syntheticData.getSymbolNames(1)[0]
+
+    theResults = [runStage(benchNumberOfLines, aWorkDirectory, theSymbol),
+                  runStage(benchConvertSymbolList, aWorkDirectory, theSymbolListSize)]
+    for anEngine in theEngines:
+        theResults.append(runStage(benchConvertQuotes, aWorkDirectory, theSymbol, anEngine, aNumberOfRows))
+    for anEngine in theEngines:
+        theResults.append(runStage(benchExportQuotes, aWorkDirectory, anEngine, aNumberOfWorkers, aNumberOfRows))
+        if aBatchSize > 1:
+            theResults.append(runStage(benchExportQuotes, aWorkDirectory, anEngine, aNumberOfWorkers, aNumberOfRows,
+                                       aBatchSize))
+
+    return {'version'   : getVersion(),
+            'date'      : datetime.now().isoformat(timespec='seconds'),
+            'python'    : platform.python_version(),
+            'platform'  : platform.platform(),
+            'cpus'      : os.cpu_count(),
+            'parameters': {'symbols': aNumberOfSymbols, 'rows': aNumberOfRows,
+                           'engines': list(theEngines), 'workers': aNumberOfWorkers, 'batchSize': aBatchSize,
+                           'startup': float(os.environ.get(standInDataManager.theStartupVariable, '0') or 0)},
+            'results'   : theResults}
+
+def main():
+    minilog.initiate(logging.INFO)
+    logger.info("--- Benchmark of the conversion with synthetic Quant Data Manager exports ---")
+
+    parser = argparse.ArgumentParser(
+            prog="python -m benchmark.runBenchmark",
+            description="benchmark the conversion with synthetic Quant Data Manager exports")
+    parser.add_argument("--symbols", "-s", type=int, default=4, help="number of symbols, default 4")
+    parser.add_argument("--rows", "-r", type=int, default=1000000, help="rows per symbol, default 1000000")
+    parser.add_argument("--engines", "-e", default="csv,numpy,mmap", help="conversion engines, default 'csv,numpy,mmap'")
+    parser.add_argument("--workers", "-w", type=int, default=2, help="parallel exports and conversions, default 2")
+    parser.add_argument("--batchsize", "-b", type=int, default=1,
+                        help="symbols per direct call of the stand-in, > 1 adds stage exportQuotesBatched, default 1")
+    parser.add_argument("--startup", type=float, default=0.0,
+                        help="seconds the stand-in waits at every call like the start of Quant Data Manager, default 0")
+    parser.add_argument("--output", "-o", help="name of JSON file for the results")
+    parser.add_argument("--compare", help="name of JSON file with results of a previous run")
+    parser.add_argument("--workdir", help="directory for synthetic data, default is a temporary directory")
+    args = parser.parse_args()
+
+    # inherited by the processes of the stages and by every call of the stand-in
+    os.environ[standInDataManager.theStartupVariable] = str(args.startup)
+    theEngines = tuple(anEngine.strip() for anEngine in args.engines.split(',') if anEngine.strip())
+    theWorkDirectory = args.workdir or tempfile.mkdtemp(prefix='quantDataConvert-benchmark-')
+    theWorkDirectory = os.path.abspath(theWorkDirectory)
+    try:
+        theReport = runBenchmark(theWorkDirectory, args.symbols, args.rows, theEngines, args.workers, args.batchsize)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(theWorkDirectory, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, mode='w', encoding='UTF8') as reportfile:
+            json.dump(theReport, reportfile, indent=1)
+        logger.info(f"results saved to '{args.output}'")
+    if args.compare:
+        with open(args.compare, mode='r', encoding='UTF8') as reportfile:
+            compareResults(json.load(reportfile), theReport)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+stand-in for the Quant Data Manager console application, e.g. for benchmarks on Linux
+
+understands the commands of the scripts in directory 'bat':
+    -l csv=<file>                                           = list symbols
+    -u                                                      = update quotes
+    -de symbols=<symbols> timeframe=<timeframe> outputdir=<directory> = export quotes
+symbol list and exports are copied from the directory 'database' next to this program,
+see benchmark/syntheticData.py
+
+the start of Quant Data Manager is simulated by a delay of QDM_STANDIN_STARTUP seconds
+from the environment, default 0
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, shutil, time
+# ----------------------------------------------------------------------------
+
+theDatabaseDirectory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database')
+theStartupVariable = 'QDM_STANDIN_STARTUP'
+
+def _getOptions(theArguments : list) -> dict:
+    """returns the options 'name=value' of the command line as dict"""
+    return dict(anArgument.split('=', 1) for anArgument in theArguments if '=' in anArgument)
+
+def listSymbols(nameOfCSVFile : str) -> bool:
+    """write the symbol list of the database to nameOfCSVFile"""
+    shutil.copyfile(os.path.join(theDatabaseDirectory, 'symbols.csv'), nameOfCSVFile)
+    return True
+
+def exportQuotes(theSymbols : str, aTimeframe : str, anOutputDirectory : str) -> bool:
+    """copy the exports of comma separated symbols to anOutputDirectory"""
+    isOk = True
+    for aSymbol in theSymbols.split(','):
+        theFileName = f"{aSymbol}-{aTimeframe.upper()}-No Session.csv"
+        try:
+            shutil.copyfile(os.path.join(theDatabaseDirectory, theFileName),
+                            os.path.join(anOutputDirectory, theFileName))
+            print(f"exported '{aSymbol}'")
+        except OSError as inst:
+            print(f"export of '{aSymbol}' failed: {inst}", file=sys.stderr)
+            isOk = False
+    return isOk
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: standInDataManager.py -l csv=<file> | -u | -de symbols=<symbols> timeframe=<tf> outputdir=<dir>",
+              file=sys.stderr)
+        sys.exit(2)
+
+    time.sleep(float(os.environ.get(theStartupVariable, '0') or 0))
+    theCommand = sys.argv[1]
+    theOptions = _getOptions(sys.argv[2:])
+    try:
+        if theCommand == '-l':
+            isOk = listSymbols(theOptions['csv'])
+        elif theCommand == '-u':
+            print("quotes are up to date")
+            isOk = True
+        elif theCommand == '-de':
+            isOk = exportQuotes(theOptions['symbols'], theOptions['timeframe'], theOptions['outputdir'])
+        else:
+            print(f"unknown command '{theCommand}'", file=sys.stderr)
+            sys.exit(2)
+    except (KeyError, OSError) as inst:
+        print(f"command '{theCommand}' failed: {inst}", file=sys.stderr)
+        isOk = False
+    sys.exit(0 if isOk else 1)
+
+if __name__ == '__main__':
+    main()
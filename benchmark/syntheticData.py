@@ -0,0 +1,96 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+synthetic symbol lists and quotes in the format of Quant Data Manager
+
+symbol list = 'Symbol,Date from,Date to' with dates like '2015.01.02'
+quotes      = '<symbol>-<timeframe>-No Session.csv' without header,
+              lines like '2015.01.02,09:30,100.00,100.53,99.42,100.05,3964'
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, csv, random, pathlib
+from datetime import datetime, timedelta
+# ----------------------------------------------------------------------------
+
+theStartTime = datetime(2015, 1, 2, 0, 0)
+
+def getSymbolNames(aNumberOfSymbols : int) -> list:
+    """returns names of synthetic symbols like 'SYM0001'"""
+    return [f"SYM{aNumber:04d}" for aNumber in range(1, aNumberOfSymbols + 1)]
+
+def getExportFileName(aDirectory : str, aSymbol : str, aTimeframe : str = 'M1') -> str:
+    """returns full path and name of an export like Quant Data Manager writes it"""
+    return os.path.join(aDirectory, f"{aSymbol}-{aTimeframe.upper()}-No Session.csv")
+
+def writeQuotes(nameOfFile : str, aNumberOfRows : int, aSeed : int = 0) -> tuple:
+    """write a random walk of M1 quotes from Monday to Friday,
+       returns the first and the last timestamp
+    """
+    theRandom = random.Random(aSeed)
+    thePrice = 100.0
+    theTime = theStartTime
+    theLastTime = theTime
+    with open(nameOfFile, mode='w', newline='', encoding='UTF8') as quotesfile:
+        theLines = []
+        for aRow in range(aNumberOfRows):
+            anOpen = thePrice
+            aHigh = anOpen + theRandom.random()
+            aLow = max(anOpen - theRandom.random(), 0.01)
+            aClose = aLow + theRandom.random() * (aHigh - aLow)
+            theLines.append(f"{theTime:%Y.%m.%d,%H:%M},{anOpen:.2f},{aHigh:.2f},{aLow:.2f},{aClose:.2f},"
+                            f"{theRandom.randint(0, 5000)}\r\n")
+            if len(theLines) == 65536:
+                quotesfile.writelines(theLines)
+                theLines = []
+            thePrice = aClose
+            theLastTime = theTime
+            theTime += timedelta(minutes=1)
+            if theTime.weekday() == 5: # Saturday -> Monday
+                theTime += timedelta(days=2)
+        quotesfile.writelines(theLines)
+    return theStartTime, theLastTime
+
+def writeSymbolList(nameOfFile : str, theDateRanges : dict) -> None:
+    """write a symbol list, theDateRanges = symbol -> (first timestamp, last timestamp)"""
+    with open(nameOfFile, mode='w', newline='', encoding='UTF8') as symbolfile:
+        theWriter = csv.writer(symbolfile, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        theWriter.writerow(['Symbol', 'Date from', 'Date to'])
+        for aSymbol, (aDateFrom, aDateTo) in theDateRanges.items():
+            theWriter.writerow([aSymbol, f"{aDateFrom:%Y.%m.%d}", f"{aDateTo:%Y.%m.%d}"])
+
+def createDatabase(aDirectory : str, aNumberOfSymbols : int, aNumberOfRows : int,
+                   nameOfSymbolList : str = 'symbols.csv') -> list:
+    """write a symbol list and one M1 export per symbol into aDirectory,
+       returns the symbols
+    """
+    pathlib.Path(aDirectory).mkdir(parents=True, exist_ok=True)
+    theSymbols = getSymbolNames(aNumberOfSymbols)
+    theDateRanges = {}
+    for aSeed, aSymbol in enumerate(theSymbols):
+        logger.info(f"writing {aNumberOfRows} synthetic quotes of '{aSymbol}'")
+        theDateRanges[aSymbol] = writeQuotes(getExportFileName(aDirectory, aSymbol), aNumberOfRows, aSeed)
+    writeSymbolList(os.path.join(aDirectory, nameOfSymbolList), theDateRanges)
+    return theSymbols
+
+def main():
+    logger.info("--- Synthetic quotes in the format of Quant Data Manager ---")
+
+if __name__ == '__main__':
+    main()
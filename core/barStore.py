@@ -0,0 +1,220 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+memory-mappable binary store of converted quotes
+
+a bar store is a directory '<symbol>-<timeframe>.bars' with one column per file:
+    timestamp.npy                     = seconds since epoch (int64)
+    open.npy, high.npy, low.npy, close.npy = prices (float64)
+    volume.npy                        = volume (int64, float64 if the export has decimals)
+    header.json                       = number of bars, decimals and time format of the export
+the column files are standard .npy files, numpy.load(..., mmap_mode='r') maps them without copying,
+new columns are written to '~<column>.npy' and renamed at close(), an aborted write leaves the store as before
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, json, pathlib, struct, ast
+try:
+    import numpy as np
+except ImportError: # numpy is optional, the csv engine works without it
+    np = None
+import core.compressedFiles as compressedFiles
+# ----------------------------------------------------------------------------
+
+theColumns = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+theHeaderFileName = 'header.json'
+theStoreVersion = 1
+
+# .npy format version 1.0, the shape is written with a fixed width,
+# so the number of bars can be updated in place after appending
+# source: https://numpy.org/doc/stable/reference/generated/numpy.lib.format.html
+theNpyMagic = b'\x93NUMPY\x01\x00'
+theNpyHeaderSize = 128
+
+def getStoreName(nameOfConvertedFile : str) -> str:
+    """returns the name of the bar store next to a converted csv-file, which may be compressed"""
+    return f"{os.path.splitext(compressedFiles.getPlainFileName(nameOfConvertedFile))[0]}.bars"
+
+def _getNpyHeader(aDtype, aNumberOfBars : int) -> bytes:
+    """returns a .npy header of fixed size theNpyHeaderSize"""
+    theHeader = "{'descr': '%s', 'fortran_order': False, 'shape': (%20d,), }" % (aDtype.str, aNumberOfBars)
+    thePadding = theNpyHeaderSize - len(theNpyMagic) - 2 - len(theHeader) - 1
+    return theNpyMagic + struct.pack('<H', theNpyHeaderSize - len(theNpyMagic) - 2) + \
+           (theHeader + ' ' * thePadding + '\n').encode('latin1')
+
+def _readNpyHeader(aColumnFile) -> tuple:
+    """returns dtype and number of bars of a column file written by barStoreWriter"""
+    theHeader = aColumnFile.read(theNpyHeaderSize)
+    if len(theHeader) != theNpyHeaderSize or not theHeader.startswith(theNpyMagic):
+        raise ValueError(f"'{aColumnFile.name}' is not a column of a bar store")
+    theDictionary = ast.literal_eval(theHeader[len(theNpyMagic)+2:].decode('latin1'))
+    return np.dtype(theDictionary['descr']), theDictionary['shape'][0]
+
+class barStoreWriter:
+    """write quoteBlocks into a bar store, isAppend = append to an existing bar store"""
+    def __init__(self,
+        nameOfStore : str,
+        isAppend : bool = False
+        ):
+        self._storeName = nameOfStore
+        self._files = {}
+        self._dtypes = {}
+        self._tempColumns = set()
+        self._numberOfBars = 0
+        self._decimals = None
+        self._timeWidth = None
+
+        pathlib.Path(nameOfStore).mkdir(parents=True, exist_ok=True)
+        if isAppend:
+            theHeader = readHeader(nameOfStore)
+            self._numberOfBars = theHeader['bars']
+            self._decimals = tuple(theHeader['decimals'])
+            self._timeWidth = theHeader['timeWidth']
+            for aColumn in theColumns:
+                aColumnFile = open(self._getColumnFileName(aColumn), mode='r+b')
+                self._dtypes[aColumn], theNumberOfBars = _readNpyHeader(aColumnFile)
+                if theNumberOfBars != self._numberOfBars:
+                    aColumnFile.close()
+                    raise ValueError(f"column '{aColumn}' of '{nameOfStore}' is incomplete")
+                # drop anything written after the last complete close()
+                aColumnFile.truncate(theNpyHeaderSize + self._numberOfBars * self._dtypes[aColumn].itemsize)
+                aColumnFile.seek(0, os.SEEK_END)
+                self._files[aColumn] = aColumnFile
+
+    def _getColumnFileName(self, aColumn : str, isTemp : bool = False) -> str:
+        return os.path.join(self._storeName, f"~{aColumn}.npy" if isTemp else f"{aColumn}.npy")
+
+    def _openColumn(self, aColumn : str, aDtype) -> None:
+        """create a temp column file, the header is written again at close()"""
+        self._dtypes[aColumn] = np.dtype(aDtype)
+        aColumnFile = open(self._getColumnFileName(aColumn, isTemp=True), mode='w+b')
+        aColumnFile.write(_getNpyHeader(self._dtypes[aColumn], 0))
+        self._files[aColumn] = aColumnFile
+        self._tempColumns.add(aColumn)
+
+    def _promoteToFloat(self, aColumn : str) -> None:
+        """convert an int64 column to float64 in a temp column file, when a block contains decimals"""
+        aColumnFile = self._files[aColumn]
+        aColumnFile.seek(theNpyHeaderSize)
+        theValues = np.fromfile(aColumnFile, dtype=self._dtypes[aColumn], count=self._numberOfBars)
+        aColumnFile.close()
+        self._openColumn(aColumn, np.float64)
+        self._files[aColumn].write(theValues.astype(np.float64).tobytes())
+
+    def write(self, aBlock) -> None:
+        """append the bars of a quoteBlock"""
+        if not self._files:
+            for aColumn in theColumns:
+                self._openColumn(aColumn, getattr(aBlock, aColumn).dtype)
+            self._decimals = tuple(aBlock.decimals)
+            self._timeWidth = aBlock.timeWidth
+        else:
+            self._decimals = tuple(max(aPair) for aPair in zip(self._decimals, aBlock.decimals))
+
+        for aColumn in theColumns:
+            theValues = getattr(aBlock, aColumn)
+            if theValues.dtype.kind == 'f' and self._dtypes[aColumn].kind == 'i':
+                self._promoteToFloat(aColumn)
+            self._files[aColumn].write(np.ascontiguousarray(theValues, dtype=self._dtypes[aColumn]).tobytes())
+        self._numberOfBars += len(aBlock)
+
+    def close(self, isAborted : bool = False) -> None:
+        """write number of bars into the column files and the header,
+           isAborted = the conversion failed, the store is left as before
+        """
+        if isAborted:
+            # appended bars after the number of bars in the header are dropped when the store is opened again
+            for aColumnFile in self._files.values():
+                aColumnFile.close()
+            self._files = {}
+            for aColumn in self._tempColumns:
+                pathlib.Path(self._getColumnFileName(aColumn, isTemp=True)).unlink(missing_ok=True)
+            return
+        if not self._files and not self._dtypes:
+            # export without bars
+            for aColumn in theColumns:
+                self._openColumn(aColumn, np.int64 if aColumn in ('timestamp', 'volume') else np.float64)
+        for aColumn, aColumnFile in self._files.items():
+            aColumnFile.seek(0)
+            aColumnFile.write(_getNpyHeader(self._dtypes[aColumn], self._numberOfBars))
+            aColumnFile.flush()
+            os.fsync(aColumnFile.fileno())
+            aColumnFile.close()
+        self._files = {}
+        if self._tempColumns:
+            # without header the store is incomplete while its columns are replaced
+            pathlib.Path(self._storeName, theHeaderFileName).unlink(missing_ok=True)
+            for aColumn in self._tempColumns:
+                os.replace(self._getColumnFileName(aColumn, isTemp=True), self._getColumnFileName(aColumn))
+        # the header is written last, a store without header is incomplete
+        theHeader = {'version'  : theStoreVersion,
+                     'bars'     : self._numberOfBars,
+                     'columns'  : {aColumn : aDtype.str for aColumn, aDtype in self._dtypes.items()},
+                     'decimals' : list(self._decimals or ()),
+                     'timeWidth': self._timeWidth}
+        with open(os.path.join(self._storeName, theHeaderFileName), mode='w', encoding='UTF8') as headerfile:
+            json.dump(theHeader, headerfile, indent=1)
+
+def removeStore(nameOfStore : str) -> None:
+    """delete a bar store"""
+    theStorePath = pathlib.Path(nameOfStore)
+    if not theStorePath.is_dir():
+        return
+    # header first, an interrupted delete leaves an incomplete store
+    (theStorePath / theHeaderFileName).unlink(missing_ok=True)
+    for aColumn in theColumns:
+        (theStorePath / f"{aColumn}.npy").unlink(missing_ok=True)
+        (theStorePath / f"~{aColumn}.npy").unlink(missing_ok=True)
+    theStorePath.rmdir()
+
+def readHeader(nameOfStore : str) -> dict:
+    """returns the header of a bar store
+
+       raises FileNotFoundError, if the store does not exist or is incomplete
+    """
+    with open(os.path.join(nameOfStore, theHeaderFileName), mode='r', encoding='UTF8') as headerfile:
+        return json.load(headerfile)
+
+def openStore(nameOfStore : str) -> dict:
+    """map all columns of a bar store read-only into memory, without reading the data,
+       returns a dict column name -> numpy.memmap
+    """
+    theHeader = readHeader(nameOfStore)
+    theResult = {}
+    for aColumn in theColumns:
+        theValues = np.load(os.path.join(nameOfStore, f"{aColumn}.npy"), mmap_mode='r')
+        # a column may be longer, if writing was interrupted after close() of an earlier run
+        theResult[aColumn] = theValues[:theHeader['bars']]
+    return theResult
+
+def getLastTimestamp(nameOfStore : str):
+    """returns timestamp of the last bar in a bar store, None if the store is empty or does not exist"""
+    try:
+        theHeader = readHeader(nameOfStore)
+        if theHeader['bars'] == 0:
+            return None
+        return int(openStore(nameOfStore)['timestamp'][-1])
+    except (OSError, ValueError, KeyError):
+        return None
+
+def main():
+    logger.info("--- Memory-mappable binary store of converted quotes ---")
+
+if __name__ == '__main__':
+    main()
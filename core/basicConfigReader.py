@@ -59,6 +59,30 @@ class defaultConfig:
             raise configparser.ParsingError
         return theValue
 
+    def getOptionalValue(self, section : str, option : str, aDefault : str) -> str:
+        """get value from configfile, returns aDefault if the option is not set"""
+        if not self._config.has_option(section,option) or len(self._config.get(section,option)) == 0:
+            logger.debug(f"option '{option}' not set at section '{section}', taking default '{aDefault}'")
+            return aDefault
+        return self._config.get(section,option)
+
+    def getOptionalBoolean(self, section : str, option : str, aDefault : bool) -> bool:
+        """get yes/no value from configfile, returns aDefault if the option is not set"""
+        theValue = self.getOptionalValue(section, option, str(aDefault))
+        if theValue.lower() not in self._config.BOOLEAN_STATES:
+            logger.error(f"option '{option}' at section '{section}' has to be yes or no, not '{theValue}'")
+            raise configparser.ParsingError
+        return self._config.BOOLEAN_STATES[theValue.lower()]
+
+    def getOptionalSection(self, section : str) -> dict:
+        """get all options of a section from configfile in their order, empty if the section is not set,
+           the names of the options are lower case
+        """
+        if not self._config.has_section(section):
+            logger.debug(f"section '{section}' not set")
+            return {}
+        return {anOption : self._config.get(section,anOption) for anOption in self._config.options(section)}
+
     @property
     def configFileName(self):
         """Get full path and name of config file"""
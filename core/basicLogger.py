@@ -16,22 +16,30 @@
 # limitations under the License
 """
 setup basic logging capabilities
+
+isQueued = records are put into a queue, a background thread writes them to console and log file,
+           worker processes forward their records to this queue, see initiateWorker()
+source: https://docs.python.org/3/howto/logging-cookbook.html#logging-to-a-single-file-from-multiple-processes
 """
 
 import logging
 logger = logging.getLogger(__name__)
 # ----------------------------------------------------------------------------
-import sys, os, pathlib
-from logging.handlers import TimedRotatingFileHandler
+import sys, os, pathlib, atexit, multiprocessing
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 from datetime import datetime
 # ----------------------------------------------------------------------------
 
+# queue and background thread of queued logging, None if records are written synchronously
+theLogQueue = None
+theLogListener = None
+
 
 def main():
     initiate(logging.INFO)
     logger.info("--- Basic Logger Modul  ---")
 
-def initiate(theLogLevel=logging.INFO):    
+def initiate(theLogLevel=logging.INFO, isQueued=False):    
     # -------------------------------------------
     # setup logging with minimalistic features
         
@@ -45,7 +53,7 @@ def initiate(theLogLevel=logging.INFO):
     theLogFormat = '%(asctime)s [%(levelname)-8s] %(message)s'
 
     # log file location
-    theLogDirectory = os.path.join(os.getcwd(), 'log')
+    theLogDirectory = getLogDirectory()
     # source: https://stackoverflow.com/questions/273192/how-can-i-safely-create-a-nested-directory
     pathlib.Path(theLogDirectory).mkdir(parents=True, exist_ok=True) 
     theLogFileName = os.path.join(theLogDirectory,'log.txt')  
@@ -61,6 +69,23 @@ def initiate(theLogLevel=logging.INFO):
                                        interval=1,
                                        backupCount=7)
 
+    if isQueued:
+        # console and file are written by the listener thread, callers only put records into the queue,
+        # a queue of processes takes the records of spawned worker processes too
+        global theLogQueue, theLogListener
+        theFormatter = logging.Formatter(theLogFormat, theLogDateFormat)
+        theConsoleHandler.setFormatter(theFormatter)
+        theFileHandler.setFormatter(theFormatter)
+        theLogQueue = multiprocessing.get_context('spawn').Queue()
+        theLogListener = QueueListener(theLogQueue, theConsoleHandler, theFileHandler, respect_handler_level=True)
+        theLogListener.start()
+        atexit.register(shutdown)
+        # the queued record carries the message only, it is formatted by the handlers of the listener
+        theQueueHandler = QueueHandler(theLogQueue)
+        theQueueHandler.setFormatter(logging.Formatter('%(message)s'))
+        logging.basicConfig(level=theLogLevel, handlers=[theQueueHandler])
+        return
+
     # source: http://plumberjack.blogspot.com/2011/04/added-functionality-for-basicconfig-in.html                                       
     logging.basicConfig(
                         level=theLogLevel,
@@ -72,6 +97,33 @@ def initiate(theLogLevel=logging.INFO):
                         ]
                         )
 
+def getLogDirectory() -> str:
+    """returns the directory of the log file, e.g. for profiles of a run"""
+    return os.path.join(os.getcwd(), 'log')
+
+def getQueue():
+    """returns the queue of queued logging, None if records are written synchronously"""
+    return theLogQueue
+
+def initiateWorker(aLogQueue, theLogLevel=logging.INFO):
+    """initializer of a worker process, which forwards its records to aLogQueue of the parent process,
+       records below theLogLevel are dropped in the worker, without aLogQueue logging is not changed
+    """
+    if aLogQueue is None:
+        return
+    theRootLogger = logging.getLogger()
+    for aHandler in list(theRootLogger.handlers):
+        theRootLogger.removeHandler(aHandler)
+    theRootLogger.addHandler(QueueHandler(aLogQueue))
+    theRootLogger.setLevel(theLogLevel)
+
+def shutdown():
+    """write all queued records and stop the background thread of queued logging"""
+    global theLogListener
+    if theLogListener is not None:
+        theLogListener.stop()
+        theLogListener = None
+
 
 if __name__ == '__main__':
     main()    
@@ -21,18 +21,38 @@ class for calling QuantDataManger on windows
 import logging
 logger = logging.getLogger(__name__)
 # ----------------------------------------------------------------------------
-import sys, os, configparser, pathlib, subprocess, errno
+import sys, os, configparser, pathlib, subprocess, errno, time, fnmatch, signal, threading, contextlib
+import multiprocessing, concurrent.futures
 import core.basicConfigReader as miniConfig
+import core.basicLogger as minilog
 import core.quantDataConverter as dataConverter
+import core.exportState as exportState
+import core.runJournal as runJournal
+import core.outputWriters as outputWriters
+import core.resampler as resampler
+import core.runMetrics as runMetrics
+import core.runProfiler as runProfiler
+import core.progressReporter as progressReporter
+import core.compressedFiles as compressedFiles
+import core.qualityValidator as qualityValidator
+import core.timeZoneConverter as timeZoneConverter
+import core.sqliteStore as sqliteStore
+import core.exportWatcher as exportWatcher
+import core.panelBuilder as panelBuilder
+import core.calendarAligner as calendarAligner
+import core.tickAggregator as tickAggregator
 # ----------------------------------------------------------------------------
 
 class callQuantDataManager:
     """call QuantDataManger on windows, optionally passing parameters"""
     def __init__(self, 
-        aConfig : miniConfig.defaultConfig
+        aConfig : miniConfig.defaultConfig,
+        aProfiler : runProfiler.runProfiler = None
         ):
 
         self._config = aConfig
+        # profiles of stages and sampled conversions, None = no profiling
+        self._Profiler = aProfiler
 
         # data manager program
         theQuantDataManager_SectionName = "quantdatamanager"
@@ -46,6 +66,15 @@ class callQuantDataManager:
             logger.error(f"Quant Data Manager not found at '{theFilePath}'.")
             raise FileNotFoundError 
         self._QuantDataManager = theQuantDataManagerProgram
+
+        # exports by the script 'exportquotes', one symbol per call,
+        # or by calling the program directly with a group of symbols per call
+        theExportBackend = self._config.getOptionalValue(theQuantDataManager_SectionName,"exportbackend","script").lower()
+        if theExportBackend not in ('script', 'direct'):
+            logger.error(f"unknown export backend '{theExportBackend}' at section '{theQuantDataManager_SectionName}'")
+            raise configparser.ParsingError
+        self._ExportBackend = theExportBackend
+        self._ExportBatchSize = self._getNumberOfWorkers(theQuantDataManager_SectionName,"exportbatchsize")
        
         # calling QuantDataManager via .bat file
         # .bat file location and name = bat/callProgram.bat
@@ -66,12 +95,342 @@ class callQuantDataManager:
         # source: https://stackoverflow.com/questions/273192/how-can-i-safely-create-a-nested-directory
         pathlib.Path(theDataDirectory_Path).mkdir(parents=True, exist_ok=True) 
 
+        # conversion engine for quotes, 'csv', 'numpy' or 'mmap'
+        theConverter_SectionName = "converter"
+        theConverterEngine = self._config.getOptionalValue(theConverter_SectionName,"engine","csv").lower()
+        if theConverterEngine not in ('csv', 'numpy', 'mmap'):
+            logger.error(f"unknown conversion engine '{theConverterEngine}' at section '{theConverter_SectionName}'")
+            raise configparser.ParsingError
+        self._ConverterEngine = theConverterEngine
+
+        # exported data, 'bars' of the converted timeframe or 'ticks' aggregated to bars while converting
+        theConverterSource = self._config.getOptionalValue(theConverter_SectionName,"source","bars").lower()
+        if theConverterSource not in ('bars', 'ticks'):
+            logger.error(f"unknown source '{theConverterSource}' at section '{theConverter_SectionName}'")
+            raise configparser.ParsingError
+        self._ConverterSource = theConverterSource
+
+        # price of bars aggregated from ticks, 'bid', 'ask' or 'mid'
+        theConverterPrice = self._config.getOptionalValue(theConverter_SectionName,"price","bid").lower()
+        try:
+            tickAggregator.checkPrice(theConverterPrice)
+        except ValueError as inst:
+            logger.error(f"{inst} at section '{theConverter_SectionName}'")
+            raise configparser.ParsingError
+        self._ConverterPrice = theConverterPrice
+
+        # additional outputs written in the same pass as the converted csv-files
+        theConverterOutputs = self._config.getOptionalValue(theConverter_SectionName,"outputs","")
+        theConverterOutputs = tuple(anOutput.strip().lower() for anOutput in theConverterOutputs.split(',') if anOutput.strip())
+        try:
+            outputWriters.checkOutputNames(theConverterOutputs)
+        except ValueError as inst:
+            logger.error(f"{inst} at section '{theConverter_SectionName}'")
+            raise configparser.ParsingError
+
+        # higher timeframes resampled in the same pass, written like additional outputs
+        theConverterTimeframes = self._config.getOptionalValue(theConverter_SectionName,"timeframes","")
+        theConverterTimeframes = tuple(aTimeframe.strip().upper() for aTimeframe in theConverterTimeframes.split(',') if aTimeframe.strip())
+        for aTimeframe in theConverterTimeframes:
+            if not resampler.isTimeframe(aTimeframe):
+                logger.error(f"unknown timeframe '{aTimeframe}' at section '{theConverter_SectionName}'")
+                raise configparser.ParsingError
+        self._ConverterOutputs = theConverterOutputs + theConverterTimeframes
+
+        # append only new quotes to already converted files
+        self._IncrementalConversion = self._config.getOptionalBoolean(theConverter_SectionName,"incremental",False)
+
+        # progress of every conversion, 'auto', 'bar', 'log' or 'off'
+        theConverterProgress = self._config.getOptionalValue(theConverter_SectionName,"progress","auto").lower()
+        try:
+            progressReporter.checkProgressMode(theConverterProgress)
+        except ValueError as inst:
+            logger.error(f"{inst} at section '{theConverter_SectionName}'")
+            raise configparser.ParsingError
+        self._ConverterProgress = theConverterProgress
+
+        # compression of converted and resampled csv-files, 'none', 'gzip', 'xz' or 'bz2'
+        theConverterCompression = self._config.getOptionalValue(theConverter_SectionName,"compression","none").lower()
+        theCompressionLevel = self._config.getOptionalValue(theConverter_SectionName,"compressionlevel","")
+        if theCompressionLevel and not theCompressionLevel.isdigit():
+            logger.error(f"option 'compressionlevel' at section '{theConverter_SectionName}' has to be a number, not '{theCompressionLevel}'")
+            raise configparser.ParsingError
+        theCompressionLevel = int(theCompressionLevel) if theCompressionLevel else None
+        theCompressionThreads = self._getNumberOfWorkers(theConverter_SectionName,"compressionthreads")
+        try:
+            compressedFiles.checkCompression(theConverterCompression, theCompressionLevel, theCompressionThreads)
+        except ValueError as inst:
+            logger.error(f"{inst} at section '{theConverter_SectionName}'")
+            raise configparser.ParsingError
+        self._ConverterCompression = theConverterCompression
+        self._CompressionLevel = theCompressionLevel
+        self._CompressionThreads = theCompressionThreads
+
+        # data quality checked while converting, 'off', 'report', 'drop' or 'repair'
+        theValidationMode = self._config.getOptionalValue(theConverter_SectionName,"validation","off").lower()
+        try:
+            qualityValidator.checkValidationMode(theValidationMode)
+        except ValueError as inst:
+            logger.error(f"{inst} at section '{theConverter_SectionName}'")
+            raise configparser.ParsingError
+        self._ValidationMode = theValidationMode
+
+        # sparse time index of the converted csv-files, e.g. 'D1' = offset of the first line of every day
+        theIndexTimeframe = self._config.getOptionalValue(theConverter_SectionName,"index","").strip().upper() or None
+        if theIndexTimeframe is not None and not resampler.isTimeframe(theIndexTimeframe):
+            logger.error(f"unknown index timeframe '{theIndexTimeframe}' at section '{theConverter_SectionName}'")
+            raise configparser.ParsingError
+        self._IndexTimeframe = theIndexTimeframe
+
+        # time zone and regular trading session of the exports, converted to UTC
+        theConverterTimeZone = self._config.getOptionalValue(theConverter_SectionName,"timezone","UTC")
+        theConverterSession = self._config.getOptionalValue(theConverter_SectionName,"session","") or None
+        self._ConverterTimeZone = self._checkTimeZone(theConverter_SectionName, theConverterTimeZone, theConverterSession)
+
+        # time zone and session of single symbols or of symbols matching a pattern like '*.DE'
+        theTimeZones_SectionName = "timezones"
+        self._SymbolTimeZones = {}
+        for aPattern, aValue in self._config.getOptionalSection(theTimeZones_SectionName).items():
+            theValues = aValue.split()
+            if not 1 <= len(theValues) <= 2:
+                logger.error(f"option '{aPattern}' at section '{theTimeZones_SectionName}' has to be '<time zone> [<session>]', not '{aValue}'")
+                raise configparser.ParsingError
+            self._SymbolTimeZones[aPattern] = self._checkTimeZone(theTimeZones_SectionName, *theValues)
+
+        # number of parallel exports and conversions
+        theParallel_SectionName = "parallel"
+        self._ExportWorkers  = self._getNumberOfWorkers(theParallel_SectionName,"exportworkers")
+        self._ConvertWorkers = self._getNumberOfWorkers(theParallel_SectionName,"convertworkers")
+
+        # watch mode, exports are converted as soon as they are complete
+        theWatch_SectionName = "watch"
+        self._WatchInterval = self._getSeconds(theWatch_SectionName,"interval","2")
+        self._WatchSettleTime = self._getSeconds(theWatch_SectionName,"settle","5")
+        theWatchQueueSize = self._config.getOptionalValue(theWatch_SectionName,"queue","")
+        if theWatchQueueSize and (not theWatchQueueSize.isdigit() or int(theWatchQueueSize) < 1):
+            logger.error(f"option 'queue' at section '{theWatch_SectionName}' has to be a number > 0, not '{theWatchQueueSize}'")
+            raise configparser.ParsingError
+        self._WatchQueueSize = int(theWatchQueueSize) if theWatchQueueSize else 2 * self._ConvertWorkers
+
+        # failed symbols are retried at the end of the run, waiting backoff, 2 * backoff, 4 * backoff, ... seconds,
+        # opt-in, by default failed symbols are not retried
+        theRetry_SectionName = "retry"
+        theRetryAttempts = self._config.getOptionalValue(theRetry_SectionName,"attempts","0")
+        if not theRetryAttempts.isdigit():
+            logger.error(f"option 'attempts' at section '{theRetry_SectionName}' has to be a number >= 0, not '{theRetryAttempts}'")
+            raise configparser.ParsingError
+        self._RetryAttempts = int(theRetryAttempts)
+        self._RetryBackoff = self._getSeconds(theRetry_SectionName,"backoff","30")
+
+        # panel of all converted symbols on a common time grid, see buildPanel()
+        thePanel_SectionName = "panel"
+        self._PanelBuild = self._config.getOptionalBoolean(thePanel_SectionName,"build",False)
+        thePanelCalendar = self._config.getOptionalValue(thePanel_SectionName,"calendar","union").lower()
+        thePanelTimeZone = self._config.getOptionalValue(thePanel_SectionName,"timezone","UTC")
+        thePanelSession = self._config.getOptionalValue(thePanel_SectionName,"session","") or None
+        try:
+            panelBuilder.checkCalendar(thePanelCalendar, thePanelTimeZone, thePanelSession)
+        except ValueError as inst:
+            logger.error(f"{inst} at section '{thePanel_SectionName}'")
+            raise configparser.ParsingError
+        self._PanelCalendar = (thePanelCalendar, thePanelTimeZone, thePanelSession)
+
+        # trading calendar, the converted bars are aligned to, see core/calendarAligner.py
+        theCalendar_SectionName = "calendar"
+        theCalendarFill = self._config.getOptionalValue(theCalendar_SectionName,"align","off").lower()
+        self._ConverterCalendar = None
+        if theCalendarFill != 'off':
+            theCalendarTimeZone = self._config.getOptionalValue(theCalendar_SectionName,"timezone","UTC")
+            theCalendarSession = self._config.getOptionalValue(theCalendar_SectionName,"session","") or None
+            try:
+                calendarAligner.checkCalendar(theCalendarFill, theCalendarTimeZone, theCalendarSession)
+                theHolidays = calendarAligner.parseHolidays(
+                    self._config.getOptionalValue(theCalendar_SectionName,"holidays",""))
+            except ValueError as inst:
+                logger.error(f"{inst} at section '{theCalendar_SectionName}'")
+                raise configparser.ParsingError
+            if self._ConverterSource == 'ticks':
+                logger.error(f"option 'align' at section '{theCalendar_SectionName}' requires source=bars")
+                raise configparser.ParsingError
+            self._ConverterCalendar = (theCalendarFill, theCalendarTimeZone, theCalendarSession, theHolidays)
+
+        # runtime metrics of all stages, see writeRunReport()
+        self._Metrics = runMetrics.runMetrics()
 
     @property
     def QuantDataManagerFileName(self) -> str:
         """Get full path and name of Quant Data Manager Console Application"""
         return self._QuantDataManager
 
+    @property
+    def ExportBackend(self) -> str:
+        """Get how quotes are exported, 'script' = one call of the script per symbol,
+           'direct' = one call of Quant Data Manager per group of symbols
+        """
+        return self._ExportBackend
+
+    @property
+    def ExportBatchSize(self) -> int:
+        """Get number of symbols exported by one call of Quant Data Manager, backend 'direct' only"""
+        return self._ExportBatchSize if self.ExportBackend == 'direct' else 1
+
+    @property
+    def ConverterEngine(self) -> str:
+        """Get conversion engine for quotes, 'csv', 'numpy' or 'mmap'"""
+        return self._ConverterEngine
+
+    @property
+    def ConverterSource(self) -> str:
+        """Get exported data, 'bars' or 'ticks' aggregated to bars while converting"""
+        return self._ConverterSource
+
+    @property
+    def ConverterPrice(self) -> str:
+        """Get price of bars aggregated from ticks, 'bid', 'ask' or 'mid'"""
+        return self._ConverterPrice
+
+    @property
+    def ConverterOutputs(self) -> tuple:
+        """Get additional outputs and resampled timeframes written in the same pass as the converted csv-files"""
+        return self._ConverterOutputs
+
+    @property
+    def IncrementalConversion(self) -> bool:
+        """Get if only new quotes are appended to already converted files"""
+        return self._IncrementalConversion
+
+    @property
+    def ConverterProgress(self) -> str:
+        """Get progress mode of conversions, 'auto', 'bar', 'log' or 'off'"""
+        return self._ConverterProgress
+
+    @property
+    def ConverterCompression(self) -> str:
+        """Get compression of converted csv-files, 'none', 'gzip', 'xz' or 'bz2'"""
+        return self._ConverterCompression
+
+    @property
+    def CompressionLevel(self) -> int:
+        """Get compression level of converted csv-files, None = default of the compression"""
+        return self._CompressionLevel
+
+    @property
+    def CompressionThreads(self) -> int:
+        """Get number of threads compressing a converted csv-file"""
+        return self._CompressionThreads
+
+    @property
+    def ValidationMode(self) -> str:
+        """Get data quality check while converting, 'off', 'report', 'drop' or 'repair'"""
+        return self._ValidationMode
+
+    @property
+    def IndexTimeframe(self) -> str:
+        """Get interval of the time index written with converted csv-files, None = no index"""
+        return self._IndexTimeframe
+
+    @property
+    def ConverterCalendar(self) -> tuple:
+        """Get fill, time zone, session and holidays of the trading calendar of converted bars, None = no alignment"""
+        return self._ConverterCalendar
+
+    @property
+    def ConverterTimeZone(self) -> tuple:
+        """Get time zone and session of exported quotes, which are not set at section 'timezones'"""
+        return self._ConverterTimeZone
+
+    def getTimeZone(self, aSymbol : str) -> tuple:
+        """returns time zone and session of the exported quotes of a symbol, session None = all quotes,
+           a symbol at section 'timezones' goes first, then the first matching pattern, then section 'converter'
+        """
+        theSymbol = aSymbol.lower() # option names are lower case
+        if theSymbol in self._SymbolTimeZones:
+            return self._SymbolTimeZones[theSymbol]
+        for aPattern, theTimeZone in self._SymbolTimeZones.items():
+            if fnmatch.fnmatchcase(theSymbol, aPattern):
+                return theTimeZone
+        return self.ConverterTimeZone
+
+    def _getTimeZoneState(self, aSymbol : str) -> str:
+        """time zone and session of a symbol as remembered in the export state, e.g. 'America/New_York 09:30-16:00'"""
+        return ' '.join(aValue for aValue in self.getTimeZone(aSymbol) if aValue)
+
+    @property
+    def ExportWorkers(self) -> int:
+        """Get number of Quant Data Manager exports running at the same time"""
+        return self._ExportWorkers
+
+    @property
+    def ConvertWorkers(self) -> int:
+        """Get number of processes converting exported quotes"""
+        return self._ConvertWorkers
+
+    @property
+    def WatchInterval(self) -> float:
+        """Get seconds between two looks at the data directory in watch mode"""
+        return self._WatchInterval
+
+    @property
+    def WatchSettleTime(self) -> float:
+        """Get seconds an export has to stay unchanged, before it is converted in watch mode"""
+        return self._WatchSettleTime
+
+    @property
+    def WatchQueueSize(self) -> int:
+        """Get number of conversions queued or running at the same time in watch mode"""
+        return self._WatchQueueSize
+
+    @property
+    def RetryAttempts(self) -> int:
+        """Get number of retries of failed symbols at the end of a run, 0 = no retry"""
+        return self._RetryAttempts
+
+    @property
+    def RetryBackoff(self) -> float:
+        """Get seconds before the first retry of failed symbols, doubled with every further retry"""
+        return self._RetryBackoff
+
+    @property
+    def Profiler(self) -> runProfiler.runProfiler:
+        """Get profiler of stages and sampled conversions, None without profiling"""
+        return self._Profiler
+
+    @property
+    def PanelBuild(self) -> bool:
+        """Get if the panel of all converted symbols is built after the export"""
+        return self._PanelBuild
+
+    @property
+    def PanelCalendar(self) -> tuple:
+        """Get calendar, time zone and session of the time grid of the panel"""
+        return self._PanelCalendar
+
+    @property
+    def Metrics(self) -> runMetrics.runMetrics:
+        """Get runtime metrics of all stages called so far"""
+        return self._Metrics
+
+    @property
+    def ReportFileName(self) -> str:
+        """Get full path and name of the JSON run report, None if not configured"""
+        return self._getMetricsFileName("report")
+
+    @property
+    def QualityReportFileName(self) -> str:
+        """Get full path and name of the JSON quality report per symbol, None if not configured"""
+        return self._getMetricsFileName("quality")
+
+    @property
+    def PrometheusFileName(self) -> str:
+        """Get full path and name of the Prometheus textfile, None if not configured"""
+        return self._getMetricsFileName("prometheus")
+
+    def _getMetricsFileName(self, anOption : str) -> str:
+        theFileName = self._config.getOptionalValue("metrics",anOption,"")
+        if not theFileName:
+            return None
+        return os.path.join(self.DataDirectory,theFileName)
+
     @property
     def DataDirectory(self) -> str:
         """Get full path and name of the Data Directory"""
@@ -88,6 +447,22 @@ class callQuantDataManager:
         theSymbolListFileName        = os.path.join(os.getcwd(), self.DataDirectory,theSymbolListFileName)          
         return theSymbolListFileName
 
+    @property
+    def StateFileName(self) -> str:
+        """Get full path and name of the export state file"""
+        theDataDirectory_SectionName = "data"
+        theStateFileName             = self._config.getOptionalValue(theDataDirectory_SectionName,"statefile","exportstate.json")
+        theStateFileName             = os.path.join(self.DataDirectory,theStateFileName)
+        return theStateFileName
+
+    @property
+    def JournalFileName(self) -> str:
+        """Get full path and name of the run journal"""
+        theDataDirectory_SectionName = "data"
+        theJournalFileName           = self._config.getOptionalValue(theDataDirectory_SectionName,"journal","runjournal.jsonl")
+        theJournalFileName           = os.path.join(self.DataDirectory,theJournalFileName)
+        return theJournalFileName
+
     def _getBatFileName(self,anOption : str) -> str:
         """check config file at 'bat'-section for an option,
            returns option value on success
@@ -103,8 +478,48 @@ class callQuantDataManager:
 
         return theBatchFile_Program
 
+    def _checkTimeZone(self, aSection : str, aTimeZone : str, aSession : str = None) -> tuple:
+        """check time zone and session at a section of config file, returns them as tuple"""
+        try:
+            timeZoneConverter.checkTimeZone(aTimeZone, aSession)
+        except ValueError as inst:
+            logger.error(f"{inst} at section '{aSection}'")
+            raise configparser.ParsingError
+        return aTimeZone, aSession
+
+    def _getNumberOfWorkers(self, aSection : str, anOption : str) -> int:
+        """check config file for a number of workers, default = 1"""
+        theValue = self._config.getOptionalValue(aSection,anOption,"1")
+        if not theValue.isdigit() or int(theValue) < 1:
+            logger.error(f"option '{anOption}' at section '{aSection}' has to be a number > 0, not '{theValue}'")
+            raise configparser.ParsingError
+        return int(theValue)
+
+    def _getSeconds(self, aSection : str, anOption : str, aDefault : str) -> float:
+        """check config file for a number of seconds > 0"""
+        theValue = self._config.getOptionalValue(aSection,anOption,aDefault)
+        try:
+            theSeconds = float(theValue)
+        except ValueError:
+            theSeconds = 0.0
+        if theSeconds <= 0:
+            logger.error(f"option '{anOption}' at section '{aSection}' has to be a number of seconds > 0, not '{theValue}'")
+            raise configparser.ParsingError
+        return theSeconds
+
+    def _profileStage(self, aName : str):
+        """context manager profiling a stage with --profile, does nothing otherwise"""
+        if self.Profiler is None:
+            return contextlib.nullcontext()
+        return self.Profiler.profileStage(aName)
+
     def updateSymbolsList(self) -> bool:
         """call Quant Data Manager to export list of symbols to csv-file"""
+        with self.Metrics.measureStage("updateSymbolsList") as theStage, self._profileStage("updateSymbolsList"):
+            theStage.isOk = self._updateSymbolsList(theStage)
+        return theStage.isOk
+
+    def _updateSymbolsList(self, aStage : runMetrics.stageMetrics) -> bool:
         # get temporary file name
         theTempfileName = dataConverter.getTempFileName()
 
@@ -123,11 +538,36 @@ class callQuantDataManager:
             return False
 
         # converting the CSV-File into pandas compatible format            
+        theSize = os.stat(theTempfileName).st_size if os.path.isfile(theTempfileName) else 0
         isOk = dataConverter.convertSymbolList(theTempfileName,self.SymbolListFileName)
+        if isOk:
+            aStage.add(rows=len(dataConverter.getSymbolsList(self.SymbolListFileName)),
+                       bytesIn=theSize,
+                       bytesOut=os.stat(self.SymbolListFileName).st_size)
+        if isOk and 'sqlite' in self.ConverterOutputs:
+            isOk = self._writeSymbolsToDatabase()
+        return isOk
+
+    def _writeSymbolsToDatabase(self) -> bool:
+        """save the symbol list into the SQLite database of the converted quotes"""
+        try:
+            sqliteStore.writeSymbols(os.path.join(self.DataDirectory, sqliteStore.theDatabaseFileName),
+                                     dataConverter.getSymbolsDetails(self.SymbolListFileName))
+            isOk = True
+        except Exception as inst:
+            logger.error(type(inst))     # the exception instance
+            logger.error(inst.args)      # arguments stored in .args
+            logger.error(inst)           # __str__ allows args to be printed directly
+            isOk = False
         return isOk
 
     def updateQuotes(self) -> bool:
         """call Quant Data Manager to update all quotes"""
+        with self.Metrics.measureStage("updateQuotes") as theStage, self._profileStage("updateQuotes"):
+            theStage.isOk = self._updateQuotes()
+        return theStage.isOk
+
+    def _updateQuotes(self) -> bool:
         # calling QuantDataManager via .bat file
         theBatchFile = self._getBatFileName("updatequotes")
 
@@ -138,52 +578,402 @@ class callQuantDataManager:
         isOk = self.BatchRun(theCommandList)
         return isOk
 
-    def exportQuotes(self,aTimeframe='M1') -> bool:
-        """call Quant Data Manager to export all quotes to csv-files"""
-        # calling QuantDataManager via .bat file
-        theBatchFile = self._getBatFileName("exportquotes")        
+    def exportQuotes(self,aTimeframe='M1',isForced=False,isResumed=False) -> bool:
+        """call Quant Data Manager to export all quotes to csv-files,
+           exports and conversions overlap, see section 'parallel' in config file,
+           symbols with unchanged date range are skipped, unless isForced,
+           isResumed = continue an interrupted run, symbols converted by it are skipped,
+           failed symbols are retried at the end of the run, see section 'retry' in config file
+        """
+        with self.Metrics.measureStage("exportQuotes") as theStage, self._profileStage("exportQuotes"):
+            theStage.isOk = self._exportQuotes(aTimeframe, isForced, isResumed, theStage)
+        return theStage.isOk
+
+    def canResume(self, aTimeframe : str = 'M1') -> bool:
+        """check if the run journal holds an interrupted run of aTimeframe"""
+        return runJournal.runJournal(self.JournalFileName).isInterrupted(aTimeframe)
+
+    def _exportQuotes(self, aTimeframe : str, isForced : bool, isResumed : bool,
+                      aStage : runMetrics.stageMetrics) -> bool:
+        # calling QuantDataManager via .bat file or directly
+        theBatchFile = self._getBatFileName("exportquotes") if self.ExportBackend == 'script' else None
+
+        # get list of symbols with their date range
+        theSymbolDetails = dataConverter.getSymbolsDetails(self.SymbolListFileName)
+        theSymbols = list(theSymbolDetails)
+        theState = exportState.exportState(self.StateFileName)
+
+        # the journal records the state of every symbol at once, the export state is saved at the end of the run
+        theJournal = runJournal.runJournal(self.JournalFileName)
+        theExportedSymbols = set()
+        if isResumed and theJournal.isInterrupted(aTimeframe):
+            theConvertedSymbols = [aSymbol for aSymbol in theSymbols
+                                   if self._isConvertedByJournal(theJournal, aSymbol, aTimeframe, theSymbolDetails)]
+            for aSymbol in theConvertedSymbols:
+                self._updateState(theState, aSymbol, aTimeframe, theSymbolDetails)
+            theConvertedSymbols = set(theConvertedSymbols)
+            theSymbols = [aSymbol for aSymbol in theSymbols if aSymbol not in theConvertedSymbols]
+            # exports of the interrupted run are converted without exporting them again
+            theExportedSymbols = {aSymbol for aSymbol in theJournal.getSymbols('exported')
+                                  if aSymbol in theSymbolDetails and aSymbol not in theConvertedSymbols
+                                  and os.path.isfile(self._getQuotesFileNames(aSymbol, aTimeframe)[0])}
+            logger.info(f"resuming interrupted run, {len(theConvertedSymbols)} symbols converted, "
+                        f"{len(theExportedSymbols)} symbols exported already")
+            aStage.add(resumedSymbols=len(theConvertedSymbols))
+            theJournal.resume()
+        else:
+            if isResumed:
+                logger.info(f"no interrupted run in '{self.JournalFileName}', starting a new run")
+            theJournal.start(aTimeframe)
+
+        # skip symbols, whose date range did not change since the last export
+        if not isForced:
+            theChangedSymbols = [aSymbol for aSymbol in theSymbols 
+                                 if aSymbol in theExportedSymbols or
+                                    not theState.isUnchanged(aTimeframe, aSymbol,
+                                                             theSymbolDetails[aSymbol]['Date from'],
+                                                             theSymbolDetails[aSymbol]['Date to'],
+                                                             self._getQuotesFileNames(aSymbol, aTimeframe)[1],
+                                                             self.ConverterOutputs,
+                                                             self._getTimeZoneState(aSymbol))]
+            logger.info(f"{len(theSymbols) - len(theChangedSymbols)} of {len(theSymbols)} symbols unchanged, not exported")
+            aStage.add(skippedSymbols=len(theSymbols) - len(theChangedSymbols))
+            theSymbols = theChangedSymbols
 
-        # get list of symbols
-        theSymbols = dataConverter.getSymbolsList(self.SymbolListFileName)
+        # exports wait for Quant Data Manager -> threads, conversions need CPU -> processes
+        # source: https://docs.python.org/3/library/concurrent.futures.html
+        # processes are started while exports are running, forking a process with running threads
+        # may copy locks held by these threads, new processes are spawned like on Windows,
+        # with queued logging the conversions forward their records to this process
+        theContext = multiprocessing.get_context('spawn')
+        theQualityReports = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.ExportWorkers) as theExporters, \
+             concurrent.futures.ProcessPoolExecutor(max_workers=self.ConvertWorkers, mp_context=theContext,
+                                                    initializer=minilog.initiateWorker,
+                                                    initargs=(minilog.getQueue(), logging.getLogger().getEffectiveLevel())) as theConverters:
+            theResults = self._exportAndConvert(theExporters, theConverters, theBatchFile, theSymbols, theExportedSymbols,
+                                                aTimeframe, aStage, theState, theSymbolDetails, theQualityReports,
+                                                theJournal)
 
+            # e.g. a crash of Quant Data Manager or a locked file, retried after a growing pause
+            for anAttempt in range(1, self.RetryAttempts + 1):
+                theFailedSymbols = [aSymbol for aSymbol in theSymbols if not theResults[aSymbol]]
+                if not theFailedSymbols:
+                    break
+                theDelay = self.RetryBackoff * 2 ** (anAttempt - 1)
+                logger.warning(f"retrying {len(theFailedSymbols)} failed symbols in {theDelay:g} seconds "
+                               f"(attempt {anAttempt} of {self.RetryAttempts})")
+                time.sleep(theDelay)
+                for aSymbol in theFailedSymbols:
+                    aStage.addSymbol(aSymbol, retries=1)
+                theResults.update(self._exportAndConvert(theExporters, theConverters, theBatchFile, theFailedSymbols, set(),
+                                                         aTimeframe, aStage, theState, theSymbolDetails,
+                                                         theQualityReports, theJournal))
+
+        # failed symbols are exported again next time
+        for aSymbol in theSymbols:
+            if not theResults[aSymbol]:
+                theState.remove(aTimeframe, aSymbol)
+        theState.save()
+        theJournal.finish()
+        if theQualityReports and self.QualityReportFileName:
+            qualityValidator.writeQualityReport(self.QualityReportFileName, theQualityReports)
+
+        theFailedSymbols = [aSymbol for aSymbol in theSymbols if not theResults[aSymbol]]
+        aStage.add(symbols=len(theSymbols), failedSymbols=len(theFailedSymbols))
+        logger.info(f"{len(theSymbols) - len(theFailedSymbols)} of {len(theSymbols)} symbols exported")
+        if theFailedSymbols:
+            logger.warning(f"failed symbols: {', '.join(theFailedSymbols)}")
+        return not theFailedSymbols
+
+    def _exportAndConvert(self, theExporters : concurrent.futures.Executor, theConverters : concurrent.futures.Executor,
+                          aBatchFile : str, theSymbols : list, theExportedSymbols : set, aTimeframe : str,
+                          aStage : runMetrics.stageMetrics, theState : exportState.exportState,
+                          theSymbolDetails : dict, theQualityReports : dict, theJournal : runJournal.runJournal) -> dict:
+        """export theSymbols and convert every symbol as soon as its export is finished,
+           theExportedSymbols = symbols of theSymbols, whose exports are converted without exporting them again,
+           returns the success of every symbol of theSymbols
+        """
+        theResults = {}
+        theConversions = {}
         for aSymbol in theSymbols:
-            logger.info(f"exporting '{aSymbol}' to CSV")
-            theResult = True
-
-            # build the batch command with command line arguments
-            theCommandList = [theBatchFile, 
-                              self.QuantDataManagerFileName,
-                              aSymbol,
-                              aTimeframe.upper(),
-                              self.DataDirectory]
-            isOk = self.BatchRun(theCommandList)
-            theResult = theResult and isOk
-            if isOk:
-                theSourceFileName = f"{aSymbol}-{aTimeframe.upper()}-No Session.csv"
-                theSourceFileName = os.path.join(self.DataDirectory,theSourceFileName)
-                theTargetFileName = f"{aSymbol}-{aTimeframe.upper()}.csv"
-                theTargetFileName = os.path.join(self.DataDirectory,theTargetFileName)
-                # convert the quotes into pandas compatible format     
-                isOk = dataConverter.convertQuotes(theSourceFileName,theTargetFileName)               
-                theResult = theResult and isOk
-        return theResult
-
-    def BatchRun(self,aCommandList : list) -> bool:
-        """call Quant Data Manager with a list of commands"""
+            if aSymbol in theExportedSymbols:
+                self._submitConversion(theConverters, theConversions, aSymbol, aTimeframe)
+        theSymbols = [aSymbol for aSymbol in theSymbols if aSymbol not in theExportedSymbols]
+        if aBatchFile is not None:
+            theExports = {theExporters.submit(self._exportSymbol, aBatchFile, aSymbol, aTimeframe) : [aSymbol]
+                          for aSymbol in theSymbols}
+        else:
+            theBatches = [theSymbols[aStart:aStart + self.ExportBatchSize]
+                          for aStart in range(0, len(theSymbols), self.ExportBatchSize)]
+            theExports = {theExporters.submit(self._exportSymbols, aBatch, aTimeframe) : aBatch
+                          for aBatch in theBatches}
+
+        for anExport in concurrent.futures.as_completed(theExports):
+            theBatch = theExports[anExport]
+            theExported = self._getFutureResult(anExport, ', '.join(theBatch))
+            if aBatchFile is not None:
+                theExported = theBatch if theExported else []
+            for aSymbol in theBatch:
+                if aSymbol in (theExported or []):
+                    theJournal.record(aSymbol, 'exported')
+                    self._submitConversion(theConverters, theConversions, aSymbol, aTimeframe)
+                    continue
+                logger.error(f"export of '{aSymbol}' failed")
+                theJournal.record(aSymbol, 'failed', {'reason': "export failed"})
+                aStage.addSymbol(aSymbol, ok=False)
+                theResults[aSymbol] = False
+
+        for aConversion in concurrent.futures.as_completed(theConversions):
+            aSymbol = theConversions[aConversion]
+            theResults[aSymbol] = self._finishConversion(aConversion, aSymbol, aTimeframe, aStage, theState,
+                                                         theSymbolDetails, theQualityReports, theJournal)
+        return theResults
+
+    def _isConvertedByJournal(self, theJournal : runJournal.runJournal, aSymbol : str, aTimeframe : str,
+                              theSymbolDetails : dict) -> bool:
+        """check if the interrupted run converted the current date range of a symbol, and the file is still there"""
+        theSymbolState = theJournal.getSymbolState(aSymbol)
+        return theSymbolState.get('state') == 'converted' and \
+               theSymbolState.get('Date from') == theSymbolDetails[aSymbol]['Date from'] and \
+               theSymbolState.get('Date to') == theSymbolDetails[aSymbol]['Date to'] and \
+               os.path.isfile(self._getQuotesFileNames(aSymbol, aTimeframe)[1])
+
+    def _updateState(self, theState : exportState.exportState, aSymbol : str, aTimeframe : str,
+                     theSymbolDetails : dict) -> None:
+        """remember date range, converted file, outputs and time zone of a converted symbol in the export state"""
+        theState.update(aTimeframe, aSymbol,
+                        theSymbolDetails[aSymbol]['Date from'],
+                        theSymbolDetails[aSymbol]['Date to'],
+                        self._getQuotesFileNames(aSymbol, aTimeframe)[1],
+                        self.ConverterOutputs,
+                        self._getTimeZoneState(aSymbol))
+
+    def _finishConversion(self, aConversion : concurrent.futures.Future, aSymbol : str, aTimeframe : str,
+                          aStage : runMetrics.stageMetrics, theState : exportState.exportState,
+                          theSymbolDetails : dict, theQualityReports : dict,
+                          theJournal : runJournal.runJournal = None) -> bool:
+        """record metrics, quality, export state and journal of a finished conversion, returns its success,
+           the export state is updated only for symbols in theSymbolDetails, theJournal None = no journal
+        """
+        theMetrics = self._getFutureResult(aConversion, aSymbol) or {'ok': False}
+        isOk = theMetrics['ok']
+        aStage.addSymbol(aSymbol, ok=isOk,
+                         convertSeconds=theMetrics.get('seconds', 0.0),
+                         convertCPUSeconds=theMetrics.get('cpuSeconds', 0.0),
+                         rows=theMetrics.get('rows', 0),
+                         bytesIn=theMetrics.get('bytesIn', 0),
+                         bytesOut=theMetrics.get('bytesOut', 0))
+        if isOk and 'quality' in theMetrics:
+            aStage.addSymbol(aSymbol, **theMetrics['quality'])
+            theQualityReports[aSymbol] = dict(theMetrics['quality'], timeframe=aTimeframe.upper(),
+                                              mode=self.ValidationMode)
+        if isOk:
+            logger.info(f"'{aSymbol}' exported and converted")
+            if aSymbol in theSymbolDetails:
+                self._updateState(theState, aSymbol, aTimeframe, theSymbolDetails)
+            if theJournal is not None:
+                theJournal.record(aSymbol, 'converted',
+                                  {aName : theSymbolDetails[aSymbol][aName] for aName in ('Date from', 'Date to')}
+                                  if aSymbol in theSymbolDetails else None)
+        else:
+            logger.error(f"conversion of '{aSymbol}' failed")
+            if theJournal is not None:
+                theJournal.record(aSymbol, 'failed', {'reason': theMetrics.get('error', "conversion failed")})
+        return isOk
+
+    def _submitConversion(self, theConverters : concurrent.futures.Executor, theConversions : dict,
+                          aSymbol : str, aTimeframe : str) -> None:
+        """start the conversion of an exported symbol, theConversions = conversions started so far"""
+        theSourceFileName, theTargetFileName = self._getQuotesFileNames(aSymbol, aTimeframe)
+        if self.ConverterSource == 'ticks':
+            theConversion = (dataConverter.convertTicksWithMetrics,
+                             theSourceFileName, theTargetFileName,
+                             aTimeframe, self.ConverterPrice,
+                             self.ConverterOutputs, self.ConverterProgress,
+                             self.CompressionLevel, self.CompressionThreads,
+                             self.ValidationMode, *self.getTimeZone(aSymbol),
+                             self.IndexTimeframe)
+        else:
+            theConversion = (dataConverter.convertQuotesWithMetrics,
+                             theSourceFileName, theTargetFileName,
+                             self.ConverterEngine, self.IncrementalConversion,
+                             self.ConverterOutputs, self.ConverterProgress,
+                             self.CompressionLevel, self.CompressionThreads,
+                             self.ValidationMode, *self.getTimeZone(aSymbol),
+                             self.IndexTimeframe,
+                             None if self.ConverterCalendar is None else self.ConverterCalendar + (aTimeframe,))
+        if self.Profiler is not None and self.Profiler.isSampled():
+            # the worker profiles the conversion and writes the profile itself
+            theConversion = (runProfiler.profileCall, self.Profiler.directory, f"convert-{aSymbol}") + theConversion
+        aConversion = theConverters.submit(*theConversion)
+        theConversions[aConversion] = aSymbol
+
+    def watchExports(self, aTimeframe : str = 'M1', aStopEvent : threading.Event = None) -> bool:
+        """convert every export of Quant Data Manager in the data directory as soon as it is complete,
+           until aStopEvent is set, the running conversions are finished before returning,
+           see section 'watch' in config file
+        """
+        with self.Metrics.measureStage("watchExports") as theStage, self._profileStage("watchExports"):
+            theStage.isOk = self._watchExports(aTimeframe, aStopEvent or threading.Event(), theStage)
+        return theStage.isOk
+
+    def _watchExports(self, aTimeframe : str, aStopEvent : threading.Event, aStage : runMetrics.stageMetrics) -> bool:
+        theWatcher = exportWatcher.exportWatcher(self.DataDirectory, self._getExportTimeframe(aTimeframe),
+                                                 self.WatchSettleTime)
+        theState = exportState.exportState(self.StateFileName)
+        theSymbolDetails = {}
+        theSymbolListTime = None
+        theQualityReports = {}
+        theNumberOfSymbols = 0
+        theFailedSymbols = set()
+        logger.info(f"watching '{self.DataDirectory}' for exports, stop with Ctrl+C")
+
+        # the conversions ignore Ctrl+C, they are finished before the watch stops
+        theContext = multiprocessing.get_context('spawn')
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.ConvertWorkers, mp_context=theContext,
+                                                    initializer=_initiateWatchWorker,
+                                                    initargs=(minilog.getQueue(), logging.getLogger().getEffectiveLevel())) as theConverters:
+            theConversions = {}
+            while theConversions or not aStopEvent.is_set():
+                if not aStopEvent.is_set():
+                    # the dates of the symbols are taken from the symbol list, when it changes
+                    theModificationTime = _getModificationTime(self.SymbolListFileName)
+                    if theModificationTime != theSymbolListTime:
+                        theSymbolListTime = theModificationTime
+                        theSymbolDetails = dataConverter.getSymbolsDetails(self.SymbolListFileName) \
+                                           if theModificationTime is not None else {}
+
+                    # the queue is bounded, further exports stay in the data directory until there is room
+                    for aSymbol, _ in theWatcher.poll(set(theConversions.values()),
+                                                      self.WatchQueueSize - len(theConversions)):
+                        logger.info(f"export of '{aSymbol}' complete, converting")
+                        self._submitConversion(theConverters, theConversions, aSymbol, aTimeframe)
+
+                if not theConversions:
+                    aStopEvent.wait(self.WatchInterval)
+                    continue
+                theFinished, _ = concurrent.futures.wait(theConversions, timeout=self.WatchInterval,
+                                                         return_when=concurrent.futures.FIRST_COMPLETED)
+                for aConversion in theFinished:
+                    aSymbol = theConversions.pop(aConversion)
+                    theNumberOfSymbols += 1
+                    if self._finishConversion(aConversion, aSymbol, aTimeframe, aStage, theState,
+                                              theSymbolDetails, theQualityReports):
+                        theFailedSymbols.discard(aSymbol)
+                    else:
+                        theFailedSymbols.add(aSymbol)
+                        theState.remove(aTimeframe, aSymbol)
+                if theFinished:
+                    theState.save()
+                    if theQualityReports and self.QualityReportFileName:
+                        qualityValidator.writeQualityReport(self.QualityReportFileName, theQualityReports)
+                        theQualityReports = {}
+
+        aStage.add(symbols=theNumberOfSymbols, failedSymbols=len(theFailedSymbols))
+        logger.info(f"watch stopped, {theNumberOfSymbols} exports converted")
+        if theFailedSymbols:
+            logger.warning(f"failed symbols: {', '.join(sorted(theFailedSymbols))}")
+        return not theFailedSymbols
+
+    def _getExportTimeframe(self, aTimeframe : str) -> str:
+        """returns timeframe exported by Quant Data Manager for the converted timeframe, 'TICK' for ticks"""
+        return 'TICK' if self.ConverterSource == 'ticks' else aTimeframe.upper()
+
+    def _getQuotesFileNames(self, aSymbol : str, aTimeframe : str) -> tuple:
+        """returns full path and name of the exported and the converted quotes file,
+           ticks are exported to '<symbol>-TICK-No Session.csv' and converted to '<symbol>-<timeframe>.csv',
+           the name of the converted file ends with the suffix of its compression, e.g. '.csv.gz'
+        """
+        theSourceFileName = f"{aSymbol}-{self._getExportTimeframe(aTimeframe)}-No Session.csv"
+        theSourceFileName = os.path.join(self.DataDirectory,theSourceFileName)
+        theTargetFileName = f"{aSymbol}-{aTimeframe.upper()}.csv"
+        theTargetFileName = compressedFiles.getCompressedFileName(theTargetFileName, self.ConverterCompression)
+        theTargetFileName = os.path.join(self.DataDirectory,theTargetFileName)
+        return theSourceFileName, theTargetFileName
+
+    def _exportSymbol(self, aBatchFile : str, aSymbol : str, aTimeframe : str) -> bool:
+        """call Quant Data Manager to export the quotes of one symbol"""
+        logger.info(f"exporting '{aSymbol}' to CSV")
+
+        # build the batch command with command line arguments
+        theCommandList = [aBatchFile, 
+                          self.QuantDataManagerFileName,
+                          aSymbol,
+                          self._getExportTimeframe(aTimeframe),
+                          self.DataDirectory]
+        theStartTime = time.perf_counter()
+        isOk = self.BatchRun(theCommandList)
+        self.Metrics.activeStage.addSymbol(aSymbol, exportSeconds=time.perf_counter() - theStartTime)
+        return isOk
+
+    def _exportSymbols(self, theSymbols : list, aTimeframe : str) -> list:
+        """call Quant Data Manager directly to export the quotes of a group of symbols in one call,
+           returns the exported symbols, found by their export files,
+           if the call fails, the symbols are exported one per call, so that one bad symbol
+           does not fail the others
+        """
+        logger.info(f"exporting {len(theSymbols)} symbols to CSV: {', '.join(theSymbols)}")
+        theSourceFileNames = {aSymbol : self._getQuotesFileNames(aSymbol, aTimeframe)[0] for aSymbol in theSymbols}
+        # exports left by a failed run would pass for new exports
+        for aSourceFileName in theSourceFileNames.values():
+            dataConverter.removeFile(aSourceFileName)
+
+        theCommandList = [self.QuantDataManagerFileName,
+                          '-de',
+                          f"symbols={','.join(theSymbols)}",
+                          f"timeframe={self._getExportTimeframe(aTimeframe)}",
+                          f"outputdir={self.DataDirectory}"]
+        theStartTime = time.perf_counter()
+        isOk = self.BatchRun(theCommandList, isDirect=True)
+        theSeconds = time.perf_counter() - theStartTime
+        if not isOk and len(theSymbols) > 1:
+            logger.warning(f"export of {len(theSymbols)} symbols failed, exporting them one by one")
+            return [aSymbol for aSymbol in theSymbols if self._exportSymbols([aSymbol], aTimeframe)]
+
+        for aSymbol in theSymbols:
+            # the call is shared by all symbols of the group
+            self.Metrics.activeStage.addSymbol(aSymbol, exportSeconds=theSeconds / len(theSymbols))
+        if not isOk:
+            return []
+        return [aSymbol for aSymbol in theSymbols if os.path.isfile(theSourceFileNames[aSymbol])]
+
+    def _getFutureResult(self, aFuture : concurrent.futures.Future, aSymbol : str) -> bool:
+        """returns result of an export or a conversion, False if it raised an exception"""
+        try:
+            return aFuture.result()
+        except Exception as inst:
+            logger.error(f"'{aSymbol}': {type(inst)}")
+            logger.error(inst)
+            return False
+
+    def BatchRun(self,aCommandList : list, isDirect : bool = False) -> bool:
+        """call Quant Data Manager with a list of commands,
+           isDirect = the first command is Quant Data Manager itself, called without script and shell
+                      in its own directory
+        """
         try:
             logger.info("calling Quant Data Manager:")
             theCommands = ' '.join(map(str, aCommandList)) # source=https://www.decalage.info/en/python/print_list
-            logger.debug(f">Commands ='{theCommands}'")
+            logger.debug(">Commands ='%s'", theCommands)
             # source=https://stackoverflow.com/questions/41171791/how-to-suppress-or-capture-the-output-of-subprocess-run
-            theResult = subprocess.run(
-                            aCommandList, 
-                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                            shell=True, check=True,text=True)
+            # .bat files need the shell, a POSIX shell would drop the arguments of a command list
+            theStartTime = time.perf_counter()
+            try:
+                theResult = subprocess.run(
+                                aCommandList, 
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                shell=(os.name == 'nt' and not isDirect), check=True,text=True,
+                                cwd=os.path.dirname(self.QuantDataManagerFileName) if isDirect else None)
+            finally:
+                self.Metrics.activeStage.addSubprocessTime(time.perf_counter() - theStartTime)
             # source= https://www.python-forum.de/viewtopic.php?t=39382
-            for line in theResult.stdout.splitlines():
-                logger.info(f"> {line}")
+            # lines are formatted only, if they are logged
+            if logger.isEnabledFor(logging.INFO):
+                for line in theResult.stdout.splitlines():
+                    logger.info("> %s", line)
             for line in theResult.stderr.splitlines():
-                logger.warning(f"> {line}")  
+                logger.warning("> %s", line)  
             if theResult.returncode != 0:
                 logger.warning(f"Returncode = {theResult.returncode}")
                 batchRunSuccess = False
@@ -196,6 +986,56 @@ class callQuantDataManager:
             batchRunSuccess = False
         return batchRunSuccess
 
+    def buildPanel(self, aTimeframe : str = 'M1') -> bool:
+        """write the memory-mapped panel of all converted symbols of the symbol list on a common time grid,
+           see section 'panel' in config file
+        """
+        with self.Metrics.measureStage("buildPanel") as theStage, self._profileStage("buildPanel"):
+            theStage.isOk = self._buildPanel(aTimeframe, theStage)
+        return theStage.isOk
+
+    def _buildPanel(self, aTimeframe : str, aStage : runMetrics.stageMetrics) -> bool:
+        isOk = True
+        try:
+            theSymbols = dataConverter.getSymbolsList(self.SymbolListFileName)
+            nameOfPanel = panelBuilder.buildPanel(self.DataDirectory, theSymbols, aTimeframe, *self.PanelCalendar)
+            theHeader = panelBuilder.readHeader(nameOfPanel)
+            aStage.add(symbols=len(theHeader['symbols']), rows=theHeader['bars'])
+            logger.info(f"panel of {len(theHeader['symbols'])} of {len(theSymbols)} symbols saved to '{nameOfPanel}'")
+        except Exception as inst:
+            logger.error(type(inst))     # the exception instance
+            logger.error(inst.args)      # arguments stored in .args
+            logger.error(inst)           # __str__ allows args to be printed directly
+            isOk = False
+        return isOk
+
+    def writeRunReport(self) -> bool:
+        """write the runtime metrics as JSON run report and Prometheus textfile, see section 'metrics' in config file"""
+        try:
+            if self.ReportFileName:
+                self.Metrics.writeReport(self.ReportFileName)
+            if self.PrometheusFileName:
+                self.Metrics.writePrometheus(self.PrometheusFileName)
+            isOk = True
+        except Exception as inst:
+            logger.error(type(inst))     # the exception instance
+            logger.error(inst.args)      # arguments stored in .args
+            logger.error(inst)           # __str__ allows args to be printed directly
+            isOk = False
+        return isOk
+
+def _getModificationTime(nameOfFile : str):
+    """returns modification time of a file in nanoseconds, None if it does not exist"""
+    try:
+        return os.stat(nameOfFile).st_mtime_ns
+    except OSError:
+        return None
+
+def _initiateWatchWorker(aLogQueue, theLogLevel=logging.INFO) -> None:
+    """initializer of a conversion process of the watch mode, Ctrl+C stops the watch and not the conversion"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    minilog.initiateWorker(aLogQueue, theLogLevel)
+
 def main():
     logger.info("--- Class for calling the QuantDataManger on windows ---")
 
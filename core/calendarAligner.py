@@ -0,0 +1,191 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+alignment of converted bars to a trading calendar, e.g. for the minute bars of Zipline (requires numpy)
+
+calendar = every bar of a timeframe within a session 'HH:MM-HH:MM' in a time zone
+           from Monday to Friday, without holidays 'YYYY-MM-DD' (the local day the session ends)
+exports contain only bars with trades, the bars of the calendar without trade are added:
+    ffill = open, high, low and close are the close of the previous bar, volume 0
+    nan   = prices are NaN, written as empty fields, volume 0
+bars outside of the calendar are removed
+
+the bars are aligned block by block in the conversion pass, from the first bar of the export
+to the end of the session of the last bar, the calendar of a block is built with array operations
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, re, datetime
+try:
+    import numpy as np
+except ImportError: # numpy is optional, the csv engine works without it
+    np = None
+import core.vectorizedConverter as vectorizedConverter
+import core.resampler as resampler
+import core.timeZoneConverter as timeZoneConverter
+# ----------------------------------------------------------------------------
+
+theFills = ('ffill', 'nan')
+theSecondsPerDay = timeZoneConverter.theSecondsPerDay
+theEpoch = datetime.date(1970, 1, 1)
+
+def parseHolidays(aText : str) -> tuple:
+    """returns the days since epoch of holidays 'YYYY-MM-DD' separated by commas, blanks or lines
+
+       raises ValueError, if a holiday is not in format 'YYYY-MM-DD'
+    """
+    theHolidays = []
+    for aHoliday in re.split(r'[,\s]+', aText.strip()):
+        if not aHoliday:
+            continue
+        if not re.fullmatch(r'\d{4}-\d\d-\d\d', aHoliday):
+            raise ValueError(f"holiday '{aHoliday}' is not in format 'YYYY-MM-DD'")
+        theHolidays.append((datetime.date.fromisoformat(aHoliday) - theEpoch).days)
+    return tuple(sorted(theHolidays))
+
+def checkCalendar(aFill : str, aTimeZone : str, aSession : str, aTimeframe : str = 'M1') -> None:
+    """raises ValueError, if the fill is unknown or the calendar is invalid"""
+    if aFill not in theFills:
+        raise ValueError(f"unknown fill '{aFill}', use one of {', '.join(theFills)}")
+    if not aSession:
+        raise ValueError("calendar requires a session")
+    timeZoneConverter.checkTimeZone(aTimeZone, aSession)
+    resampler.getTimeframeSeconds(aTimeframe)
+
+class calendarAligner:
+    """align quoteBlocks with ascending UTC timestamps to the calendar of aSession in aTimeZone,
+       theHolidays = days since epoch without session, see parseHolidays(),
+       aFill = 'ffill' or 'nan' for bars of the calendar without trade
+    """
+    def __init__(self,
+        aFill : str = 'ffill',
+        aTimeZone : str = 'UTC',
+        aSession : str = None,
+        theHolidays : tuple = (),
+        aTimeframe : str = 'M1'
+        ):
+        checkCalendar(aFill, aTimeZone, aSession, aTimeframe)
+        self._fill = aFill
+        self._timeZone = timeZoneConverter.timeZoneConverter(aTimeZone, aSession)
+        self._holidays = np.array(sorted(theHolidays), dtype=np.int64)
+        self._seconds, _ = resampler.getTimeframeSeconds(aTimeframe)
+        self._lastBar = None
+        self._numberOfFilledBars = 0
+        self._numberOfRemovedBars = 0
+
+    @property
+    def filledBars(self) -> int:
+        """Get number of bars added to the calendar"""
+        return self._numberOfFilledBars
+
+    @property
+    def removedBars(self) -> int:
+        """Get number of bars outside of the calendar"""
+        return self._numberOfRemovedBars
+
+    def getGrid(self, aFirstTimestamp : int, aLastTimestamp : int):
+        """returns the UTC timestamps of the calendar from aFirstTimestamp to aLastTimestamp (UTC), both included"""
+        # every bar of the local days, one day more on both sides covers every UTC offset
+        theFirstDay = aFirstTimestamp // theSecondsPerDay - 1
+        theLastDay = aLastTimestamp // theSecondsPerDay + 1
+        theBarsOfDay = np.arange(0, theSecondsPerDay, self._seconds, dtype=np.int64)
+        theLocalGrid = (np.arange(theFirstDay, theLastDay + 1, dtype=np.int64)[:, None] * theSecondsPerDay
+                        + theBarsOfDay[None, :]).ravel()
+        theIsInSession = self._timeZone.getSessionMask(theLocalGrid)
+        if len(self._holidays):
+            # overnight sessions belong to the day they end
+            theStart, theEnd = self._timeZone.session
+            theTradingDays = theLocalGrid // theSecondsPerDay
+            if theStart > theEnd:
+                theTradingDays += (theLocalGrid - theTradingDays * theSecondsPerDay) >= theStart
+            theIsInSession &= ~np.isin(theTradingDays, self._holidays)
+        # local times, which exist twice at the end of daylight saving time, are one bar
+        theGrid = np.unique(self._timeZone.toUTC(theLocalGrid[theIsInSession]))
+        return theGrid[(theGrid >= aFirstTimestamp) & (theGrid <= aLastTimestamp)]
+
+    def _getBars(self, aBlock, theGrid):
+        """returns a quoteBlock with a bar at every timestamp of theGrid,
+           the bars of aBlock on the grid and filled bars in between
+        """
+        thePositions = np.searchsorted(theGrid, aBlock.timestamp)
+        theIsOnGrid = thePositions < len(theGrid)
+        theIsOnGrid[theIsOnGrid] = theGrid[thePositions[theIsOnGrid]] == aBlock.timestamp[theIsOnGrid]
+        self._numberOfRemovedBars += int(np.count_nonzero(~theIsOnGrid))
+        thePositions = thePositions[theIsOnGrid]
+
+        theHasBar = np.zeros(len(theGrid), dtype=bool)
+        theHasBar[thePositions] = True
+        self._numberOfFilledBars += int(np.count_nonzero(~theHasBar))
+        theColumns = {}
+        for aColumn in vectorizedConverter.theValueColumns:
+            theValues = getattr(aBlock, aColumn)
+            theColumns[aColumn] = np.zeros(len(theGrid), dtype=theValues.dtype)
+            theColumns[aColumn][thePositions] = theValues[theIsOnGrid]
+
+        theIsFilled = ~theHasBar
+        if np.any(theIsFilled):
+            if self._fill == 'ffill':
+                # index of the last bar with trades at or before every row, -1 = bar of the previous block
+                theSource = np.maximum.accumulate(np.where(theHasBar, np.arange(len(theGrid)), -1))
+                thePreviousClose = np.nan if self._lastBar is None else float(self._lastBar.close[-1])
+                theClose = np.where(theSource >= 0, theColumns['close'][np.maximum(theSource, 0)], thePreviousClose)
+                theFilledPrices = theClose[theIsFilled]
+            else:
+                theFilledPrices = np.nan
+            for aColumn in ('open', 'high', 'low', 'close'):
+                theColumns[aColumn][theIsFilled] = theFilledPrices
+        return vectorizedConverter.quoteBlock(theGrid, theColumns['open'], theColumns['high'], theColumns['low'],
+                                              theColumns['close'], theColumns['volume'],
+                                              aBlock.decimals, aBlock.timeWidth)
+
+    def alignBlock(self, aBlock):
+        """returns the bars of the calendar from the end of the previous block to the last bar of aBlock"""
+        if len(aBlock) == 0:
+            return aBlock
+        # the first bar of the export starts the calendar
+        theFirstTimestamp = int(aBlock.timestamp[0]) if self._lastBar is None \
+                            else int(self._lastBar.timestamp[-1]) + 1
+        theGrid = self.getGrid(theFirstTimestamp, int(aBlock.timestamp[-1]))
+        if self._lastBar is None:
+            # the calendar starts with the first bar on it
+            theIsOnGrid = np.isin(aBlock.timestamp, theGrid)
+            theGrid = theGrid[theGrid >= aBlock.timestamp[theIsOnGrid][0]] if np.any(theIsOnGrid) else theGrid[:0]
+        theBars = self._getBars(aBlock, theGrid)
+        if len(theBars):
+            self._lastBar = theBars.select(slice(-1, None))
+        return theBars
+
+    def finish(self):
+        """returns the bars of the calendar from the last bar to the end of its session, None without bars"""
+        if self._lastBar is None:
+            return None
+        theLastTimestamp = int(self._lastBar.timestamp[-1])
+        theGrid = self.getGrid(theLastTimestamp + 1, theLastTimestamp + theSecondsPerDay)
+        # the session ends at the first gap of the calendar
+        theGaps = np.flatnonzero(np.diff(np.r_[theLastTimestamp, theGrid]) != self._seconds)
+        theGrid = theGrid[:theGaps[0]] if len(theGaps) else theGrid
+        theBars = self._getBars(self._lastBar.select(slice(0, 0)), theGrid)
+        self._lastBar = None
+        return theBars
+
+def main():
+    logger.info("--- Alignment of converted bars to a trading calendar ---")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+streaming gzip, xz and bz2 files with the codecs of the standard library
+
+files are written compressed, if their name ends with '.gz', '.xz' or '.bz2',
+files are read decompressed, if they start with the magic bytes of a codec, whatever their name is,
+files written with replaceWhenComplete go to a temp file '~<name>', which is renamed only when it is complete
+
+with more than one thread, blocks of the output are compressed in parallel and written
+as consecutive gzip members or xz/bz2 streams, which every decompressor reads as one file
+source: https://www.rfc-editor.org/rfc/rfc1952 (2.2. File format)
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, io, gzip, lzma, bz2, collections, contextlib, concurrent.futures
+# ----------------------------------------------------------------------------
+
+# name of the codec -> suffix of the file name
+theCompressions = {'none': '', 'gzip': '.gz', 'xz': '.xz', 'bz2': '.bz2'}
+
+# first bytes of a compressed file -> name of the codec
+theMagicBytes = {b'\x1f\x8b': 'gzip', b'\xfd7zXZ\x00': 'xz', b'BZh': 'bz2'}
+
+# range and default of the compression level of every codec
+theCompressionLevels = {'gzip': (0, 9, 6), 'xz': (0, 9, 6), 'bz2': (1, 9, 9)}
+
+# size of a block compressed by one thread, in bytes
+theBlockSize = 4 * 1024 * 1024
+
+def checkCompression(aCompression : str, aLevel : int = None, aNumberOfThreads : int = 1) -> None:
+    """raises ValueError, if codec, compression level or number of threads is invalid"""
+    if aCompression not in theCompressions:
+        raise ValueError(f"unknown compression '{aCompression}'")
+    if aLevel is not None and aCompression != 'none':
+        theMinimum, theMaximum, _ = theCompressionLevels[aCompression]
+        if not theMinimum <= aLevel <= theMaximum:
+            raise ValueError(f"compression level of {aCompression} has to be {theMinimum} ... {theMaximum}")
+    if aNumberOfThreads < 1:
+        raise ValueError("number of compression threads has to be at least 1")
+
+def getCompression(nameOfFile : str) -> str:
+    """returns the codec of a file by the suffix of its name, 'none' for plain files"""
+    for aCompression, aSuffix in theCompressions.items():
+        if aSuffix and nameOfFile.endswith(aSuffix):
+            return aCompression
+    return 'none'
+
+def getPlainFileName(nameOfFile : str) -> str:
+    """returns the name of a file without the suffix of its codec, 'AAPL-M1.csv.gz' -> 'AAPL-M1.csv'"""
+    theSuffix = theCompressions[getCompression(nameOfFile)]
+    return nameOfFile[:len(nameOfFile) - len(theSuffix)]
+
+def getCompressedFileName(nameOfFile : str, aCompression : str) -> str:
+    """returns the name of a file compressed with aCompression, 'AAPL-M1.csv' -> 'AAPL-M1.csv.gz'"""
+    return getPlainFileName(nameOfFile) + theCompressions[aCompression]
+
+def findFile(nameOfFile : str) -> str:
+    """returns the name of an existing file, which is nameOfFile or nameOfFile compressed by any codec,
+       nameOfFile, if none of them exists
+    """
+    for aSuffix in theCompressions.values():
+        if os.path.isfile(nameOfFile + aSuffix):
+            return nameOfFile + aSuffix
+    return nameOfFile
+
+def getTempFileName(nameOfFile : str) -> str:
+    """returns the name of the temp file next to a file, 'AAPL-M1.csv' -> '~AAPL-M1.csv'"""
+    return os.path.join(os.path.dirname(nameOfFile), f"~{os.path.basename(nameOfFile)}")
+
+def _getCompanionName(nameOfFile : str, aSuffix : str) -> str:
+    """returns the name of a file belonging to a file, like its index 'AAPL-M1.csv.gz' -> 'AAPL-M1.csv.idx'"""
+    return getPlainFileName(nameOfFile) + aSuffix
+
+def replaceFile(nameOfTempFile : str, nameOfFile : str, theCompanionSuffixes : tuple = ()) -> None:
+    """replace a file by a completely written temp file, the temp file is flushed to disk before,
+       a crash leaves either the old or the new file,
+       theCompanionSuffixes = suffixes of files belonging to the file, e.g. its index, replaced with it
+    """
+    with open(nameOfTempFile, mode='r+b') as tempfile:
+        os.fsync(tempfile.fileno())
+    for aSuffix in theCompanionSuffixes:
+        try:
+            os.remove(_getCompanionName(nameOfFile, aSuffix))
+        except FileNotFoundError:
+            pass
+    os.replace(nameOfTempFile, nameOfFile)
+    for aSuffix in theCompanionSuffixes:
+        if os.path.isfile(_getCompanionName(nameOfTempFile, aSuffix)):
+            # size and modification time stay valid after renaming the file
+            os.replace(_getCompanionName(nameOfTempFile, aSuffix), _getCompanionName(nameOfFile, aSuffix))
+
+def removeTempFile(nameOfTempFile : str, theCompanionSuffixes : tuple = ()) -> None:
+    """delete a temp file and the files belonging to it left by an incomplete write"""
+    theFileNames = [nameOfTempFile] + [_getCompanionName(nameOfTempFile, aSuffix) for aSuffix in theCompanionSuffixes]
+    for aFileName in theFileNames:
+        if os.path.isfile(aFileName):
+            os.remove(aFileName)
+
+@contextlib.contextmanager
+def replaceWhenComplete(nameOfFile : str, theCompanionSuffixes : tuple = ()):
+    """yields the name of a temp file, which replaces the file and the files belonging to it,
+       when the with-block completes, the temp file is deleted, if the with-block raises an exception
+    """
+    theTempFileName = getTempFileName(nameOfFile)
+    try:
+        yield theTempFileName
+        replaceFile(theTempFileName, nameOfFile, theCompanionSuffixes)
+    finally:
+        removeTempFile(theTempFileName, theCompanionSuffixes)
+
+def _getMagicCompression(aRawFile) -> str:
+    """returns the codec of an opened file by its first bytes, the position is not changed"""
+    theStart = aRawFile.peek(8)[:8]
+    for aMagic, aCompression in theMagicBytes.items():
+        if theStart.startswith(aMagic):
+            return aCompression
+    return 'none'
+
+@contextlib.contextmanager
+def openRead(nameOfFile : str):
+    """open a file for reading bytes, compressed files are decompressed,
+       yields the file and the underlying raw file, whose position is the number of bytes consumed
+    """
+    with open(nameOfFile, mode='rb') as rawfile:
+        theCompression = _getMagicCompression(rawfile)
+        if theCompression == 'gzip':
+            theFile = gzip.GzipFile(fileobj=rawfile, mode='rb')
+        elif theCompression == 'xz':
+            theFile = lzma.LZMAFile(rawfile, mode='rb')
+        elif theCompression == 'bz2':
+            theFile = bz2.BZ2File(rawfile, mode='rb')
+        else:
+            yield rawfile, rawfile
+            return
+        with theFile:
+            yield theFile, rawfile
+
+def isCompressed(aFile) -> bool:
+    """check if a file opened by openRead is decompressed"""
+    return isinstance(aFile, (gzip.GzipFile, lzma.LZMAFile, bz2.BZ2File))
+
+def readTail(aFile, aSize : int) -> tuple:
+    """returns position and bytes of the last aSize bytes of a file opened by openRead,
+       compressed files can not seek and are decompressed completely
+    """
+    if not isCompressed(aFile):
+        theFileSize = aFile.seek(0, os.SEEK_END)
+        theTailStart = max(theFileSize - aSize, 0)
+        aFile.seek(theTailStart)
+        return theTailStart, aFile.read()
+
+    thePosition = aFile.tell()
+    theTail = b''
+    while True:
+        theBuffer = aFile.read(theBlockSize)
+        if not theBuffer:
+            break
+        thePosition += len(theBuffer)
+        theTail = (theTail + theBuffer)[-aSize:]
+    return thePosition - len(theTail), theTail
+
+def _compressBlock(aCompression : str, aLevel : int, aBlock : bytes) -> bytes:
+    """compress a block into a complete gzip member or xz/bz2 stream,
+       the codecs release the GIL, blocks are compressed by threads in parallel
+    """
+    if aCompression == 'gzip':
+        return gzip.compress(aBlock, compresslevel=aLevel, mtime=0)
+    if aCompression == 'xz':
+        return lzma.compress(aBlock, preset=aLevel)
+    return bz2.compress(aBlock, compresslevel=aLevel)
+
+class parallelCompressedWriter(io.BufferedIOBase):
+    """write a compressed file, blocks of theBlockSize bytes are compressed by aNumberOfThreads threads,
+       at most two blocks per thread are held in memory
+    """
+    def __init__(self,
+        nameOfFile : str,
+        aCompression : str,
+        aLevel : int,
+        aNumberOfThreads : int,
+        isAppend : bool = False
+        ):
+        super().__init__()
+        self._compression = aCompression
+        self._level = aLevel
+        self._numberOfThreads = aNumberOfThreads
+        self._buffer = bytearray()
+        self._pendingBlocks = collections.deque()
+        self._file = open(nameOfFile, mode='ab' if isAppend else 'wb')
+        self._compressors = concurrent.futures.ThreadPoolExecutor(max_workers=aNumberOfThreads)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, aData) -> int:
+        self._buffer += aData
+        while len(self._buffer) >= theBlockSize:
+            self._submitBlock(bytes(self._buffer[:theBlockSize]))
+            del self._buffer[:theBlockSize]
+        return len(aData)
+
+    def _submitBlock(self, aBlock : bytes) -> None:
+        self._pendingBlocks.append(self._compressors.submit(_compressBlock, self._compression, self._level, aBlock))
+        # blocks are written in the order they were submitted
+        while len(self._pendingBlocks) > 2 * self._numberOfThreads:
+            self._file.write(self._pendingBlocks.popleft().result())
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._buffer:
+                self._submitBlock(bytes(self._buffer))
+                self._buffer = bytearray()
+            while self._pendingBlocks:
+                self._file.write(self._pendingBlocks.popleft().result())
+        finally:
+            self._compressors.shutdown()
+            self._file.close()
+            super().close()
+
+def openWrite(nameOfFile : str, aLevel : int = None, aNumberOfThreads : int = 1, isAppend : bool = False):
+    """open a file for writing bytes, compressed by the codec of the suffix of its name,
+       aLevel = compression level, None = default of the codec,
+       aNumberOfThreads = threads compressing blocks in parallel, 1 = streaming with the codec of the standard library,
+       isAppend = a compressed file is continued with new gzip members or xz/bz2 streams,
+                  written block-wise, so that appending nothing does not change the file
+    """
+    theCompression = getCompression(nameOfFile)
+    checkCompression(theCompression, aLevel, aNumberOfThreads)
+    theMode = 'ab' if isAppend else 'wb'
+    if theCompression == 'none':
+        return open(nameOfFile, mode=theMode)
+    if aLevel is None:
+        aLevel = theCompressionLevels[theCompression][2]
+    if aNumberOfThreads > 1 or isAppend:
+        return parallelCompressedWriter(nameOfFile, theCompression, aLevel, aNumberOfThreads, isAppend)
+    if theCompression == 'gzip':
+        return gzip.GzipFile(nameOfFile, mode=theMode, compresslevel=aLevel, mtime=0)
+    if theCompression == 'xz':
+        return lzma.LZMAFile(nameOfFile, mode=theMode, preset=aLevel)
+    return bz2.BZ2File(nameOfFile, mode=theMode, compresslevel=aLevel)
+
+def main():
+    logger.info("--- Streaming compressed files ---")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+persisted state of exported symbols
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, json, pathlib
+from datetime import datetime
+# ----------------------------------------------------------------------------
+
+class exportState:
+    """date range and converted file of every exported symbol,
+       to skip symbols whose date range did not change since the last export
+    """
+    def __init__(self,
+        nameOfStateFile : str
+        ):
+        self._stateFileName = nameOfStateFile
+        self._state = {}
+
+        theFilePath = pathlib.Path(nameOfStateFile)
+        if theFilePath.is_file():
+            try:
+                with open(nameOfStateFile, mode='r', encoding='UTF8') as statefile:
+                    self._state = json.load(statefile)
+                logger.debug(f"export state loaded from '{nameOfStateFile}'")
+            except (OSError, ValueError) as inst:
+                # a broken state only costs a complete export
+                logger.warning(f"export state '{nameOfStateFile}' not readable, exporting all symbols ({inst})")
+                self._state = {}
+
+    @property
+    def stateFileName(self) -> str:
+        """Get full path and name of state file"""
+        return self._stateFileName
+
+    def getSymbolState(self, aTimeframe : str, aSymbol : str) -> dict:
+        """returns the state of an exported symbol, empty if never exported"""
+        return self._state.get(aTimeframe.upper(), {}).get(aSymbol, {})
+
+    def isUnchanged(self, aTimeframe : str, aSymbol : str, aDateFrom : str, aDateTo : str,
+                    nameOfConvertedFile : str, theOutputs : tuple = (), aTimeZone : str = 'UTC') -> bool:
+        """check if date range, converted file, additional outputs and time zone of a symbol
+           did not change since the last export
+        """
+        theSymbolState = self.getSymbolState(aTimeframe, aSymbol)
+        if not theSymbolState:
+            return False
+        if theSymbolState.get('Date from') != aDateFrom or theSymbolState.get('Date to') != aDateTo:
+            return False
+        if sorted(theSymbolState.get('outputs', [])) != sorted(theOutputs):
+            return False
+        if theSymbolState.get('timezone', 'UTC') != aTimeZone:
+            return False
+        # converted file deleted or changed by someone else
+        try:
+            theFileSize = os.stat(nameOfConvertedFile).st_size
+        except OSError:
+            return False
+        return theSymbolState.get('size') == theFileSize
+
+    def update(self, aTimeframe : str, aSymbol : str, aDateFrom : str, aDateTo : str,
+               nameOfConvertedFile : str, theOutputs : tuple = (), aTimeZone : str = 'UTC') -> None:
+        """remember date range, converted file, additional outputs and time zone of an exported symbol,
+           aTimeZone = time zone and session like 'America/New_York 09:30-16:00'
+        """
+        self._state.setdefault(aTimeframe.upper(), {})[aSymbol] = {
+            'Date from': aDateFrom,
+            'Date to'  : aDateTo,
+            'outputs'  : sorted(theOutputs),
+            'timezone' : aTimeZone,
+            'size'     : os.stat(nameOfConvertedFile).st_size,
+            'converted': datetime.now().isoformat(timespec='seconds')
+            }
+
+    def remove(self, aTimeframe : str, aSymbol : str) -> None:
+        """forget an exported symbol, e.g. after a failed export"""
+        self._state.get(aTimeframe.upper(), {}).pop(aSymbol, None)
+
+    def save(self) -> None:
+        """write state file, replaces the old state file only when complete"""
+        theTempFileName = f"{self._stateFileName}.tmp"
+        with open(theTempFileName, mode='w', encoding='UTF8') as statefile:
+            json.dump(self._state, statefile, indent=1, sort_keys=True)
+        os.replace(theTempFileName, self._stateFileName)
+        logger.debug(f"export state saved to '{self._stateFileName}'")
+
+def main():
+    logger.info("--- Persisted state of exported symbols ---")
+
+if __name__ == '__main__':
+    main()
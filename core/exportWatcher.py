@@ -0,0 +1,116 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+find complete exports of Quant Data Manager in the data directory, e.g. for the watch mode
+
+the directory is polled with os.scandir, which needs no file system events and works
+on network drives too, an export is complete, when
+    size and modification time did not change for aSettleTime seconds (debouncing)
+    and the file is closed: on Windows it can be opened for writing,
+    other systems do not lock files, there only size and modification time count
+an export is reported once, a new export of the same symbol later is reported again
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, time
+# ----------------------------------------------------------------------------
+
+theExportSuffix = '-No Session.csv'
+
+def getSymbol(nameOfExportFile : str, aTimeframe : str):
+    """returns the symbol of an export '<symbol>-<timeframe>-No Session.csv', None for other files"""
+    theSuffix = f"-{aTimeframe.upper()}{theExportSuffix}"
+    theBaseName = os.path.basename(nameOfExportFile)
+    if not theBaseName.endswith(theSuffix) or len(theBaseName) == len(theSuffix):
+        return None
+    return theBaseName[:-len(theSuffix)]
+
+def isClosed(nameOfFile : str) -> bool:
+    """check if no other process writes a file, always True on systems without mandatory locks"""
+    if os.name != 'nt':
+        return True
+    try:
+        # Quant Data Manager does not share an open export for writing
+        with open(nameOfFile, mode='r+b'):
+            return True
+    except PermissionError:
+        return False
+
+class exportWatcher:
+    """poll aDirectory for exports of aTimeframe, see poll()"""
+    def __init__(self,
+        aDirectory : str,
+        aTimeframe : str = 'M1',
+        aSettleTime : float = 5.0
+        ):
+        self._directory = aDirectory
+        self._timeframe = aTimeframe.upper()
+        self._settleTime = aSettleTime
+        # export file name -> (size, modification time, time of the first poll with them)
+        self._candidates = {}
+        # export file name -> (size, modification time) when it was reported
+        self._reported = {}
+
+    def poll(self, theIgnoredSymbols = (), aMaximum : int = None) -> list:
+        """returns (symbol, export file name) of exports, which are complete since the last poll,
+           exports of theIgnoredSymbols, e.g. in conversion, and exports beyond aMaximum
+           are reported by a later poll
+        """
+        theNow = time.monotonic()
+        theFound = {}
+        with os.scandir(self._directory) as theEntries:
+            for anEntry in theEntries:
+                aSymbol = getSymbol(anEntry.name, self._timeframe)
+                if aSymbol is None or not anEntry.is_file():
+                    continue
+                try:
+                    theStat = anEntry.stat()
+                except FileNotFoundError:
+                    continue # converted and removed in the meantime
+                theFound[anEntry.path] = (aSymbol, (theStat.st_size, theStat.st_mtime_ns))
+
+        # forget removed files, an export with the same name is a new export
+        for aFileName in set(self._candidates) - set(theFound):
+            del self._candidates[aFileName]
+        for aFileName in set(self._reported) - set(theFound):
+            del self._reported[aFileName]
+
+        theResult = []
+        for aFileName, (aSymbol, theSignature) in sorted(theFound.items()):
+            if aMaximum is not None and len(theResult) >= aMaximum:
+                break
+            if self._reported.get(aFileName) == theSignature or aSymbol in theIgnoredSymbols:
+                continue
+            theCandidate = self._candidates.get(aFileName)
+            if theCandidate is None or theCandidate[:2] != theSignature:
+                # new or still growing, the settle time starts again
+                self._candidates[aFileName] = theSignature + (theNow,)
+                continue
+            if theNow - theCandidate[2] < self._settleTime or not isClosed(aFileName):
+                continue
+            del self._candidates[aFileName]
+            self._reported[aFileName] = theSignature
+            theResult.append((aSymbol, aFileName))
+        return theResult
+
+def main():
+    logger.info("--- Find complete exports of Quant Data Manager ---")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+module for converting QuantDataManager quotes by rewriting the memory-mapped text
+
+the conversion only changes the beginning of every line, the values are passed through:
+    '2019.01.02,09:30,o,h,l,c,v' -> '2019-01-02T09:30Z,o,h,l,c,v'
+the output is byte-identical to the csv engine, the values are not parsed
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, mmap, operator
+import core.compressedFiles as compressedFiles
+import core.timeIndex as timeIndex
+import core.vectorizedConverter as vectorizedConverter
+# ----------------------------------------------------------------------------
+
+# default size of a chunk rewritten at once, in bytes
+theDefaultChunkSize = 16 * 1024 * 1024
+
+# characters of a line of quotes, besides the line end
+theQuoteCharacters = b'0123456789.-,:'
+
+# shape of the date and time at the beginning of every line, digits are '0'
+thePrefixShapes = {5: b'0000.00.00,00:00,', 8: b'0000.00.00,00:00:00,'}
+theDigitsAsZero = bytes.maketrans(b'123456789', b'000000000')
+
+def _readChunks(nameOfSourceFile:str, aChunkSize:int, aProgress = None):
+    """read a file in chunks of complete lines, returns bytes,
+       plain files are memory-mapped, compressed files are decompressed,
+       aProgress = progressReporter updated with the bytes read
+    """
+    with compressedFiles.openRead(nameOfSourceFile) as (sourcefile, rawfile):
+        if compressedFiles.isCompressed(sourcefile):
+            # a compressed file can not be memory-mapped
+            theRest = b''
+            while True:
+                theBuffer = sourcefile.read(aChunkSize)
+                if not theBuffer:
+                    break
+                if aProgress is not None:
+                    aProgress.update(rawfile.tell())
+                theBuffer = theRest + theBuffer
+                theLastLineEnd = theBuffer.rfind(b'\n') + 1
+                theRest = theBuffer[theLastLineEnd:]
+                if theLastLineEnd:
+                    yield theBuffer[:theLastLineEnd]
+            if theRest:
+                yield theRest
+            return
+
+        theFileSize = os.fstat(rawfile.fileno()).st_size
+        if theFileSize == 0:
+            return # an empty file can not be memory-mapped
+        with mmap.mmap(rawfile.fileno(), 0, access=mmap.ACCESS_READ) as thefile:
+            theStart = 0
+            while theStart < theFileSize:
+                # chunks end at a line end, the line boundaries are found in the mapped file
+                theEnd = thefile.rfind(b'\n', theStart, theStart + aChunkSize) + 1
+                if theEnd <= theStart:
+                    # line longer than a chunk or last line without line end
+                    theEnd = thefile.find(b'\n', theStart + aChunkSize) + 1 or theFileSize
+                yield thefile[theStart:theEnd]
+                theStart = theEnd
+                if aProgress is not None:
+                    aProgress.update(theStart)
+
+def rewriteQuoteChunk(aChunk : bytes) -> tuple:
+    """rewrite complete lines of a QuantDataManager export with bulk byte operations,
+       returns the number of lines and the rewritten buffers, which end with '\\r\\n' like csv.writer
+
+       raises ValueError, if a line does not match the layout 'YYYY.MM.DD,HH:MM,o,h,l,c,v'
+    """
+    if aChunk.translate(None, theQuoteCharacters + b'\r\n'):
+        raise ValueError("export contains characters besides numbers")
+    if aChunk.count(b'\r') != aChunk.count(b'\r\n'):
+        raise ValueError("line end is not '\\n' or '\\r\\n'")
+    theLines = aChunk.replace(b'\r\n', b'\n').split(b'\n')
+    if theLines[-1] == b'':
+        theLines.pop()
+    theNumberOfLines = len(theLines)
+    if theNumberOfLines == 0:
+        return 0, []
+    if set(map(operator.methodcaller('count', b','), theLines)) != {6}:
+        raise ValueError("export has not 7 columns in every line")
+
+    # date and time of all lines side by side, checked and rewritten by slices with a step of one line
+    theTimeWidth = 8 if theLines[0][16:17] == b':' else 5
+    thePrefixShape = thePrefixShapes[theTimeWidth]
+    theWidth = len(thePrefixShape)
+    thePrefixes = bytearray().join([aLine[:theWidth] for aLine in theLines])
+    if thePrefixes.translate(theDigitsAsZero) != thePrefixShape * theNumberOfLines:
+        raise ValueError("date and time are not in format 'YYYY.MM.DD,HH:MM' or 'YYYY.MM.DD,HH:MM:SS'")
+    thePrefixes[4::theWidth] = b'-' * theNumberOfLines
+    thePrefixes[7::theWidth] = b'-' * theNumberOfLines
+    thePrefixes[10::theWidth] = b'T' * theNumberOfLines
+    thePrefixes[theWidth-1::theWidth] = b'Z' * theNumberOfLines
+
+    # the comma behind the time is kept at the beginning of the values
+    thePrefixes = bytes(thePrefixes)
+    theLines = map(operator.add,
+                   [thePrefixes[aStart:aStart+theWidth] for aStart in range(0, len(thePrefixes), theWidth)],
+                   [aLine[theWidth-1:] for aLine in theLines])
+    return theNumberOfLines, [b'\r\n'.join(theLines), b'\r\n']
+
+def convertQuotes(nameOfSourceFile:str, nameOfDestinationFile:str, aChunkSize:int = theDefaultChunkSize,
+                  aProgress = None, aCompressionLevel:int = None, aCompressionThreads:int = 1,
+                  anIndexTimeframe:str = None) -> int:
+    """convert quotes from QuantDataManager Format to Zipline compatible format by rewriting the text,
+       aProgress = progressReporter updated with the bytes read,
+       aCompressionLevel, aCompressionThreads = compression of the destination file, see compressedFiles,
+       anIndexTimeframe = interval of the time index written with the destination file, see timeIndex,
+       the destination file is replaced only when complete,
+       returns the number of converted lines
+
+       raises ValueError, if the file does not match the layout 'YYYY.MM.DD,HH:MM,o,h,l,c,v'
+    """
+    theNumberOfLines = 0
+    with compressedFiles.replaceWhenComplete(nameOfDestinationFile, (timeIndex.theIndexSuffix,)) as nameOfTempFile, \
+         timeIndex.openWrite(nameOfTempFile, anIndexTimeframe, aCompressionLevel,
+                             aCompressionThreads) as destinationfile:
+        destinationfile.write(vectorizedConverter.theZiplineHeader)
+        for aChunk in _readChunks(nameOfSourceFile, aChunkSize, aProgress):
+            aNumberOfLines, theBuffers = rewriteQuoteChunk(aChunk)
+            destinationfile.writelines(theBuffers)
+            theNumberOfLines += aNumberOfLines
+    return theNumberOfLines
+
+def main():
+    logger.info("--- Module for converting QuantDataManager quotes by rewriting the text ---")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+additional outputs written in the same pass as the converted csv-file
+
+every output writer takes quoteBlocks:
+    write(aBlock)    = append the bars of a quoteBlock
+    close(isAborted) = finish the output, isAborted = the conversion failed, the output is left as before
+
+outputs:
+    bars            = memory-mappable binary bar store, see barStore
+    sqlite          = bars of all symbols in one SQLite database, see sqliteStore
+    M5, H1, D1, ... = quotes resampled to a higher timeframe, see resampler
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os
+import core.barStore as barStore
+import core.sqliteStore as sqliteStore
+import core.resampler as resampler
+# ----------------------------------------------------------------------------
+
+# names of additional outputs, as used in section 'converter' of the config file,
+# besides the timeframes of resampled quotes
+theOutputNames = ('bars', 'sqlite')
+
+def checkOutputNames(theOutputs : tuple) -> None:
+    """raises ValueError, if an output is unknown"""
+    for anOutput in theOutputs:
+        if anOutput not in theOutputNames and not resampler.isTimeframe(anOutput):
+            raise ValueError(f"unknown output '{anOutput}'")
+
+def openWriters(nameOfDestinationFile : str, theOutputs : tuple, isAppend : bool = False,
+                aCompressionLevel : int = None) -> list:
+    """open the writers of additional outputs next to the converted csv-file,
+       resampled quotes are compressed like the converted csv-file with aCompressionLevel
+    """
+    checkOutputNames(theOutputs)
+    theWriters = []
+    try:
+        for anOutput in theOutputs:
+            if anOutput == 'bars':
+                theWriters.append(barStore.barStoreWriter(barStore.getStoreName(nameOfDestinationFile), isAppend))
+            elif anOutput == 'sqlite':
+                theWriters.append(sqliteStore.sqliteStoreWriter(sqliteStore.getDatabaseName(nameOfDestinationFile),
+                                                                *sqliteStore.getSeriesName(nameOfDestinationFile),
+                                                                isAppend))
+            else:
+                nameOfResampledFile = resampler.getResampledFileName(nameOfDestinationFile, anOutput)
+                if os.path.abspath(nameOfResampledFile) == os.path.abspath(nameOfDestinationFile):
+                    raise ValueError(f"timeframe '{anOutput}' is the timeframe of the export")
+                theWriters.append(resampler.resampledWriter(nameOfResampledFile, anOutput, isAppend, aCompressionLevel))
+    except Exception:
+        closeWriters(theWriters, isAborted=True)
+        raise
+    return theWriters
+
+def closeWriters(theWriters : list, isAborted : bool = False) -> None:
+    """close all writers, even if one of them fails,
+       isAborted = the conversion failed, the writers discard what was written
+    """
+    theError = None
+    for aWriter in theWriters:
+        try:
+            aWriter.close(isAborted)
+        except Exception as inst:
+            logger.error(f"closing output failed: {inst}")
+            theError = theError or inst
+    if theError is not None:
+        raise theError
+
+def writeBlock(theWriters : list, aBlock) -> None:
+    """write a quoteBlock to all writers"""
+    for aWriter in theWriters:
+        aWriter.write(aBlock)
+
+def canAppend(nameOfDestinationFile : str, theOutputs : tuple, aLastTimestamp : int) -> bool:
+    """check if all additional outputs end with the bar of the converted csv-file"""
+    for anOutput in theOutputs:
+        if anOutput == 'bars':
+            if barStore.getLastTimestamp(barStore.getStoreName(nameOfDestinationFile)) != aLastTimestamp:
+                return False
+        elif anOutput == 'sqlite':
+            if sqliteStore.getLastTimestamp(sqliteStore.getDatabaseName(nameOfDestinationFile),
+                                            *sqliteStore.getSeriesName(nameOfDestinationFile)) != aLastTimestamp:
+                return False
+        else:
+            # the last resampled bar contains the last bar
+            nameOfResampledFile = resampler.getResampledFileName(nameOfDestinationFile, anOutput)
+            theLastBarTimestamp = int(resampler.getBarTimestamps(aLastTimestamp, anOutput))
+            if resampler.getLastTimestamp(nameOfResampledFile) != theLastBarTimestamp:
+                return False
+    return True
+
+def main():
+    logger.info("--- Additional outputs of converted quotes ---")
+
+if __name__ == '__main__':
+    main()
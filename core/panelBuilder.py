@@ -0,0 +1,205 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+memory-mapped panel of all converted symbols on a common time grid (requires numpy)
+
+a panel is a directory 'panel-<timeframe>' in the data directory:
+    timestamp.npy                           = time grid, seconds since epoch (int64), one row per bar
+    open.npy, high.npy, low.npy, close.npy  = prices (float64), one row per bar and one column per symbol,
+                                              NaN where a symbol has no bar
+    volume.npy                              = volume (float64), 0 where a symbol has no bar
+    header.json                             = symbols in the order of the columns, calendar and number of bars
+the arrays are standard .npy files in column-major order, the bars of one symbol are contiguous,
+numpy.load(..., mmap_mode='r') maps them without copying, see openPanel()
+
+calendar of the time grid:
+    union    = every timestamp of any symbol
+    exchange = every bar of the timeframe within a session 'HH:MM-HH:MM' in a time zone
+               from Monday to Friday, from the first to the last bar of all symbols
+the panel is filled one symbol at a time, only the bars of one symbol are held in memory,
+the bars are read from the bar store '<symbol>-<timeframe>.bars' or the converted csv-file
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, json, pathlib
+try:
+    import numpy as np
+except ImportError: # numpy is optional, the csv engine works without it
+    np = None
+import core.barStore as barStore
+import core.calendarAligner as calendarAligner
+import core.compressedFiles as compressedFiles
+import core.timeIndex as timeIndex
+import core.timeZoneConverter as timeZoneConverter
+# ----------------------------------------------------------------------------
+
+theColumns = ('open', 'high', 'low', 'close', 'volume')
+theHeaderFileName = 'header.json'
+thePanelVersion = 1
+theCalendars = ('union', 'exchange')
+
+def getPanelName(aDataDirectory : str, aTimeframe : str = 'M1') -> str:
+    """returns the name of the panel of a timeframe in the data directory"""
+    return os.path.join(aDataDirectory, f"panel-{aTimeframe.upper()}")
+
+def checkCalendar(aCalendar : str, aTimeZone : str = 'UTC', aSession : str = None) -> None:
+    """raises ValueError, if aCalendar is unknown or the exchange calendar has no valid session"""
+    if aCalendar not in theCalendars:
+        raise ValueError(f"unknown calendar '{aCalendar}', use one of {', '.join(theCalendars)}")
+    if aCalendar == 'exchange' and not aSession:
+        raise ValueError("calendar 'exchange' requires a session")
+    timeZoneConverter.checkTimeZone(aTimeZone, aSession)
+
+def _getQuotesFileName(aDataDirectory : str, aSymbol : str, aTimeframe : str) -> str:
+    """returns full path and name of the converted csv-file of a symbol, which may be compressed"""
+    return compressedFiles.findFile(os.path.join(aDataDirectory, f"{aSymbol}-{aTimeframe.upper()}.csv"))
+
+def hasBars(aDataDirectory : str, aSymbol : str, aTimeframe : str = 'M1') -> bool:
+    """check if a symbol was converted"""
+    nameOfConvertedFile = _getQuotesFileName(aDataDirectory, aSymbol, aTimeframe)
+    return pathlib.Path(nameOfConvertedFile).is_file() or \
+           pathlib.Path(barStore.getStoreName(nameOfConvertedFile), barStore.theHeaderFileName).is_file()
+
+def readBars(aDataDirectory : str, aSymbol : str, aTimeframe : str = 'M1') -> dict:
+    """returns the bars of a symbol as dict column name -> array incl. 'timestamp',
+       the bar store is mapped without reading it, the converted csv-file is read completely
+    """
+    nameOfConvertedFile = _getQuotesFileName(aDataDirectory, aSymbol, aTimeframe)
+    nameOfStore = barStore.getStoreName(nameOfConvertedFile)
+    if pathlib.Path(nameOfStore, barStore.theHeaderFileName).is_file():
+        return barStore.openStore(nameOfStore)
+    theBlock = timeIndex.readBlock(nameOfConvertedFile)
+    return {aColumn : getattr(theBlock, aColumn) for aColumn in ('timestamp',) + theColumns}
+
+def getUnionGrid(aDataDirectory : str, theSymbols : list, aTimeframe : str = 'M1'):
+    """returns every timestamp of any symbol, sorted and unique, one symbol is read at a time"""
+    theGrid = np.zeros(0, dtype=np.int64)
+    for aSymbol in theSymbols:
+        theGrid = np.union1d(theGrid, readBars(aDataDirectory, aSymbol, aTimeframe)['timestamp'])
+    return theGrid
+
+def getExchangeGrid(aFirstTimestamp : int, aLastTimestamp : int, aTimeframe : str = 'M1',
+                    aTimeZone : str = 'UTC', aSession : str = None):
+    """returns every bar of aTimeframe within the session from aFirstTimestamp to aLastTimestamp (UTC),
+       the bars are laid out in local time, so that the session follows daylight saving time
+    """
+    return calendarAligner.calendarAligner('nan', aTimeZone, aSession, (), aTimeframe).getGrid(aFirstTimestamp,
+                                                                                             aLastTimestamp)
+
+def _getTimeRange(aDataDirectory : str, theSymbols : list, aTimeframe : str) -> tuple:
+    """returns first and last timestamp of all symbols, (None, None) without bars"""
+    theFirst, theLast = None, None
+    for aSymbol in theSymbols:
+        theTimestamps = readBars(aDataDirectory, aSymbol, aTimeframe)['timestamp']
+        if len(theTimestamps) == 0:
+            continue
+        theFirst = int(theTimestamps[0]) if theFirst is None else min(theFirst, int(theTimestamps[0]))
+        theLast = int(theTimestamps[-1]) if theLast is None else max(theLast, int(theTimestamps[-1]))
+    return theFirst, theLast
+
+def removePanel(nameOfPanel : str) -> None:
+    """delete a panel"""
+    thePanelPath = pathlib.Path(nameOfPanel)
+    if not thePanelPath.is_dir():
+        return
+    # header first, an interrupted delete leaves an incomplete panel
+    (thePanelPath / theHeaderFileName).unlink(missing_ok=True)
+    for aColumn in ('timestamp',) + theColumns:
+        (thePanelPath / f"{aColumn}.npy").unlink(missing_ok=True)
+    thePanelPath.rmdir()
+
+def buildPanel(aDataDirectory : str, theSymbols : list, aTimeframe : str = 'M1', aCalendar : str = 'union',
+               aTimeZone : str = 'UTC', aSession : str = None) -> str:
+    """write the panel of the converted symbols theSymbols, symbols without converted bars are skipped,
+       aCalendar = 'union' or 'exchange' with aSession in aTimeZone, see module description,
+       returns the name of the panel
+    """
+    checkCalendar(aCalendar, aTimeZone, aSession)
+    theSymbols = [aSymbol for aSymbol in theSymbols if hasBars(aDataDirectory, aSymbol, aTimeframe)]
+    if aCalendar == 'union':
+        theGrid = getUnionGrid(aDataDirectory, theSymbols, aTimeframe)
+    else:
+        theFirst, theLast = _getTimeRange(aDataDirectory, theSymbols, aTimeframe)
+        theGrid = np.zeros(0, dtype=np.int64) if theFirst is None else \
+                  getExchangeGrid(theFirst, theLast, aTimeframe, aTimeZone, aSession)
+    logger.info(f"panel of {len(theSymbols)} symbols and {len(theGrid)} bars, calendar '{aCalendar}'")
+
+    nameOfPanel = getPanelName(aDataDirectory, aTimeframe)
+    removePanel(nameOfPanel)
+    pathlib.Path(nameOfPanel).mkdir(parents=True, exist_ok=True)
+    np.save(os.path.join(nameOfPanel, 'timestamp.npy'), theGrid)
+
+    # column-major, the column of a symbol is written to contiguous pages
+    theShape = (len(theGrid), len(theSymbols))
+    thePanel = {aColumn : np.lib.format.open_memmap(os.path.join(nameOfPanel, f"{aColumn}.npy"), mode='w+',
+                                                    dtype=np.float64, shape=theShape, fortran_order=True)
+                for aColumn in theColumns}
+    theNumberOfDroppedBars = 0
+    for aSymbolIndex, aSymbol in enumerate(theSymbols):
+        theBars = readBars(aDataDirectory, aSymbol, aTimeframe)
+        thePositions = np.searchsorted(theGrid, theBars['timestamp'])
+        # bars outside of the calendar have no row
+        theIsOnGrid = thePositions < len(theGrid)
+        theIsOnGrid[theIsOnGrid] = theGrid[thePositions[theIsOnGrid]] == theBars['timestamp'][theIsOnGrid]
+        thePositions = thePositions[theIsOnGrid]
+        theNumberOfDroppedBars += len(theIsOnGrid) - len(thePositions)
+        for aColumn in theColumns:
+            theValues = np.full(len(theGrid), 0.0 if aColumn == 'volume' else np.nan)
+            theValues[thePositions] = theBars[aColumn][theIsOnGrid]
+            thePanel[aColumn][:, aSymbolIndex] = theValues
+        logger.debug(f"'{aSymbol}' added to the panel ({aSymbolIndex+1}/{len(theSymbols)})")
+    for aColumn in theColumns:
+        thePanel[aColumn].flush()
+    del thePanel
+    if theNumberOfDroppedBars:
+        logger.info(f"{theNumberOfDroppedBars} bars outside of the calendar not in the panel")
+
+    # the header is written last, a panel without header is incomplete
+    with open(os.path.join(nameOfPanel, theHeaderFileName), mode='w', encoding='UTF8') as headerfile:
+        json.dump({'version' : thePanelVersion,
+                   'timeframe': aTimeframe.upper(),
+                   'calendar': aCalendar,
+                   'timezone': aTimeZone,
+                   'session' : aSession,
+                   'bars'    : len(theGrid),
+                   'symbols' : theSymbols}, headerfile, indent=1)
+    return nameOfPanel
+
+def readHeader(nameOfPanel : str) -> dict:
+    """returns the header of a panel
+
+       raises FileNotFoundError, if the panel does not exist or is incomplete
+    """
+    with open(os.path.join(nameOfPanel, theHeaderFileName), mode='r', encoding='UTF8') as headerfile:
+        return json.load(headerfile)
+
+def openPanel(nameOfPanel : str) -> dict:
+    """map all arrays of a panel read-only into memory, without reading the data,
+       returns a dict array name -> numpy.memmap and 'symbols' -> list of symbols of the columns
+    """
+    theResult = {'symbols': readHeader(nameOfPanel)['symbols']}
+    for aColumn in ('timestamp',) + theColumns:
+        theResult[aColumn] = np.load(os.path.join(nameOfPanel, f"{aColumn}.npy"), mmap_mode='r')
+    return theResult
+
+def main():
+    logger.info("--- Memory-mapped panel of all converted symbols ---")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+progress of reading a file, driven by the bytes consumed
+
+modes:
+    bar  = tqdm progress bar
+    log  = log line every 10 percent
+    off  = no progress
+    auto = bar at a terminal, log otherwise, e.g. in a scheduled job
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, time
+from tqdm import tqdm
+# ----------------------------------------------------------------------------
+
+theProgressModes = ('auto', 'bar', 'log', 'off')
+theLogStep = 10 # percent
+
+def checkProgressMode(aMode : str) -> None:
+    """raises ValueError, if aMode is unknown"""
+    if aMode not in theProgressModes:
+        raise ValueError(f"unknown progress mode '{aMode}'")
+
+def _isTerminal() -> bool:
+    return sys.stderr is not None and sys.stderr.isatty()
+
+class progressReporter:
+    """progress of reading aTotal bytes, update() takes the position in the file"""
+    def __init__(self,
+        aTotal : int,
+        aDescription : str,
+        aMode : str = 'auto'
+        ):
+        checkProgressMode(aMode)
+        if aMode == 'auto':
+            aMode = 'bar' if _isTerminal() else 'log'
+        self._mode = aMode
+        self._total = aTotal
+        self._description = aDescription
+        self._position = 0
+        self._nextLogPercent = theLogStep
+        self._startTime = time.perf_counter()
+        self._bar = None
+        if aMode == 'bar':
+            self._bar = tqdm(total=aTotal, desc=aDescription, unit='B', unit_scale=True, unit_divisor=1024)
+
+    def update(self, aPosition : int) -> None:
+        """report that the file was read up to aPosition"""
+        if aPosition <= self._position:
+            return
+        if self._bar is not None:
+            self._bar.update(aPosition - self._position)
+        elif self._mode == 'log' and self._total:
+            thePercent = 100 * aPosition // self._total
+            if thePercent >= self._nextLogPercent:
+                theSeconds = time.perf_counter() - self._startTime
+                theSpeed = aPosition / (1024 * 1024) / theSeconds if theSeconds else 0.0
+                logger.info(f"'{self._description}': {thePercent} % of {self._total / (1024 * 1024):.1f} MB, {theSpeed:.1f} MB/s")
+                self._nextLogPercent = (thePercent // theLogStep + 1) * theLogStep
+        self._position = aPosition
+
+    def finish(self) -> None:
+        """report that the file was read completely"""
+        self.update(self._total)
+
+    def close(self) -> None:
+        if self._bar is not None:
+            self._bar.close()
+            self._bar = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *theExceptionInfo):
+        self.close()
+
+def main():
+    logger.info("--- Progress of reading a file ---")
+
+if __name__ == '__main__':
+    main()
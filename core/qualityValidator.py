@@ -0,0 +1,211 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+data quality of quotes, checked block-wise with numpy arrays while converting
+
+checks:
+    duplicates        = timestamp equal to the latest timestamp before
+    outOfOrder        = timestamp older than the latest timestamp before
+    invalidOHLC       = high < low, high < open or close, low > open or close
+    nonPositivePrices = open, high, low or close <= 0
+    negativeVolumes   = volume < 0
+    gaps              = intervals longer than the shortest interval within the same day
+
+modes:
+    off    = no checks
+    report = count bad rows, convert all rows
+    drop   = remove bad rows, the converted quotes have ascending timestamps
+    repair = like drop, but set high and low of invalidOHLC rows to the highest and lowest price
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, json
+try:
+    import numpy as np
+except ImportError: # numpy is optional, the csv engine works without it
+    np = None
+import core.vectorizedConverter as vectorizedConverter
+# ----------------------------------------------------------------------------
+
+theValidationModes = ('off', 'report', 'drop', 'repair')
+
+def checkValidationMode(aMode : str) -> None:
+    """raises ValueError, if aMode is unknown"""
+    if aMode not in theValidationModes:
+        raise ValueError(f"unknown validation mode '{aMode}'")
+
+class qualityValidator:
+    """checks quoteBlocks of one symbol in the order of the export and counts the findings"""
+    def __init__(self,
+        aMode : str = 'report'
+        ):
+        checkValidationMode(aMode)
+        if aMode == 'off':
+            raise ValueError("validation mode 'off' does not need a validator")
+        self._mode = aMode
+        self.reset()
+
+    @property
+    def mode(self) -> str:
+        """Get validation mode, 'report', 'drop' or 'repair'"""
+        return self._mode
+
+    def reset(self) -> None:
+        """forget all checked quotes, e.g. before the file is converted again"""
+        self._lastTimestamp = None
+        self._interval = None
+        self._counters = {'checkedRows': 0, 'duplicates': 0, 'outOfOrder': 0, 'invalidOHLC': 0,
+                          'nonPositivePrices': 0, 'negativeVolumes': 0, 'gaps': 0, 'largestGapSeconds': 0,
+                          'droppedRows': 0, 'repairedRows': 0}
+
+    def setLastTimestamp(self, aTimestamp : int) -> None:
+        """continue after the last converted quote, e.g. when new quotes are appended"""
+        self._lastTimestamp = aTimestamp
+
+    def getReport(self) -> dict:
+        """returns the counters of all checked quotes"""
+        return dict(self._counters)
+
+    def checkBlock(self, aBlock) -> tuple:
+        """check a quoteBlock, returns masks of the rows to keep and of the rows to repair"""
+        theCounters = self._counters
+        theCounters['checkedRows'] += len(aBlock)
+        theKeep = np.ones(len(aBlock), dtype=bool)
+        if len(aBlock) == 0:
+            return theKeep, theKeep.copy()
+
+        theIsNonPositive = (aBlock.open <= 0) | (aBlock.high <= 0) | (aBlock.low <= 0) | (aBlock.close <= 0)
+        theIsNegativeVolume = aBlock.volume < 0
+        theIsInvalidOHLC = ((aBlock.high < aBlock.low)
+                            | (aBlock.high < np.maximum(aBlock.open, aBlock.close))
+                            | (aBlock.low > np.minimum(aBlock.open, aBlock.close)))
+        theCounters['nonPositivePrices'] += int(np.count_nonzero(theIsNonPositive))
+        theCounters['negativeVolumes'] += int(np.count_nonzero(theIsNegativeVolume))
+        theCounters['invalidOHLC'] += int(np.count_nonzero(theIsInvalidOHLC))
+
+        theRepair = np.zeros(len(aBlock), dtype=bool)
+        if self._mode != 'report':
+            theKeep &= ~(theIsNonPositive | theIsNegativeVolume)
+            if self._mode == 'repair':
+                theRepair = theIsInvalidOHLC & theKeep
+            else:
+                theKeep &= ~theIsInvalidOHLC
+
+        # compare every timestamp with the latest timestamp in front of it, of the rows kept so far
+        theIndex = np.flatnonzero(theKeep)
+        theTimestamps = aBlock.timestamp[theIndex]
+        if len(theTimestamps):
+            theLatest = np.maximum.accumulate(theTimestamps)
+            thePrevious = np.empty_like(theTimestamps)
+            thePrevious[1:] = theLatest[:-1]
+            thePrevious[0] = theTimestamps[0] - 1 if self._lastTimestamp is None else self._lastTimestamp
+            theIsDuplicate = theTimestamps == thePrevious
+            theIsOutOfOrder = theTimestamps < thePrevious
+            theCounters['duplicates'] += int(np.count_nonzero(theIsDuplicate))
+            theCounters['outOfOrder'] += int(np.count_nonzero(theIsOutOfOrder))
+            if self._mode != 'report':
+                theKeep[theIndex[theIsDuplicate | theIsOutOfOrder]] = False
+            self._countGaps(theTimestamps, thePrevious, ~(theIsDuplicate | theIsOutOfOrder))
+            self._lastTimestamp = int(max(theLatest[-1], thePrevious[0]))
+
+        theRepair &= theKeep
+        theCounters['droppedRows'] += int(np.count_nonzero(~theKeep))
+        theCounters['repairedRows'] += int(np.count_nonzero(theRepair))
+        return theKeep, theRepair
+
+    def _countGaps(self, theTimestamps, thePrevious, theIsAscending) -> None:
+        """count intervals longer than the shortest interval seen so far within the same day"""
+        theIsInterval = theIsAscending.copy()
+        if self._lastTimestamp is None:
+            theIsInterval[0] = False # no quote in front of the first quote
+        theIntervals = (theTimestamps - thePrevious)[theIsInterval]
+        if len(theIntervals) == 0:
+            return
+        theShortestInterval = int(theIntervals.min())
+        if self._interval is None or theShortestInterval < self._interval:
+            self._interval = theShortestInterval
+        theIsSameDay = (theTimestamps // 86400 == thePrevious // 86400)[theIsInterval]
+        theGaps = theIntervals[(theIntervals > self._interval) & theIsSameDay]
+        if len(theGaps):
+            self._counters['gaps'] += len(theGaps)
+            self._counters['largestGapSeconds'] = max(self._counters['largestGapSeconds'], int(theGaps.max()))
+
+    def validateBlock(self, aBlock):
+        """check a quoteBlock, returns the quoteBlock without dropped rows and with repaired rows"""
+        theKeep, theRepair = self.checkBlock(aBlock)
+        if np.any(theRepair):
+            theHigh = aBlock.high.copy()
+            theLow = aBlock.low.copy()
+            thePrices = np.stack([aBlock.open, aBlock.high, aBlock.low, aBlock.close])
+            theHigh[theRepair] = thePrices[:, theRepair].max(axis=0)
+            theLow[theRepair] = thePrices[:, theRepair].min(axis=0)
+            aBlock = vectorizedConverter.quoteBlock(aBlock.timestamp, aBlock.open, theHigh, theLow, aBlock.close,
+                                                    aBlock.volume, aBlock.decimals, aBlock.timeWidth)
+        if np.all(theKeep):
+            return aBlock
+        return aBlock.select(theKeep)
+
+    def validateRows(self, theRows : list) -> list:
+        """check rows of an export, as returned by csv.reader, returns the rows without dropped rows,
+           high and low of repaired rows are replaced by the text of the highest and lowest price
+        """
+        theKeep, theRepair = self.checkBlock(vectorizedConverter.quoteBlockFromRows(theRows))
+        if np.any(theRepair):
+            for anIndex in np.flatnonzero(theRepair):
+                aRow = list(theRows[anIndex])
+                thePrices = [float(aValue) for aValue in aRow[2:6]]
+                aRow[3] = aRow[2 + thePrices.index(max(thePrices))]
+                aRow[4] = aRow[2 + thePrices.index(min(thePrices))]
+                theRows[anIndex] = aRow
+        if np.all(theKeep):
+            return theRows
+        return [aRow for aRow, isKept in zip(theRows, theKeep) if isKept]
+
+# counters of bad rows, gaps are reported but do not make a row bad
+theBadRowCounters = ('duplicates', 'outOfOrder', 'invalidOHLC', 'nonPositivePrices', 'negativeVolumes')
+
+def hasFindings(theReport : dict) -> bool:
+    """check if a report of qualityValidator contains any bad rows"""
+    return any(theReport.get(aName) for aName in theBadRowCounters)
+
+def writeQualityReport(nameOfReportFile : str, theReports : dict) -> None:
+    """update the quality reports of symbols in a JSON file, the reports of other symbols are kept,
+       theReports = symbol -> report of qualityValidator
+    """
+    theQuality = {}
+    try:
+        with open(nameOfReportFile, mode='r', encoding='UTF8') as reportfile:
+            theQuality = json.load(reportfile)
+    except FileNotFoundError:
+        pass
+    except ValueError as inst:
+        logger.warning(f"quality report '{nameOfReportFile}' not readable, writing a new one ({inst})")
+    theQuality.update(theReports)
+
+    theTempFileName = f"{nameOfReportFile}.tmp"
+    with open(theTempFileName, mode='w', encoding='UTF8') as reportfile:
+        json.dump(theQuality, reportfile, indent=1, sort_keys=True)
+    os.replace(theTempFileName, nameOfReportFile)
+    logger.info(f"quality report saved to '{nameOfReportFile}'")
+
+def main():
+    logger.info("--- Data quality of quotes ---")
+
+if __name__ == '__main__':
+    main()
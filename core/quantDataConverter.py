@@ -21,10 +21,23 @@ module for converting QuantDataManager files
 import logging
 logger = logging.getLogger(__name__)
 # ----------------------------------------------------------------------------
-import sys, os, errno, csv, configparser, pathlib, tempfile
-from tqdm import tqdm
+import sys, os, io, errno, csv, configparser, pathlib, tempfile, time
+import core.vectorizedConverter as vectorizedConverter
+import core.mmapConverter as mmapConverter
+import core.outputWriters as outputWriters
+import core.progressReporter as progressReporter
+import core.compressedFiles as compressedFiles
+import core.qualityValidator as qualityValidator
+import core.timeZoneConverter as timeZoneConverter
+import core.timeIndex as timeIndex
+import core.tickAggregator as tickAggregator
+import core.quoteMerger as quoteMerger
+import core.calendarAligner as calendarAligner
 # ----------------------------------------------------------------------------
 
+# number of rows passed at once to additional outputs and progress by the csv engine
+theRowsPerBlock = 65536
+
 def getTempFileName() -> str:
     """create temporary file name"""
     # source: https://stackoverflow.com/questions/26541416/generate-temporary-file-names-without-creating-actual-file-in-python
@@ -58,6 +71,8 @@ def convertSymbolList(nameOfSourceFile:str, nameOfDestinationFile:str) -> bool:
                                            quotechar='"', 
                                            quoting=csv.QUOTE_MINIMAL)
                 theWriter.writeheader()
+                # messages of every field are built only, if they are logged
+                isDebugLogged = logger.isEnabledFor(logging.DEBUG)
                 for aRow in theReader:
                     # at column 'Date from' convert date format to ISO date
                     aDateValue = aRow['Date from']
@@ -69,8 +84,9 @@ def convertSymbolList(nameOfSourceFile:str, nameOfDestinationFile:str) -> bool:
                     theISOdateValue = aDateValue.replace('.','-')
                     aRow['Date to'] = theISOdateValue
 
-                    for name,value in aRow.items():
-                        logger.debug(f'{name}:{value}')
+                    if isDebugLogged:
+                        for name,value in aRow.items():
+                            logger.debug('%s:%s', name, value)
 
                     theWriter.writerow(aRow) # write a row to file
         fileConvertIsOk = True
@@ -85,16 +101,18 @@ def convertSymbolList(nameOfSourceFile:str, nameOfDestinationFile:str) -> bool:
 
 def getSymbolsList(nameOfCSVFile : str) -> list:
     """return the symbols in CSV File as list"""
-    theResult = []
+    return list(getSymbolsDetails(nameOfCSVFile))
+
+def getSymbolsDetails(nameOfCSVFile : str) -> dict:
+    """return the rows of the symbols in CSV File as dict, key = symbol"""
+    theResult = {}
     try:
-        logger.debug(f"read CSV symbollist at '{nameOfCSVFile}' and return as list")
+        logger.debug(f"read CSV symbollist at '{nameOfCSVFile}' and return as dict")
 
         with open(nameOfCSVFile, mode='r+t') as sourcefile:
             theReader = csv.DictReader(sourcefile, delimiter=',', quotechar='"')
             for aRow in theReader:
-                aSymbol = aRow['Symbol']
-                theResult.append(aSymbol)
-                logger.debug(f"Symbol='{aSymbol}'")
+                theResult[aRow['Symbol']] = aRow
     except Exception as inst:
         logger.error(type(inst))     # the exception instance
         logger.error(inst.args)      # arguments stored in .args
@@ -113,63 +131,534 @@ def getNumberOfLinesOfFile(nameOfTextFile:str) -> int:
             buf = read_f(buf_size)            
     return lines
 
-def convertQuotes(nameOfSourceFile:str, nameOfDestinationFile:str) -> bool:
-    """convert quotes from QuantDataManager Format to Zipline compatible format"""
+def getFirstAndLastLineOfFile(nameOfTextFile:str) -> tuple:
+    """return first line after the header and last line of a text file without line end,
+       reads only the head and the tail of the file, compressed files are decompressed completely,
+       returns (None, None) for files without data
+    """
+    theTailSize = 4096
     try:
-        logger.debug(f"convert Quant Data Quotes from '{nameOfSourceFile}' and save as '{nameOfDestinationFile}'")
+        with compressedFiles.openRead(nameOfTextFile) as (textfile, _):
+            textfile.readline() # header
+            theFirstLine = textfile.readline()
+            if not theFirstLine.endswith(b'\n'):
+                # no data or last line incomplete
+                return None, None
 
-        # if destination file exists already, delete it
-        removeFile(nameOfDestinationFile)
+            # source = https://stackoverflow.com/questions/46258499/how-to-read-the-last-line-of-a-file-in-python
+            _, theTail = compressedFiles.readTail(textfile, theTailSize)
+            if not theTail.endswith(b'\n'):
+                return None, None
+            theLastLine = theTail.splitlines()[-1]
+    except (FileNotFoundError, EOFError): # EOFError = compressed file incomplete
+        return None, None
+    return theFirstLine.rstrip(b'\r\n').decode('UTF8'), theLastLine.decode('UTF8')
 
-        theCSVfieldnames = ['date', 'open', 'high', 'low', 'close', 'volume']
-        numberOfLines = getNumberOfLinesOfFile(nameOfSourceFile)
+def _convertQuoteRow(aRow : list) -> dict:
+    """convert a row of quotes from QuantDataManager Format to Zipline compatible format"""
+    # at column 0 convert date format to ISO date
+    aDateValue = aRow[0]
+    anISOdateValue = aDateValue.replace('.','-')
 
-        with open(nameOfSourceFile) as sourcefile:
-                        
+    # at column 1 convert time format to ISO time
+    aTimeValue = aRow[1]
+    anISOtimeValue = f"T{aTimeValue}Z" # = timezone UTC
+
+    anOpen  = aRow[2]
+    aHigh   = aRow[3]
+    aLow    = aRow[4]
+    aClose  = aRow[5]
+    aVolume = aRow[6]
+
+    return {'date'  : f"{anISOdateValue}{anISOtimeValue}",
+            'open'  : f"{anOpen}",
+            'high'  : f"{aHigh}" ,
+            'low'   : f"{aLow}" ,
+            'close' : f"{aClose}",
+            'volume': f"{aVolume}"
+           }
+
+def _getProgress(nameOfSourceFile:str, aProgressMode:str) -> progressReporter.progressReporter:
+    """progress of reading a source file, see progressReporter"""
+    return progressReporter.progressReporter(os.stat(nameOfSourceFile).st_size,
+                                             os.path.basename(nameOfSourceFile), aProgressMode)
+
+def _writeRowBlock(theWriter, theRows : list, theWriters : list, theValidator, theTimeZone = None) -> int:
+    """write a block of rows of an export to additional outputs,
+       with theTimeZone the rows are converted to UTC and written to the converted csv-file too,
+       with theValidator the rows are validated and written to the converted csv-file too,
+       returns the number of lines written to the converted csv-file
+    """
+    theNumberOfLines = 0
+    if theTimeZone is not None:
+        theRows = theTimeZone.convertRows(theRows)
+    if theValidator is not None:
+        theRows = theValidator.validateRows(theRows)
+    if theValidator is not None or theTimeZone is not None:
+        for aRow in theRows:
+            theWriter.writerow(_convertQuoteRow(aRow))
+        theNumberOfLines = len(theRows)
+    if theWriters and theRows:
+        outputWriters.writeBlock(theWriters, vectorizedConverter.quoteBlockFromRows(theRows))
+    return theNumberOfLines
+
+def _convertQuotesWithCSV(nameOfSourceFile:str, nameOfDestinationFile:str, theOutputs:tuple = (),
+                          aProgressMode:str = 'off', aCompressionLevel:int = None, aCompressionThreads:int = 1,
+                          theValidator = None, theTimeZone = None, anIndexTimeframe:str = None) -> int:
+    """convert quotes row by row with the csv module,
+       theOutputs = additional outputs written in the same pass, see outputWriters,
+       theValidator = qualityValidator checking blocks of rows before they are written,
+       theTimeZone = timeZoneConverter converting blocks of rows to UTC before they are checked,
+       anIndexTimeframe = interval of the time index written with the destination file, see timeIndex,
+       the destination file is replaced only when complete,
+       returns the number of converted lines
+    """
+    isBuffered = theValidator is not None or theTimeZone is not None
+    theCSVfieldnames = ['date', 'open', 'high', 'low', 'close', 'volume']
+    theNumberOfLines = 0
+
+    theWriters = outputWriters.openWriters(nameOfDestinationFile, theOutputs, aCompressionLevel=aCompressionLevel)
+    isAborted = True
+    try:
+        with compressedFiles.openRead(nameOfSourceFile) as (thesourcefile, rawfile), \
+             _getProgress(nameOfSourceFile, aProgressMode) as theProgress:
+
+            sourcefile = io.TextIOWrapper(thesourcefile)
             theReader = csv.reader(sourcefile, delimiter=',', quotechar='"')
 
-            with open(nameOfDestinationFile, mode='w+t', newline='', encoding='UTF8') as destinationfile:
-                theWriter = csv.DictWriter(destinationfile, 
+            with compressedFiles.replaceWhenComplete(nameOfDestinationFile, (timeIndex.theIndexSuffix,)) as nameOfTempFile, \
+                 io.TextIOWrapper(timeIndex.openWrite(nameOfTempFile, anIndexTimeframe, aCompressionLevel,
+                                                      aCompressionThreads),
+                                  newline='', encoding='UTF8') as destinationfile:
+                theWriter = csv.DictWriter(destinationfile,
                                            fieldnames= theCSVfieldnames,
                                            delimiter=',',
-                                           quotechar='"', 
+                                           quotechar='"',
                                            quoting=csv.QUOTE_MINIMAL)
                 theWriter.writeheader()
-                # source= https://blog.nelsonliu.me/2016/07/30/progress-bars-for-python-file-reading-with-tqdm/
-                for aRow in tqdm(theReader, total=numberOfLines ):
-                    # at column 0 convert date format to ISO date
-                    aDateValue = aRow[0]
-                    anISOdateValue = aDateValue.replace('.','-')
-                    
-                    # at column 1 convert time format to ISO time
-                    aTimeValue = aRow[1]
-                    anISOtimeValue = f"T{aTimeValue}Z" # = timezone UTC
-
-                    anOpen  = aRow[2]
-                    aHigh   = aRow[3]
-                    aLow    = aRow[4]
-                    aClose  = aRow[5]
-                    aVolume = aRow[6]
-
-                    theWriter.writerow(
-                        {'date'  : f"{anISOdateValue}{anISOtimeValue}", 
-                         'open'  : f"{anOpen}", 
-                         'high'  : f"{aHigh}" , 
-                         'low'   : f"{aLow}" ,
-                         'close' : f"{aClose}",
-                         'volume': f"{aVolume}"
-                        })
+                theRows = []
+                theNumberOfRows = 0
+                for aRow in theReader:
+                    theNumberOfRows += 1
+                    if theNumberOfRows % theRowsPerBlock == 0:
+                        # bytes consumed, the file is read only once
+                        theProgress.update(rawfile.tell())
+                    if not isBuffered:
+                        theWriter.writerow(_convertQuoteRow(aRow))
+                        theNumberOfLines += 1
+                    if theWriters or isBuffered:
+                        theRows.append(aRow)
+                        if len(theRows) == theRowsPerBlock:
+                            theNumberOfLines += _writeRowBlock(theWriter, theRows, theWriters, theValidator, theTimeZone)
+                            theRows = []
+                if theRows:
+                    theNumberOfLines += _writeRowBlock(theWriter, theRows, theWriters, theValidator, theTimeZone)
+                theProgress.finish()
+        isAborted = False
+    finally:
+        outputWriters.closeWriters(theWriters, isAborted)
+    return theNumberOfLines
+
+def _appendQuotesWithCSV(nameOfSourceFile:str, nameOfDestinationFile:str, aFirstLine:str, aLastLine:str,
+                         theOutputs:tuple = (), aProgressMode:str = 'off', aCompressionLevel:int = None,
+                         aCompressionThreads:int = 1, anIndexTimeframe:str = None):
+    """append quotes newer than aLastLine row by row with the csv module,
+       returns the number of appended lines, None without writing anything,
+       if the export does not start with aFirstLine or does not contain aLastLine
+    """
+    theLastDate = aLastLine.split(',')[0]
+    isFirstRow = True
+    isLastLineFound = False
+    theNumberOfLines = 0
+    theNumberOfRows = 0
+
+    theWriters = outputWriters.openWriters(nameOfDestinationFile, theOutputs, isAppend=True,
+                                           aCompressionLevel=aCompressionLevel)
+    isAborted = True
+    try:
+        with compressedFiles.openRead(nameOfSourceFile) as (thesourcefile, rawfile), \
+             _getProgress(nameOfSourceFile, aProgressMode) as theProgress:
+
+            sourcefile = io.TextIOWrapper(thesourcefile)
+            theReader = csv.reader(sourcefile, delimiter=',', quotechar='"')
+
+            with io.TextIOWrapper(timeIndex.openWrite(nameOfDestinationFile, anIndexTimeframe, aCompressionLevel,
+                                                      aCompressionThreads, isAppend=True),
+                                  newline='', encoding='UTF8') as destinationfile:
+                theRows = []
+                for aRow in theReader:
+                    theNumberOfRows += 1
+                    if theNumberOfRows % theRowsPerBlock == 0:
+                        theProgress.update(rawfile.tell())
+                    aLine = ','.join(_convertQuoteRow(aRow).values())
+                    if isFirstRow:
+                        if aLine != aFirstLine:
+                            return None
+                        isFirstRow = False
+
+                    # dates have a fixed width and compare like strings
+                    aDate = aLine.split(',')[0]
+                    if aDate < theLastDate:
+                        continue
+                    if aDate == theLastDate:
+                        # the last converted line has to be exported unchanged
+                        if aLine != aLastLine:
+                            return None
+                        isLastLineFound = True
+                        continue
+                    if not isLastLineFound:
+                        return None
+                    destinationfile.write(f"{aLine}\r\n") # line end like csv.writer
+                    theNumberOfLines += 1
+                    if theWriters:
+                        theRows.append(aRow)
+                if theRows:
+                    outputWriters.writeBlock(theWriters, vectorizedConverter.quoteBlockFromRows(theRows))
+                theProgress.finish()
+        # an export not continuing the converted file leaves the outputs unchanged
+        isAborted = not isLastLineFound
+    finally:
+        outputWriters.closeWriters(theWriters, isAborted)
+
+    if not isLastLineFound:
+        return None
+    return theNumberOfLines
+
+def _convertQuotesWithNumpy(nameOfSourceFile:str, nameOfDestinationFile:str, theOutputs:tuple = (),
+                            aProgressMode:str = 'off', aCompressionLevel:int = None, aCompressionThreads:int = 1,
+                            theValidator = None, theTimeZone = None, anIndexTimeframe:str = None,
+                            theAligner = None) -> int:
+    """convert quotes block-wise with numpy arrays,
+       falls back to the csv module, if the export does not fit the vectorized parser,
+       but not with theAligner, which the csv module does not support,
+       returns the number of converted lines
+    """
+    try:
+        with _getProgress(nameOfSourceFile, aProgressMode) as theProgress:
+            theNumberOfLines = vectorizedConverter.convertQuotes(nameOfSourceFile, nameOfDestinationFile,
+                                                                 theOutputs=theOutputs, aProgress=theProgress,
+                                                                 aCompressionLevel=aCompressionLevel,
+                                                                 aCompressionThreads=aCompressionThreads,
+                                                                 theValidator=theValidator, theTimeZone=theTimeZone,
+                                                                 anIndexTimeframe=anIndexTimeframe,
+                                                                 theAligner=theAligner)
+        logger.debug(f"{theNumberOfLines} lines converted with numpy")
+    except ValueError as inst:
+        if theAligner is not None:
+            raise
+        logger.warning(f"numpy engine can not convert '{nameOfSourceFile}' ({inst}), using csv engine")
+        if theValidator is not None:
+            theValidator.reset()
+        theNumberOfLines = _convertQuotesWithCSV(nameOfSourceFile, nameOfDestinationFile, theOutputs, aProgressMode,
+                                                 aCompressionLevel, aCompressionThreads, theValidator, theTimeZone,
+                                                 anIndexTimeframe)
+    return theNumberOfLines
+
+def _convertQuotesWithMmap(nameOfSourceFile:str, nameOfDestinationFile:str, aProgressMode:str = 'off',
+                           aCompressionLevel:int = None, aCompressionThreads:int = 1,
+                           anIndexTimeframe:str = None) -> int:
+    """convert quotes by rewriting the memory-mapped text,
+       falls back to the csv module, if a line does not match the layout 'YYYY.MM.DD,HH:MM,o,h,l,c,v',
+       returns the number of converted lines
+    """
+    try:
+        with _getProgress(nameOfSourceFile, aProgressMode) as theProgress:
+            theNumberOfLines = mmapConverter.convertQuotes(nameOfSourceFile, nameOfDestinationFile,
+                                                           aProgress=theProgress,
+                                                           aCompressionLevel=aCompressionLevel,
+                                                           aCompressionThreads=aCompressionThreads,
+                                                           anIndexTimeframe=anIndexTimeframe)
+        logger.debug(f"{theNumberOfLines} lines converted with mmap")
+    except ValueError as inst:
+        logger.warning(f"mmap engine can not convert '{nameOfSourceFile}' ({inst}), using csv engine")
+        theNumberOfLines = _convertQuotesWithCSV(nameOfSourceFile, nameOfDestinationFile, (), aProgressMode,
+                                                 aCompressionLevel, aCompressionThreads,
+                                                 anIndexTimeframe=anIndexTimeframe)
+    return theNumberOfLines
+
+def _appendQuotesWithNumpy(nameOfSourceFile:str, nameOfDestinationFile:str, aFirstLine:str, aLastLine:str,
+                           theOutputs:tuple = (), aProgressMode:str = 'off', aCompressionLevel:int = None,
+                           aCompressionThreads:int = 1, theValidator = None, theTimeZone = None,
+                           anIndexTimeframe:str = None):
+    """append quotes block-wise with numpy arrays,
+       returns None, if the export does not fit the vectorized parser
+    """
+    try:
+        with _getProgress(nameOfSourceFile, aProgressMode) as theProgress:
+            return vectorizedConverter.appendQuotes(nameOfSourceFile, nameOfDestinationFile, aFirstLine, aLastLine,
+                                                    theOutputs=theOutputs, aProgress=theProgress,
+                                                    aCompressionLevel=aCompressionLevel,
+                                                    aCompressionThreads=aCompressionThreads,
+                                                    theValidator=theValidator, theTimeZone=theTimeZone,
+                                                    anIndexTimeframe=anIndexTimeframe)
+    except ValueError as inst:
+        # lines may be appended already, convert completely instead
+        logger.warning(f"numpy engine can not append '{nameOfSourceFile}' ({inst})")
+        return None
+
+def _appendQuotes(nameOfSourceFile:str, nameOfDestinationFile:str, anEngine:str, theOutputs:tuple = (),
+                  aProgressMode:str = 'off', aCompressionLevel:int = None, aCompressionThreads:int = 1,
+                  theValidator = None, theTimeZone = None, anIndexTimeframe:str = None):
+    """append new quotes to an already converted file,
+       returns the number of appended lines, None if the file has to be converted completely
+    """
+    theFirstLine, theLastLine = getFirstAndLastLineOfFile(nameOfDestinationFile)
+    if theLastLine is None:
+        return None
+    # additional outputs have to end with the same bar
+    if theOutputs and not outputWriters.canAppend(nameOfDestinationFile, theOutputs,
+                          vectorizedConverter.parseZiplineDate(theLastLine.split(',')[0])):
+        logger.info(f"outputs of '{nameOfDestinationFile}' are not complete, converting all quotes")
+        return None
+
+    if theValidator is not None:
+        # new quotes are checked against the last converted quote
+        theValidator.setLastTimestamp(vectorizedConverter.parseZiplineDate(theLastLine.split(',')[0]))
+
+    # the mmap engine does not parse quotes, which are compared and appended,
+    # the csv engine validates and converts blocks of complete files only
+    if vectorizedConverter.isAvailable() and (anEngine != 'csv' or theValidator is not None or theTimeZone is not None):
+        theNumberOfLines = _appendQuotesWithNumpy(nameOfSourceFile, nameOfDestinationFile,
+                                                  theFirstLine, theLastLine, theOutputs, aProgressMode,
+                                                  aCompressionLevel, aCompressionThreads, theValidator, theTimeZone,
+                                                  anIndexTimeframe)
+    else:
+        try:
+            theNumberOfLines = _appendQuotesWithCSV(nameOfSourceFile, nameOfDestinationFile,
+                                                    theFirstLine, theLastLine, theOutputs, aProgressMode,
+                                                    aCompressionLevel, aCompressionThreads, anIndexTimeframe)
+        except ValueError as inst:
+            # e.g. incomplete bar store, lines may be appended already
+            logger.warning(f"can not append '{nameOfSourceFile}' ({inst})")
+            theNumberOfLines = None
+
+    if theNumberOfLines is None:
+        logger.info(f"history of '{nameOfDestinationFile}' changed, converting all quotes")
+        return None
+    logger.info(f"{theNumberOfLines} new lines appended to '{nameOfDestinationFile}'")
+    return theNumberOfLines
+
+def convertQuotes(nameOfSourceFile:str, nameOfDestinationFile:str, anEngine:str = 'csv', isIncremental:bool = False,
+                  theOutputs:tuple = (), aProgressMode:str = 'auto', aCompressionLevel:int = None,
+                  aCompressionThreads:int = 1, aValidationMode:str = 'off', aTimeZone:str = 'UTC',
+                  aSession:str = None, anIndexTimeframe:str = None, aCalendar:tuple = None) -> bool:
+    """convert quotes from QuantDataManager Format to Zipline compatible format,
+       anEngine = 'csv' (row by row), 'numpy' (block-wise with numpy arrays)
+                  or 'mmap' (rewrite the text, without additional outputs),
+       isIncremental = only append quotes newer than the last line of an existing destination file,
+       theOutputs = additional outputs written in the same pass, e.g. ('bars', 'H1'), see outputWriters,
+       aProgressMode = 'auto', 'bar', 'log' or 'off', see progressReporter,
+       aCompressionLevel, aCompressionThreads = compression of a destination file named like '<symbol>-M1.csv.gz',
+                                                '.xz' or '.bz2', see compressedFiles,
+       the source file may be compressed by any of these codecs,
+       aValidationMode = 'off', 'report', 'drop' or 'repair' bad quotes (requires numpy), see qualityValidator,
+       aTimeZone = time zone of the export like 'America/New_York', converted to UTC (requires numpy),
+       aSession = regular trading session like '09:30-16:00' in aTimeZone, None = all quotes, see timeZoneConverter,
+       anIndexTimeframe = interval like 'D1' of the time index '<symbol>-M1.csv.idx' written with
+                          an uncompressed destination file, None = no index, see timeIndex,
+       aCalendar = fill ('ffill' or 'nan'), time zone, session, holidays and timeframe of a trading calendar,
+                   the converted bars are aligned to (requires numpy), None = no alignment, see calendarAligner,
+                   aligned files are always converted completely
+    """
+    return convertQuotesWithMetrics(nameOfSourceFile, nameOfDestinationFile, anEngine, isIncremental, theOutputs,
+                                    aProgressMode, aCompressionLevel, aCompressionThreads, aValidationMode,
+                                    aTimeZone, aSession, anIndexTimeframe, aCalendar)['ok']
+
+def convertQuotesWithMetrics(nameOfSourceFile:str, nameOfDestinationFile:str, anEngine:str = 'csv',
+                             isIncremental:bool = False, theOutputs:tuple = (), aProgressMode:str = 'auto',
+                             aCompressionLevel:int = None, aCompressionThreads:int = 1,
+                             aValidationMode:str = 'off', aTimeZone:str = 'UTC', aSession:str = None,
+                             anIndexTimeframe:str = None, aCalendar:tuple = None) -> dict:
+    """convert quotes like convertQuotes,
+       returns success, wall and CPU time, written lines and bytes of the conversion as dict,
+       with validation the report of qualityValidator as 'quality', if it failed the exception as 'error'
+    """
+    theStartTime = time.perf_counter()
+    theStartCPUTime = time.process_time()
+    theMetrics = {'ok': False, 'rows': 0, 'bytesIn': 0, 'bytesOut': 0}
+    try:
+        logger.debug(f"convert Quant Data Quotes from '{nameOfSourceFile}' and save as '{nameOfDestinationFile}'")
+
+        outputWriters.checkOutputNames(theOutputs)
+        if theOutputs and not vectorizedConverter.isAvailable():
+            raise ValueError(f"outputs {theOutputs} require numpy")
+        if anEngine == 'numpy' and not vectorizedConverter.isAvailable():
+            logger.warning("numpy is not installed, using csv engine")
+            anEngine = 'csv'
+        if anEngine not in ('csv', 'numpy', 'mmap'):
+            raise ValueError(f"unknown conversion engine '{anEngine}'")
+        qualityValidator.checkValidationMode(aValidationMode)
+        if aValidationMode != 'off' and not vectorizedConverter.isAvailable():
+            raise ValueError(f"validation mode '{aValidationMode}' requires numpy")
+        theValidator = qualityValidator.qualityValidator(aValidationMode) if aValidationMode != 'off' else None
+        timeZoneConverter.checkTimeZone(aTimeZone, aSession)
+        theTimeZone = None
+        if timeZoneConverter.isConverting(aTimeZone, aSession):
+            if not vectorizedConverter.isAvailable():
+                raise ValueError(f"time zone '{aTimeZone}' and session '{aSession}' require numpy")
+            theTimeZone = timeZoneConverter.timeZoneConverter(aTimeZone, aSession)
+        theAligner = None
+        if aCalendar is not None:
+            if not vectorizedConverter.isAvailable():
+                raise ValueError("alignment to a trading calendar requires numpy")
+            theAligner = calendarAligner.calendarAligner(*aCalendar)
+            # the calendar is filled block by block from the first bar on
+            isIncremental = False
+            if anEngine != 'numpy':
+                logger.debug(f"{anEngine} engine does not align to a trading calendar, using numpy engine")
+                anEngine = 'numpy'
+        if anEngine == 'mmap' and (theOutputs or theValidator is not None or theTimeZone is not None):
+            # additional outputs, validation and time zones need parsed quotes
+            anEngine = 'numpy' if vectorizedConverter.isAvailable() else 'csv'
+            logger.debug(f"mmap engine writes the converted csv-file only, using {anEngine} engine")
+        progressReporter.checkProgressMode(aProgressMode)
+        if anIndexTimeframe is not None:
+            timeIndex.checkIndexTimeframe(anIndexTimeframe)
+        compressedFiles.checkCompression(compressedFiles.getCompression(nameOfDestinationFile),
+                                         aCompressionLevel, aCompressionThreads)
+
+        theMetrics['bytesIn'] = os.stat(nameOfSourceFile).st_size
+        theDestinationSize = 0
+        theNumberOfLines = None
+        if isIncremental:
+            theDestinationSize = _getFileSize(nameOfDestinationFile)
+            theNumberOfLines = _appendQuotes(nameOfSourceFile, nameOfDestinationFile, anEngine, theOutputs,
+                                             aProgressMode, aCompressionLevel, aCompressionThreads, theValidator,
+                                             theTimeZone, anIndexTimeframe)
+        if theNumberOfLines is None:
+            # the converted file replaces an existing destination file only when complete
+            theDestinationSize = 0
+            if theValidator is not None:
+                theValidator.reset()
+
+            if anEngine == 'mmap':
+                theNumberOfLines = _convertQuotesWithMmap(nameOfSourceFile, nameOfDestinationFile,
+                                                          aProgressMode, aCompressionLevel, aCompressionThreads,
+                                                          anIndexTimeframe)
+            elif anEngine == 'numpy':
+                theNumberOfLines = _convertQuotesWithNumpy(nameOfSourceFile, nameOfDestinationFile, theOutputs,
+                                                           aProgressMode, aCompressionLevel, aCompressionThreads,
+                                                           theValidator, theTimeZone, anIndexTimeframe, theAligner)
+            else:
+                theNumberOfLines = _convertQuotesWithCSV(nameOfSourceFile, nameOfDestinationFile, theOutputs,
+                                                         aProgressMode, aCompressionLevel, aCompressionThreads,
+                                                         theValidator, theTimeZone, anIndexTimeframe)
+        theMetrics['rows'] = theNumberOfLines
+        if theAligner is not None:
+            logger.info(f"'{nameOfDestinationFile}' aligned to the calendar, {theAligner.filledBars} bars filled, "
+                        f"{theAligner.removedBars} bars outside of the calendar removed")
+        if theValidator is not None:
+            theMetrics['quality'] = theValidator.getReport()
+            if qualityValidator.hasFindings(theMetrics['quality']):
+                logger.warning(f"quality of '{nameOfSourceFile}': {theMetrics['quality']}")
+        theMetrics['bytesOut'] = _getFileSize(nameOfDestinationFile) - theDestinationSize
 
         # when conversion is complete, delete source-file
-        removeFile(nameOfSourceFile)                    
+        removeFile(nameOfSourceFile)
 
-        fileConvertIsOk = True
+        theMetrics['ok'] = True
     except Exception as inst:
         logger.error(type(inst))     # the exception instance
         logger.error(inst.args)      # arguments stored in .args
         logger.error(inst)           # __str__ allows args to be printed directly
-        fileConvertIsOk = False
-    return fileConvertIsOk
+        theMetrics['error'] = f"{type(inst).__name__}: {inst}"
+    theMetrics['seconds'] = time.perf_counter() - theStartTime
+    theMetrics['cpuSeconds'] = time.process_time() - theStartCPUTime
+    return theMetrics
+
+def convertTicksWithMetrics(nameOfSourceFile:str, nameOfDestinationFile:str, aTimeframe:str = 'M1',
+                            aPrice:str = 'bid', theOutputs:tuple = (), aProgressMode:str = 'auto',
+                            aCompressionLevel:int = None, aCompressionThreads:int = 1,
+                            aValidationMode:str = 'off', aTimeZone:str = 'UTC', aSession:str = None,
+                            anIndexTimeframe:str = None) -> dict:
+    """aggregate a tick export of QuantDataManager to bars of aTimeframe in Zipline compatible format (requires numpy),
+       aPrice = 'bid', 'ask' or 'mid' price of the bars, see tickAggregator,
+       the other arguments like convertQuotes, the bars are always converted completely,
+       returns success, wall and CPU time, written lines and bytes of the conversion as dict,
+       with validation the report of qualityValidator as 'quality', if it failed the exception as 'error'
+    """
+    theStartTime = time.perf_counter()
+    theStartCPUTime = time.process_time()
+    theMetrics = {'ok': False, 'rows': 0, 'bytesIn': 0, 'bytesOut': 0}
+    try:
+        logger.debug(f"aggregate Quant Data Ticks from '{nameOfSourceFile}' and save as '{nameOfDestinationFile}'")
+
+        if not vectorizedConverter.isAvailable():
+            raise ValueError("aggregation of ticks requires numpy")
+        outputWriters.checkOutputNames(theOutputs)
+        tickAggregator.checkPrice(aPrice)
+        qualityValidator.checkValidationMode(aValidationMode)
+        theValidator = qualityValidator.qualityValidator(aValidationMode) if aValidationMode != 'off' else None
+        timeZoneConverter.checkTimeZone(aTimeZone, aSession)
+        theTimeZone = None
+        if timeZoneConverter.isConverting(aTimeZone, aSession):
+            theTimeZone = timeZoneConverter.timeZoneConverter(aTimeZone, aSession)
+        progressReporter.checkProgressMode(aProgressMode)
+        if anIndexTimeframe is not None:
+            timeIndex.checkIndexTimeframe(anIndexTimeframe)
+        compressedFiles.checkCompression(compressedFiles.getCompression(nameOfDestinationFile),
+                                         aCompressionLevel, aCompressionThreads)
+
+        theMetrics['bytesIn'] = os.stat(nameOfSourceFile).st_size
+        # the aggregated file replaces an existing destination file only when complete
+        with _getProgress(nameOfSourceFile, aProgressMode) as theProgress:
+            theMetrics['rows'] = tickAggregator.convertTicks(nameOfSourceFile, nameOfDestinationFile, aTimeframe,
+                                                             aPrice, theOutputs=theOutputs, aProgress=theProgress,
+                                                             aCompressionLevel=aCompressionLevel,
+                                                             aCompressionThreads=aCompressionThreads,
+                                                             theValidator=theValidator, theTimeZone=theTimeZone,
+                                                             anIndexTimeframe=anIndexTimeframe)
+        logger.debug(f"{theMetrics['rows']} bars aggregated from ticks")
+        if theValidator is not None:
+            theMetrics['quality'] = theValidator.getReport()
+            if qualityValidator.hasFindings(theMetrics['quality']):
+                logger.warning(f"quality of '{nameOfSourceFile}': {theMetrics['quality']}")
+        theMetrics['bytesOut'] = _getFileSize(nameOfDestinationFile)
+
+        # when conversion is complete, delete source-file
+        removeFile(nameOfSourceFile)
+
+        theMetrics['ok'] = True
+    except Exception as inst:
+        logger.error(type(inst))     # the exception instance
+        logger.error(inst.args)      # arguments stored in .args
+        logger.error(inst)           # __str__ allows args to be printed directly
+        theMetrics['error'] = f"{type(inst).__name__}: {inst}"
+    theMetrics['seconds'] = time.perf_counter() - theStartTime
+    theMetrics['cpuSeconds'] = time.process_time() - theStartCPUTime
+    return theMetrics
+
+def mergeQuotes(theSourceFileNames:list, nameOfDestinationFile:str, aResolution:str = 'latest',
+                aCompressionLevel:int = None, aCompressionThreads:int = 1, anIndexTimeframe:str = None) -> bool:
+    """merge sorted exports or converted csv-files, e.g. overlapping exports or exports in date range chunks,
+       into nameOfDestinationFile in bounded memory, which may be one of the source files,
+       aResolution = 'latest', 'first' or 'error' for quotes with the same timestamp, see quoteMerger,
+       aCompressionLevel, aCompressionThreads = compression of the destination file, see compressedFiles,
+       anIndexTimeframe = interval of the time index written with a merged converted csv-file, see timeIndex
+    """
+    try:
+        logger.debug(f"merge {len(theSourceFileNames)} files into '{nameOfDestinationFile}'")
+        compressedFiles.checkCompression(compressedFiles.getCompression(nameOfDestinationFile),
+                                         aCompressionLevel, aCompressionThreads)
+        if anIndexTimeframe is not None:
+            timeIndex.checkIndexTimeframe(anIndexTimeframe)
+        theResult = quoteMerger.mergeQuotes(theSourceFileNames, nameOfDestinationFile, aResolution,
+                                            aCompressionLevel, aCompressionThreads, anIndexTimeframe)
+        logger.info(f"{theResult['rows']} lines merged into '{nameOfDestinationFile}', "
+                    f"{theResult['duplicates']} duplicates resolved by '{aResolution}'")
+        return True
+    except Exception as inst:
+        logger.error(type(inst))     # the exception instance
+        logger.error(inst.args)      # arguments stored in .args
+        logger.error(inst)           # __str__ allows args to be printed directly
+    return False
+
+def _getFileSize(nameOfFile:str) -> int:
+    """returns size of a file, 0 if it does not exist"""
+    try:
+        return os.stat(nameOfFile).st_size
+    except FileNotFoundError:
+        return 0
 
 
 def main():
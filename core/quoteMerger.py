@@ -0,0 +1,155 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+merge sorted files of quotes into one sorted file, e.g. overlapping exports or exports in date range chunks
+
+all files have the same layout, the merged file is written in this layout:
+    exports of Quant Data Manager 'YYYY.MM.DD,HH:MM,o,h,l,c,v'
+    converted csv-files 'YYYY-MM-DDTHH:MMZ,o,h,l,c,v' with header
+the files are read line by line in a k-way merge, only one line per file is held in memory,
+so the memory does not depend on the length of the history, compressed files are decompressed
+
+quotes with the same timestamp in several files are resolved by aResolution:
+    latest = the quote of the file given last wins, e.g. the newest export
+    first  = the quote of the file given first wins
+    error  = raise ValueError
+source: https://docs.python.org/3/library/heapq.html#heapq.merge
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, heapq, contextlib
+import core.vectorizedConverter as vectorizedConverter
+import core.compressedFiles as compressedFiles
+import core.timeIndex as timeIndex
+# ----------------------------------------------------------------------------
+
+theResolutions = ('latest', 'first', 'error')
+
+def checkResolution(aResolution : str) -> None:
+    """raises ValueError, if aResolution is not 'latest', 'first' or 'error'"""
+    if aResolution not in theResolutions:
+        raise ValueError(f"unknown duplicate resolution '{aResolution}', use one of {', '.join(theResolutions)}")
+
+def _getLayout(aLine : bytes) -> str:
+    """returns 'export' for a line 'YYYY.MM.DD,HH:MM,...', 'converted' for 'YYYY-MM-DDTHH:MMZ,...'"""
+    if aLine[4:5] == b'.':
+        return 'export'
+    if aLine[4:5] == b'-':
+        return 'converted'
+    raise ValueError(f"unknown layout of line '{aLine.decode('UTF8', 'replace')}'")
+
+def _getKey(aLine : bytes, aLayout : str) -> bytes:
+    """returns date and time of a line, both layouts have fixed widths and sort like their timestamps"""
+    theEnd = aLine.find(b',')
+    if aLayout == 'export':
+        theEnd = aLine.find(b',', theEnd + 1)
+    return aLine[:theEnd]
+
+def _readSortedLines(aFile, nameOfFile : str, anIndex : int, theLayouts : dict):
+    """returns (key, file index, line number, line) of every quote of an opened file in ascending order,
+       theLayouts = layout and key width of the first quote of all files, shared by all files,
+       'header' is set, if a file starts with the header of converted csv-files
+
+       raises ValueError, if the file is not sorted or has another layout than the other files
+    """
+    thePreviousKey = b''
+    for aNumber, aLine in enumerate(aFile):
+        aLine = aLine.rstrip(b'\r\n')
+        if aLine + b'\r\n' == vectorizedConverter.theZiplineHeader:
+            theLayouts['header'] = True
+            continue
+        if not aLine.strip():
+            continue
+        if 'layout' not in theLayouts:
+            theLayouts['layout'] = _getLayout(aLine)
+            theLayouts['width'] = len(_getKey(aLine, theLayouts['layout']))
+        aKey = _getKey(aLine, theLayouts['layout'])
+        if len(aKey) != theLayouts['width'] or _getLayout(aLine) != theLayouts['layout']:
+            raise ValueError(f"'{nameOfFile}' has another layout than the other files")
+        if aKey < thePreviousKey:
+            raise ValueError(f"'{nameOfFile}' is not sorted at '{aKey.decode('UTF8')}'")
+        thePreviousKey = aKey
+        yield aKey, anIndex, aNumber, aLine
+
+def mergeQuotes(theSourceFileNames : list, nameOfDestinationFile : str, aResolution : str = 'latest',
+                aCompressionLevel : int = None, aCompressionThreads : int = 1, anIndexTimeframe : str = None) -> dict:
+    """merge sorted files of quotes into nameOfDestinationFile, which may be one of the source files,
+       aResolution = 'latest', 'first' or 'error' for quotes with the same timestamp in several files,
+       aCompressionLevel, aCompressionThreads = compression of the destination file, see compressedFiles,
+       anIndexTimeframe = interval of the time index written with a merged converted csv-file, see timeIndex,
+       returns the number of merged lines and of dropped duplicates as dict
+
+       raises ValueError, if a file is not sorted or the files have different layouts
+    """
+    checkResolution(aResolution)
+    # the destination replaces the sources only when it is complete
+    theTempFileName = compressedFiles.getTempFileName(nameOfDestinationFile)
+    theLayouts = {}
+    theResult = {'rows': 0, 'duplicates': 0}
+    try:
+        with contextlib.ExitStack() as theStack:
+            theSources = []
+            for anIndex, aSourceFileName in enumerate(theSourceFileNames):
+                theFile, _ = theStack.enter_context(compressedFiles.openRead(aSourceFileName))
+                theSources.append(_readSortedLines(theFile, aSourceFileName, anIndex, theLayouts))
+
+            destinationfile = None
+            thePendingKey, thePendingLine = None, None
+            # lines of the same timestamp arrive in the order of their files and lines
+            for aKey, _, _, aLine in heapq.merge(*theSources):
+                if destinationfile is None:
+                    # the layout is known with the first line
+                    if theLayouts['layout'] == 'converted':
+                        destinationfile = theStack.enter_context(
+                            timeIndex.openWrite(theTempFileName, anIndexTimeframe, aCompressionLevel, aCompressionThreads))
+                        destinationfile.write(vectorizedConverter.theZiplineHeader)
+                    else:
+                        destinationfile = theStack.enter_context(
+                            compressedFiles.openWrite(theTempFileName, aCompressionLevel, aCompressionThreads))
+                if aKey == thePendingKey:
+                    if aResolution == 'error':
+                        raise ValueError(f"several quotes at '{aKey.decode('UTF8')}'")
+                    theResult['duplicates'] += 1
+                    if aResolution == 'latest':
+                        thePendingLine = aLine
+                    continue
+                if thePendingLine is not None:
+                    destinationfile.write(thePendingLine + b'\r\n')
+                    theResult['rows'] += 1
+                thePendingKey, thePendingLine = aKey, aLine
+            if thePendingLine is not None:
+                destinationfile.write(thePendingLine + b'\r\n')
+                theResult['rows'] += 1
+            if destinationfile is None:
+                # no quotes at all, converted csv-files keep their header
+                destinationfile = theStack.enter_context(compressedFiles.openWrite(theTempFileName, aCompressionLevel))
+                if 'header' in theLayouts:
+                    destinationfile.write(vectorizedConverter.theZiplineHeader)
+
+        compressedFiles.replaceFile(theTempFileName, nameOfDestinationFile, (timeIndex.theIndexSuffix,))
+    finally:
+        compressedFiles.removeTempFile(theTempFileName, (timeIndex.theIndexSuffix,))
+    logger.debug(f"{len(theSourceFileNames)} files merged into '{nameOfDestinationFile}': {theResult}")
+    return theResult
+
+def main():
+    logger.info("--- Merge sorted files of quotes ---")
+
+if __name__ == '__main__':
+    main()
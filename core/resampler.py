@@ -0,0 +1,243 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+resample converted quotes to higher timeframes
+
+timeframes:
+    M<n> = n minutes, H<n> = n hours, D<n> = n days, W<n> = n weeks starting at Monday
+every bar starts at a multiple of its timeframe since 1970-01-01 and carries
+the timestamp of its first minute, like the bars of Quant Data Manager
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, re, shutil
+try:
+    import numpy as np
+except ImportError: # numpy is optional, the csv engine works without it
+    np = None
+import core.vectorizedConverter as vectorizedConverter
+import core.compressedFiles as compressedFiles
+# ----------------------------------------------------------------------------
+
+theTimeframeUnits = {'M': 60, 'H': 3600, 'D': 86400, 'W': 7 * 86400}
+# 1970-01-01 was a Thursday, weeks start 4 days later at Monday
+theWeekOffset = 4 * 86400
+theTailSize = 4096
+
+def isTimeframe(aTimeframe : str) -> bool:
+    """check if aTimeframe is like 'M5', 'H1' or 'D1'"""
+    return re.fullmatch(r'[MHDW][1-9][0-9]*', aTimeframe.strip().upper()) is not None
+
+def getTimeframeSeconds(aTimeframe : str) -> tuple:
+    """returns length and offset of the bars of a timeframe in seconds
+
+       raises ValueError, if aTimeframe is unknown
+    """
+    if not isTimeframe(aTimeframe):
+        raise ValueError(f"unknown timeframe '{aTimeframe}'")
+    theTimeframe = aTimeframe.strip().upper()
+    theOffset = theWeekOffset if theTimeframe[0] == 'W' else 0
+    return theTimeframeUnits[theTimeframe[0]] * int(theTimeframe[1:]), theOffset
+
+def getResampledFileName(nameOfConvertedFile : str, aTimeframe : str) -> str:
+    """returns '<symbol>-<timeframe>.csv' next to the converted csv-file '<symbol>-M1.csv',
+       compressed like the converted csv-file, e.g. '<symbol>-<timeframe>.csv.gz'
+    """
+    theCompression = compressedFiles.getCompression(nameOfConvertedFile)
+    theBaseName = os.path.splitext(compressedFiles.getPlainFileName(nameOfConvertedFile))[0]
+    if '-' in os.path.basename(theBaseName):
+        theBaseName = theBaseName.rsplit('-', 1)[0]
+    return compressedFiles.getCompressedFileName(f"{theBaseName}-{aTimeframe.strip().upper()}.csv", theCompression)
+
+def getBarTimestamps(theTimestamps, aTimeframe : str):
+    """returns the timestamp of the bar of aTimeframe containing each timestamp"""
+    theSeconds, theOffset = getTimeframeSeconds(aTimeframe)
+    return (theTimestamps - theOffset) // theSeconds * theSeconds + theOffset
+
+def _getValidRows(thePrices, theStarts, isFirst : bool):
+    """returns the first (isFirst) or last row with a price of every bar starting at theStarts,
+       -1 for a bar without prices, e.g. of bars filled with NaN by calendarAligner
+    """
+    theRows = np.arange(len(thePrices))
+    isValid = ~np.isnan(thePrices) if thePrices.dtype.kind == 'f' else np.ones(len(thePrices), dtype=bool)
+    if isFirst:
+        theValidRows = np.minimum.reduceat(np.where(isValid, theRows, len(thePrices)), theStarts)
+        return np.where(theValidRows == len(thePrices), -1, theValidRows)
+    return np.maximum.reduceat(np.where(isValid, theRows, -1), theStarts)
+
+def resampleBlock(aBlock, aTimeframe : str):
+    """aggregate a quoteBlock with ascending timestamps to bars of aTimeframe,
+       open = first, high = maximum, low = minimum, close = last, volume = sum,
+       NaN prices are skipped, bars of only NaN prices are dropped
+    """
+    theBarTimestamps = getBarTimestamps(aBlock.timestamp, aTimeframe)
+    if len(aBlock) == 0:
+        return aBlock.select(slice(0, 0))
+    theStarts = np.flatnonzero(np.r_[True, theBarTimestamps[1:] != theBarTimestamps[:-1]])
+    theOpenRows = _getValidRows(aBlock.open, theStarts, isFirst=True)
+    theCloseRows = _getValidRows(aBlock.close, theStarts, isFirst=False)
+    theBars = vectorizedConverter.quoteBlock(theBarTimestamps[theStarts],
+                                             aBlock.open[theOpenRows],
+                                             np.fmax.reduceat(aBlock.high, theStarts),
+                                             np.fmin.reduceat(aBlock.low, theStarts),
+                                             aBlock.close[theCloseRows],
+                                             np.add.reduceat(aBlock.volume, theStarts),
+                                             aBlock.decimals, aBlock.timeWidth)
+    isFilled = (theOpenRows < 0) | (theCloseRows < 0)
+    return theBars.select(~isFilled) if np.any(isFilled) else theBars
+
+def _mergeBars(aFirstBar, aSecondBar):
+    """merge two bars of the same timeframe and timestamp, each a quoteBlock with one line"""
+    theVolume = np.add(aFirstBar.volume, aSecondBar.volume)
+    return vectorizedConverter.quoteBlock(aFirstBar.timestamp,
+                                          aFirstBar.open,
+                                          np.fmax(aFirstBar.high, aSecondBar.high),
+                                          np.fmin(aFirstBar.low, aSecondBar.low),
+                                          aSecondBar.close,
+                                          theVolume,
+                                          tuple(max(aPair) for aPair in zip(aFirstBar.decimals, aSecondBar.decimals)),
+                                          aFirstBar.timeWidth)
+
+def _parseConvertedLine(aLine : str):
+    """convert a line of a converted csv-file into a quoteBlock with one line"""
+    theFields = aLine.split(',')
+    if len(theFields) != 6:
+        raise ValueError(f"'{aLine}' is not a converted line")
+    theDecimals = tuple(len(aField) - aField.find('.') - 1 if '.' in aField else 0 for aField in theFields[1:])
+    theVolume = np.array([theFields[5]], dtype=np.float64 if theDecimals[-1] else np.int64)
+    return vectorizedConverter.quoteBlock(np.array([vectorizedConverter.parseZiplineDate(theFields[0])], dtype=np.int64),
+                                          np.array([theFields[1]], dtype=np.float64),
+                                          np.array([theFields[2]], dtype=np.float64),
+                                          np.array([theFields[3]], dtype=np.float64),
+                                          np.array([theFields[4]], dtype=np.float64),
+                                          theVolume, theDecimals,
+                                          len(theFields[0]) - 12) # 'YYYY-MM-DDT' time 'Z'
+
+def _readLastLine(aFile) -> tuple:
+    """returns position and text of the last line of a converted csv-file without line end,
+       (None, None) if the last line is incomplete, aFile is opened by compressedFiles.openRead
+    """
+    theTailStart, theTail = compressedFiles.readTail(aFile, theTailSize)
+    if not theTail.endswith(b'\n'):
+        return None, None
+    theLineStart = theTail.rfind(b'\n', 0, len(theTail) - 1) + 1
+    return theTailStart + theLineStart, theTail[theLineStart:].rstrip(b'\r\n').decode('UTF8')
+
+def getLastTimestamp(nameOfResampledFile : str):
+    """returns timestamp of the last bar of a resampled file, None if the file is empty or does not exist"""
+    try:
+        with compressedFiles.openRead(nameOfResampledFile) as (resampledfile, _):
+            _, theLastLine = _readLastLine(resampledfile)
+        if theLastLine is None or (theLastLine + '\r\n').encode('UTF8') == vectorizedConverter.theZiplineHeader:
+            return None
+        return int(_parseConvertedLine(theLastLine).timestamp[0])
+    except (OSError, EOFError, ValueError):
+        return None
+
+class resampledWriter:
+    """write quoteBlocks resampled to aTimeframe into a csv-file of the Zipline compatible format,
+       isAppend = continue an existing file, its last bar may be completed by the new quotes,
+       aCompressionLevel = compression level of a file named like '<symbol>-<timeframe>.csv.gz',
+       the bars are written to a temp file, which replaces the resampled file at close()
+    """
+    def __init__(self,
+        nameOfResampledFile : str,
+        aTimeframe : str,
+        isAppend : bool = False,
+        aCompressionLevel : int = None
+        ):
+        getTimeframeSeconds(aTimeframe) # check timeframe
+        self._timeframe = aTimeframe
+        self._pendingBar = None
+        self._resampledFileName = nameOfResampledFile
+        self._tempFileName = compressedFiles.getTempFileName(nameOfResampledFile)
+
+        if isAppend and compressedFiles.getCompression(nameOfResampledFile) != 'none':
+            # a compressed stream can not be truncated, the bars in front of the last bar are written again,
+            # resampled files are much smaller than the converted csv-file
+            with compressedFiles.openRead(nameOfResampledFile) as (resampledfile, _):
+                thePosition, theLastLine = _readLastLine(resampledfile)
+                if theLastLine is None:
+                    raise ValueError(f"last line of '{nameOfResampledFile}' is incomplete")
+                resampledfile.seek(0)
+                if (theLastLine + '\r\n').encode('UTF8') != vectorizedConverter.theZiplineHeader:
+                    self._pendingBar = _parseConvertedLine(theLastLine)
+                    theBars = resampledfile.read(thePosition)
+                else:
+                    theBars = resampledfile.read()
+            self._file = compressedFiles.openWrite(self._tempFileName, aCompressionLevel)
+            self._file.write(theBars)
+        elif isAppend:
+            # the copy is appended, the resampled file stays unchanged until close()
+            shutil.copyfile(nameOfResampledFile, self._tempFileName)
+            self._file = open(self._tempFileName, mode='r+b')
+            thePosition, theLastLine = _readLastLine(self._file)
+            if theLastLine is None:
+                self._file.close()
+                compressedFiles.removeTempFile(self._tempFileName)
+                raise ValueError(f"last line of '{nameOfResampledFile}' is incomplete")
+            if (theLastLine + '\r\n').encode('UTF8') != vectorizedConverter.theZiplineHeader:
+                # the last bar is written again, when it is complete
+                self._pendingBar = _parseConvertedLine(theLastLine)
+                self._file.truncate(thePosition)
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self._file = compressedFiles.openWrite(self._tempFileName, aCompressionLevel)
+            self._file.write(vectorizedConverter.theZiplineHeader)
+
+    def write(self, aBlock) -> None:
+        """append the quotes of a quoteBlock, the last bar is kept until the next bar starts"""
+        if len(aBlock) == 0:
+            return
+        theBars = resampleBlock(aBlock, self._timeframe)
+        if len(theBars) == 0:
+            return
+        if self._pendingBar is not None:
+            if self._pendingBar.timestamp[0] == theBars.timestamp[0]:
+                # the first bar continues the last bar of the previous block
+                theFirstBar = _mergeBars(self._pendingBar, theBars.select(slice(0, 1)))
+                if len(theBars) == 1:
+                    self._pendingBar = theFirstBar
+                    return
+                self._file.write(vectorizedConverter.formatQuoteBlock(theFirstBar))
+                theBars = theBars.select(slice(1, None))
+            else:
+                self._file.write(vectorizedConverter.formatQuoteBlock(self._pendingBar))
+        self._file.write(vectorizedConverter.formatQuoteBlock(theBars.select(slice(0, -1))))
+        self._pendingBar = theBars.select(slice(-1, None))
+
+    def close(self, isAborted : bool = False) -> None:
+        """write the last bar and replace the resampled file,
+           isAborted = the conversion failed, the resampled file is left as before
+        """
+        try:
+            if self._pendingBar is not None and not isAborted:
+                self._file.write(vectorizedConverter.formatQuoteBlock(self._pendingBar))
+                self._pendingBar = None
+            self._file.close()
+            if not isAborted:
+                compressedFiles.replaceFile(self._tempFileName, self._resampledFileName)
+        finally:
+            compressedFiles.removeTempFile(self._tempFileName)
+
+def main():
+    logger.info("--- Resample converted quotes to higher timeframes ---")
+
+if __name__ == '__main__':
+    main()
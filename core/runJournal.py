@@ -0,0 +1,159 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+crash-safe journal of the symbols of a run, quantDataConvert.py --resume
+
+the journal has one JSON line per event, every line is appended and flushed to disk at once,
+a crash, a reboot or a full disk lose at most the line being written:
+    {"run": "<time>", "timeframe": "M1"}                    = start of a run
+    {"symbol": "AAPL", "state": "exported", ...}            = export of a symbol is complete
+    {"symbol": "AAPL", "state": "converted", ...}           = converted, with the date range of the export
+    {"symbol": "AAPL", "state": "failed", "reason": ...}    = export or conversion failed
+    {"resumed": "<time>"}                                   = run resumed after an interruption
+    {"finished": "<time>"}                                  = run complete
+the last line of a symbol is its state, a run without 'finished' was interrupted
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, json, pathlib
+from datetime import datetime
+# ----------------------------------------------------------------------------
+
+theStates = ('exported', 'converted', 'failed')
+
+def _isCut(nameOfJournalFile : str) -> bool:
+    """check if the journal ends without line end, e.g. after a crash while writing"""
+    try:
+        with open(nameOfJournalFile, mode='rb') as journalfile:
+            journalfile.seek(0, os.SEEK_END)
+            if journalfile.tell() == 0:
+                return False
+            journalfile.seek(-1, os.SEEK_END)
+            return journalfile.read(1) != b'\n'
+    except FileNotFoundError:
+        return False
+
+class runJournal:
+    """state of every symbol of the last run, read from and appended to nameOfJournalFile"""
+    def __init__(self,
+        nameOfJournalFile : str
+        ):
+        self._journalFileName = nameOfJournalFile
+        self._run = {}
+        self._symbols = {}
+        self._isFinished = False
+        self._file = None
+
+        if pathlib.Path(nameOfJournalFile).is_file():
+            try:
+                self._load()
+                logger.debug(f"run journal loaded from '{nameOfJournalFile}'")
+            except OSError as inst:
+                # a lost journal only costs a complete run
+                logger.warning(f"run journal '{nameOfJournalFile}' not readable ({inst})")
+                self._run, self._symbols = {}, {}
+
+    def _load(self) -> None:
+        """read the events of the journal, a line cut by a crash is skipped"""
+        with open(self._journalFileName, mode='r', encoding='UTF8') as journalfile:
+            for aLine in journalfile:
+                try:
+                    theEvent = json.loads(aLine)
+                except ValueError:
+                    logger.warning(f"incomplete line of run journal '{self._journalFileName}' skipped")
+                    continue
+                if 'run' in theEvent:
+                    self._run, self._symbols, self._isFinished = theEvent, {}, False
+                elif 'symbol' in theEvent:
+                    self._symbols[theEvent['symbol']] = theEvent
+                elif 'finished' in theEvent:
+                    self._isFinished = True
+
+    @property
+    def journalFileName(self) -> str:
+        """Get full path and name of journal file"""
+        return self._journalFileName
+
+    def isInterrupted(self, aTimeframe : str) -> bool:
+        """check if the last run of aTimeframe was started, but not finished"""
+        return bool(self._run) and not self._isFinished and self._run.get('timeframe') == aTimeframe.upper()
+
+    def getSymbolState(self, aSymbol : str) -> dict:
+        """returns the last event of a symbol in the last run, empty if the run did not get to it"""
+        return self._symbols.get(aSymbol, {})
+
+    def getSymbols(self, aState : str) -> list:
+        """returns the symbols of the last run, whose last state is aState"""
+        return [aSymbol for aSymbol, theEvent in self._symbols.items() if theEvent['state'] == aState]
+
+    def _append(self, theEvent : dict) -> None:
+        """write an event and flush it to disk"""
+        if self._file is None:
+            isCut = _isCut(self._journalFileName)
+            self._file = open(self._journalFileName, mode='a', encoding='UTF8')
+            if isCut:
+                # the next event starts a line of its own
+                self._file.write('\n')
+        self._file.write(json.dumps(theEvent) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def start(self, aTimeframe : str) -> None:
+        """start a new run of aTimeframe, the events of the last run are discarded"""
+        self.close()
+        theTempFileName = f"{self._journalFileName}.tmp"
+        self._run = {'run': datetime.now().isoformat(timespec='seconds'), 'timeframe': aTimeframe.upper()}
+        with open(theTempFileName, mode='w', encoding='UTF8') as journalfile:
+            journalfile.write(json.dumps(self._run) + '\n')
+        os.replace(theTempFileName, self._journalFileName)
+        self._symbols = {}
+        self._isFinished = False
+
+    def resume(self) -> None:
+        """continue the interrupted last run"""
+        self._append({'resumed': datetime.now().isoformat(timespec='seconds')})
+
+    def record(self, aSymbol : str, aState : str, theValues : dict = None) -> None:
+        """remember the state 'exported', 'converted' or 'failed' of a symbol,
+           theValues = further values of the event, e.g. the reason of a failure
+        """
+        if aState not in theStates:
+            raise ValueError(f"unknown state '{aState}', use one of {', '.join(theStates)}")
+        theEvent = {'symbol': aSymbol, 'state': aState, **(theValues or {}),
+                    'time': datetime.now().isoformat(timespec='seconds')}
+        self._append(theEvent)
+        self._symbols[aSymbol] = theEvent
+
+    def finish(self) -> None:
+        """mark the run as complete, it can not be resumed anymore"""
+        self._append({'finished': datetime.now().isoformat(timespec='seconds')})
+        self._isFinished = True
+        self.close()
+
+    def close(self) -> None:
+        """close the journal file, the next event opens it again"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def main():
+    logger.info("--- Crash-safe journal of the symbols of a run ---")
+
+if __name__ == '__main__':
+    main()
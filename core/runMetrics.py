@@ -0,0 +1,202 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+runtime metrics per stage and per symbol
+
+every stage records wall time, CPU time (incl. finished child processes),
+time spent in Quant Data Manager, rows, bytes in and out and the values of every symbol,
+the metrics of a run are written as JSON report and as Prometheus textfile
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, re, json, time, threading, contextlib
+from datetime import datetime
+# ----------------------------------------------------------------------------
+
+thePrometheusPrefix = 'quantdataconvert'
+
+def _getCPUTime() -> float:
+    """CPU time of this process and its finished child processes, children are 0 on Windows"""
+    theTimes = os.times()
+    return theTimes.user + theTimes.system + theTimes.children_user + theTimes.children_system
+
+def _writeFile(nameOfFile : str, aText : str) -> None:
+    """replace a file only when it is complete, readers never see a partial file"""
+    theTempFileName = f"{nameOfFile}.tmp"
+    with open(theTempFileName, mode='w', encoding='UTF8') as textfile:
+        textfile.write(aText)
+    os.replace(theTempFileName, nameOfFile)
+
+class stageMetrics:
+    """metrics of one stage, e.g. 'exportQuotes', the counters may be updated by several threads"""
+    def __init__(self,
+        aName : str
+        ):
+        self.name = aName
+        self.isOk = None
+        self.wallSeconds = 0.0
+        self.cpuSeconds = 0.0
+        self.subprocessSeconds = 0.0
+        self.counters = {'rows': 0, 'bytesIn': 0, 'bytesOut': 0}
+        self.symbols = {}
+        self._lock = threading.Lock()
+
+    def addSubprocessTime(self, theSeconds : float) -> None:
+        """add time spent in Quant Data Manager"""
+        with self._lock:
+            self.subprocessSeconds += theSeconds
+
+    def add(self, **theValues) -> None:
+        """add values to the counters of the stage, e.g. add(rows=10)"""
+        with self._lock:
+            for aName, aValue in theValues.items():
+                self.counters[aName] = self.counters.get(aName, 0) + aValue
+
+    def addSymbol(self, aSymbol : str, **theValues) -> None:
+        """add values of a symbol, rows and bytes are added to the counters of the stage too,
+           non-numeric values like ok=False replace the previous value
+        """
+        with self._lock:
+            theSymbol = self.symbols.setdefault(aSymbol, {})
+            for aName, aValue in theValues.items():
+                if isinstance(aValue, (int, float)) and not isinstance(aValue, bool):
+                    theSymbol[aName] = theSymbol.get(aName, 0) + aValue
+                    if aName in ('rows', 'bytesIn', 'bytesOut'):
+                        self.counters[aName] += aValue
+                else:
+                    theSymbol[aName] = aValue
+
+    def asDict(self) -> dict:
+        theResult = {'ok'               : self.isOk,
+                     'wallSeconds'      : round(self.wallSeconds, 3),
+                     'cpuSeconds'       : round(self.cpuSeconds, 3),
+                     'subprocessSeconds': round(self.subprocessSeconds, 3)}
+        theResult.update(self.counters)
+        if self.symbols:
+            theResult['symbols'] = {aSymbol : {aName : round(aValue, 3) if isinstance(aValue, float) else aValue
+                                               for aName, aValue in theValues.items()}
+                                    for aSymbol, theValues in self.symbols.items()}
+        return theResult
+
+class runMetrics:
+    """metrics of all stages of a run"""
+    def __init__(self):
+        self._stages = {}
+        self._activeStage = None
+        self._startDate = datetime.now()
+        self._startTime = time.perf_counter()
+
+    @property
+    def activeStage(self) -> stageMetrics:
+        """Get stage measured at the moment, a stage without name outside of measureStage()"""
+        if self._activeStage is None:
+            return stageMetrics('')
+        return self._activeStage
+
+    @contextlib.contextmanager
+    def measureStage(self, aName : str):
+        """measure wall time and CPU time of a stage, yields its stageMetrics,
+           the stage is not ok, if it raises an exception
+        """
+        theStage = self._stages.setdefault(aName, stageMetrics(aName))
+        thePreviousStage = self._activeStage
+        self._activeStage = theStage
+        theStartTime = time.perf_counter()
+        theStartCPUTime = _getCPUTime()
+        try:
+            yield theStage
+        except BaseException:
+            theStage.isOk = False
+            raise
+        finally:
+            theStage.wallSeconds += time.perf_counter() - theStartTime
+            theStage.cpuSeconds += _getCPUTime() - theStartCPUTime
+            self._activeStage = thePreviousStage
+
+    def getReport(self) -> dict:
+        """returns the metrics of the run as dict"""
+        return {'start'      : self._startDate.isoformat(timespec='seconds'),
+                'wallSeconds': round(time.perf_counter() - self._startTime, 3),
+                'ok'         : all(aStage.isOk is not False for aStage in self._stages.values()),
+                'stages'     : {aName : aStage.asDict() for aName, aStage in self._stages.items()}}
+
+    def writeReport(self, nameOfReportFile : str) -> None:
+        """write the metrics of the run as JSON file"""
+        _writeFile(nameOfReportFile, json.dumps(self.getReport(), indent=1))
+        logger.info(f"run report saved to '{nameOfReportFile}'")
+
+    def getPrometheusText(self) -> str:
+        """returns the metrics of the run in the Prometheus text format
+           source: https://prometheus.io/docs/instrumenting/exposition_formats/
+        """
+        theLines = []
+        def addMetric(aName : str, aHelp : str, theSamples : list) -> None:
+            theLines.append(f"# HELP {thePrometheusPrefix}_{aName} {aHelp}")
+            theLines.append(f"# TYPE {thePrometheusPrefix}_{aName} gauge")
+            for theLabels, aValue in theSamples:
+                theLabelText = ','.join(f'{aLabel}="{_escapeLabel(aLabelValue)}"' for aLabel, aLabelValue in theLabels.items())
+                theLabelText = f"{{{theLabelText}}}" if theLabelText else ''
+                theLines.append(f"{thePrometheusPrefix}_{aName}{theLabelText} {float(aValue)!r}")
+
+        theStages = list(self._stages.values())
+        addMetric('last_run_timestamp_seconds', "Start of the last run",
+                  [({}, self._startDate.timestamp())])
+        addMetric('stage_success', "1 if the stage of the last run succeeded",
+                  [({'stage': aStage.name}, 1 if aStage.isOk else 0) for aStage in theStages])
+        addMetric('stage_wall_seconds', "Wall time of the stage",
+                  [({'stage': aStage.name}, aStage.wallSeconds) for aStage in theStages])
+        addMetric('stage_cpu_seconds', "CPU time of the stage incl. child processes",
+                  [({'stage': aStage.name}, aStage.cpuSeconds) for aStage in theStages])
+        addMetric('stage_subprocess_seconds', "Time spent in Quant Data Manager",
+                  [({'stage': aStage.name}, aStage.subprocessSeconds) for aStage in theStages])
+        for aCounter, aHelp in (('rows', "Rows written by the stage"),
+                                ('bytesIn', "Bytes read by the stage"),
+                                ('bytesOut', "Bytes written by the stage")):
+            addMetric(f"stage_{_getSnakeCase(aCounter)}", aHelp,
+                      [({'stage': aStage.name}, aStage.counters.get(aCounter, 0)) for aStage in theStages])
+
+        # numeric values of every symbol, e.g. exportSeconds
+        theSymbolValues = {}
+        for aStage in theStages:
+            for aSymbol, theValues in aStage.symbols.items():
+                for aName, aValue in theValues.items():
+                    if isinstance(aValue, (int, float)) and not isinstance(aValue, bool):
+                        theSymbolValues.setdefault(aName, []).append(({'stage': aStage.name, 'symbol': aSymbol}, aValue))
+        for aName, theSamples in theSymbolValues.items():
+            addMetric(f"symbol_{_getSnakeCase(aName)}", f"{aName} per symbol", theSamples)
+        return '\n'.join(theLines) + '\n'
+
+    def writePrometheus(self, nameOfTextFile : str) -> None:
+        """write the metrics of the run for the textfile collector of the Prometheus node exporter"""
+        _writeFile(nameOfTextFile, self.getPrometheusText())
+        logger.info(f"Prometheus metrics saved to '{nameOfTextFile}'")
+
+def _escapeLabel(aValue : str) -> str:
+    return str(aValue).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _getSnakeCase(aName : str) -> str:
+    """'bytesIn' -> 'bytes_in', 'convertCPUSeconds' -> 'convert_cpu_seconds'"""
+    theName = re.sub(r'([A-Z]+)([A-Z][a-z])', r'\1_\2', aName)
+    return re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', theName).lower()
+
+def main():
+    logger.info("--- Runtime metrics per stage and per symbol ---")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+profile stages and conversions of a run with cProfile and tracemalloc, quantDataConvert.py --profile
+
+every profiled stage or conversion writes two files into the profile directory of the run:
+    <name>.prof        = cProfile statistics, e.g. python -m pstats log/profile-<date>/exportQuotes.prof
+    <name>-memory.txt  = peak of traced memory and the lines with the largest allocations
+cProfile measures the thread, which runs the stage, exports are running in threads
+of their own and show up as waiting for them, conversions in worker processes are
+profiled by the worker, one of aSampling symbols to keep the overhead low
+source: https://docs.python.org/3/library/profile.html
+source: https://docs.python.org/3/library/tracemalloc.html
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, re, pathlib, contextlib, cProfile, tracemalloc
+from datetime import datetime
+# ----------------------------------------------------------------------------
+
+# number of lines with the largest allocations written to '<name>-memory.txt'
+theTopStatistics = 25
+# frames kept per allocation, more frames cost more memory and time
+theTracebackFrames = 1
+
+def getProfileName(aName : str) -> str:
+    """returns a file name for a stage or symbol like 'convert-EUR/USD', other characters replaced by '_'"""
+    return re.sub(r'[^\w.-]', '_', aName)
+
+@contextlib.contextmanager
+def profile(aDirectory : str, aName : str, aTopStatistics : int = theTopStatistics):
+    """profile the code of the with-block with cProfile and tracemalloc,
+       writes '<name>.prof' and '<name>-memory.txt' into aDirectory, even if the code raises an exception
+    """
+    isTracing = tracemalloc.is_tracing()
+    if not isTracing:
+        tracemalloc.start(theTracebackFrames)
+    else:
+        # a profiled stage of the same process is running, its peak is reset
+        tracemalloc.reset_peak()
+    theProfile = cProfile.Profile()
+    theProfile.enable()
+    try:
+        yield
+    finally:
+        theProfile.disable()
+        theSnapshot = tracemalloc.take_snapshot()
+        _, thePeak = tracemalloc.get_traced_memory()
+        if not isTracing:
+            tracemalloc.stop()
+        try:
+            theFileName = os.path.join(aDirectory, getProfileName(aName))
+            pathlib.Path(aDirectory).mkdir(parents=True, exist_ok=True)
+            theProfile.dump_stats(f"{theFileName}.prof")
+            _writeMemoryStatistics(f"{theFileName}-memory.txt", aName, theSnapshot, thePeak, aTopStatistics)
+            logger.debug(f"profile of '{aName}' saved to '{theFileName}.prof'")
+        except OSError as inst:
+            # a missing profile must not fail the run
+            logger.warning(f"profile of '{aName}' not saved ({inst})")
+
+def _writeMemoryStatistics(nameOfFile : str, aName : str, aSnapshot : tracemalloc.Snapshot,
+                           aPeak : int, aTopStatistics : int) -> None:
+    """write peak and the lines with the largest allocations still held at the end of the profile"""
+    theSnapshot = aSnapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),
+                                           tracemalloc.Filter(False, "<frozen importlib._bootstrap>")))
+    theStatistics = theSnapshot.statistics('lineno')
+    with open(nameOfFile, mode='w', encoding='UTF8') as textfile:
+        textfile.write(f"{aName}: peak of traced memory {aPeak / 2**20:.1f} MiB\n")
+        textfile.write(f"top {aTopStatistics} lines of {len(theStatistics)} by memory held at the end:\n")
+        for aStatistic in theStatistics[:aTopStatistics]:
+            textfile.write(f"{aStatistic}\n")
+
+def profileCall(aDirectory : str, aName : str, aFunction, *theArguments):
+    """call aFunction(*theArguments) within profile(), returns its result,
+       e.g. submitted to a process pool instead of aFunction
+    """
+    with profile(aDirectory, aName):
+        return aFunction(*theArguments)
+
+class runProfiler:
+    """profiles of the stages and of every aSampling-th conversion of a run,
+       written to a directory 'profile-<date>-<time>' in aDirectory, e.g. the log directory
+    """
+    def __init__(self,
+        aDirectory : str,
+        aSampling : int = 1
+        ):
+        if aSampling < 1:
+            raise ValueError(f"sampling has to be a number > 0, not {aSampling}")
+        self.directory = os.path.join(aDirectory, f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        self.sampling = aSampling
+        self._numberOfConversions = 0
+
+    def profileStage(self, aName : str):
+        """context manager profiling a stage like 'exportQuotes' in this process"""
+        return profile(self.directory, aName)
+
+    def isSampled(self) -> bool:
+        """count a conversion, returns True for the first and then every aSampling-th conversion"""
+        isSampled = self._numberOfConversions % self.sampling == 0
+        self._numberOfConversions += 1
+        return isSampled
+
+def main():
+    logger.info("--- Profile stages and conversions of a run ---")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+SQLite database of converted quotes and symbols, next to the converted csv-files
+
+tables:
+    symbols = symbol, date range and all columns of the symbol list as JSON
+    series  = id of every symbol and timeframe
+    bars    = series, timestamp (seconds since epoch), open, high, low, close, volume,
+              clustered by series and timestamp, a time range of a symbol is one index range
+
+the bars of a conversion are loaded into a temporary table without index, which does not lock
+the database, and merged into the table bars in one transaction per symbol, sorted by the key,
+so conversions running in parallel processes wait only for the merge of each other,
+rows with the same timestamp are updated, loading the same quotes again does not change the database
+source: https://www.sqlite.org/lang_upsert.html, https://www.sqlite.org/wal.html
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, json, sqlite3
+import core.compressedFiles as compressedFiles
+# ----------------------------------------------------------------------------
+
+theDatabaseFileName = 'quotes.sqlite'
+
+# number of rows passed at once to executemany
+theBatchSize = 65536
+
+# milliseconds a conversion waits for the merge of another conversion
+theBusyTimeout = 600000
+
+theSchema = """
+CREATE TABLE IF NOT EXISTS symbols (
+    symbol    TEXT PRIMARY KEY,
+    date_from TEXT,
+    date_to   TEXT,
+    details   TEXT
+);
+CREATE TABLE IF NOT EXISTS series (
+    id        INTEGER PRIMARY KEY,
+    symbol    TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    UNIQUE (symbol, timeframe)
+);
+CREATE TABLE IF NOT EXISTS bars (
+    series    INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    open      REAL,
+    high      REAL,
+    low       REAL,
+    close     REAL,
+    volume    NUMERIC,
+    PRIMARY KEY (series, timestamp)
+) WITHOUT ROWID;
+"""
+
+def getDatabaseName(nameOfConvertedFile : str) -> str:
+    """returns the name of the database in the directory of a converted csv-file"""
+    return os.path.join(os.path.dirname(nameOfConvertedFile), theDatabaseFileName)
+
+def getSeriesName(nameOfConvertedFile : str) -> tuple:
+    """returns symbol and timeframe of a converted csv-file, 'AAPL-M1.csv.gz' -> ('AAPL', 'M1')"""
+    theName = os.path.splitext(os.path.basename(compressedFiles.getPlainFileName(nameOfConvertedFile)))[0]
+    theSymbol, _, theTimeframe = theName.rpartition('-')
+    if not theSymbol:
+        raise ValueError(f"'{nameOfConvertedFile}' is not named like '<symbol>-<timeframe>.csv'")
+    return theSymbol, theTimeframe.upper()
+
+def connect(nameOfDatabase : str) -> sqlite3.Connection:
+    """open the database in WAL mode, readers do not block the merge of a conversion,
+       transactions are started explicitly
+    """
+    theConnection = sqlite3.connect(nameOfDatabase, timeout=theBusyTimeout / 1000, isolation_level=None)
+    try:
+        theConnection.execute(f"PRAGMA busy_timeout = {theBusyTimeout}")
+        theConnection.execute("PRAGMA journal_mode = WAL")
+        theConnection.execute("PRAGMA synchronous = NORMAL")
+        theConnection.executescript(theSchema)
+    except Exception:
+        theConnection.close()
+        raise
+    return theConnection
+
+def _getSeriesId(aConnection : sqlite3.Connection, aSymbol : str, aTimeframe : str, isCreated : bool = False):
+    """returns the id of a symbol and timeframe, None if it is not in the database and not isCreated"""
+    if isCreated:
+        aConnection.execute("INSERT INTO series (symbol, timeframe) VALUES (?, ?) ON CONFLICT DO NOTHING",
+                            (aSymbol, aTimeframe))
+    theRow = aConnection.execute("SELECT id FROM series WHERE symbol = ? AND timeframe = ?",
+                                 (aSymbol, aTimeframe)).fetchone()
+    return None if theRow is None else theRow[0]
+
+class sqliteStoreWriter:
+    """write quoteBlocks of a symbol into the database,
+       isAppend = keep the bars in the database, otherwise they are replaced by the written bars
+    """
+    def __init__(self,
+        nameOfDatabase : str,
+        aSymbol : str,
+        aTimeframe : str,
+        isAppend : bool = False
+        ):
+        self._databaseName = nameOfDatabase
+        self._symbol = aSymbol
+        self._timeframe = aTimeframe
+        self._isAppend = isAppend
+        self._numberOfBars = 0
+        self._connection = connect(nameOfDatabase)
+        self._connection.execute("CREATE TEMP TABLE staging (timestamp INTEGER, open REAL, high REAL, low REAL,"
+                                 " close REAL, volume NUMERIC)")
+
+    def write(self, aBlock) -> None:
+        """load the bars of a quoteBlock into the temporary table"""
+        theColumns = [aBlock.timestamp.tolist(), aBlock.open.tolist(), aBlock.high.tolist(),
+                      aBlock.low.tolist(), aBlock.close.tolist(), aBlock.volume.tolist()]
+        # the temporary table is private, its transaction does not lock the database
+        self._connection.execute("BEGIN")
+        try:
+            for aStart in range(0, len(aBlock), theBatchSize):
+                self._connection.executemany("INSERT INTO temp.staging VALUES (?, ?, ?, ?, ?, ?)",
+                                             zip(*(aColumn[aStart:aStart+theBatchSize] for aColumn in theColumns)))
+            self._connection.execute("COMMIT")
+        except Exception:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._numberOfBars += len(aBlock)
+
+    def close(self, isAborted : bool = False) -> None:
+        """merge the loaded bars into the table bars in one transaction,
+           isAborted = the conversion failed, the loaded bars are dropped and the bars in the database are kept
+        """
+        if self._connection is None:
+            return
+        try:
+            if isAborted:
+                if self._connection.in_transaction:
+                    self._connection.execute("ROLLBACK")
+                self._connection.execute("DROP TABLE IF EXISTS temp.staging")
+                logger.debug(f"{self._numberOfBars} bars of '{self._symbol}' dropped, '{self._databaseName}' unchanged")
+                return
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                theSeriesId = _getSeriesId(self._connection, self._symbol, self._timeframe, isCreated=True)
+                if not self._isAppend:
+                    self._connection.execute("DELETE FROM bars WHERE series = ?", (theSeriesId,))
+                # 'WHERE true' separates the upsert clause from the SELECT
+                self._connection.execute("INSERT INTO bars SELECT ?, timestamp, open, high, low, close, volume"
+                                         " FROM temp.staging WHERE true ORDER BY timestamp"
+                                         " ON CONFLICT (series, timestamp) DO UPDATE SET"
+                                         " open = excluded.open, high = excluded.high, low = excluded.low,"
+                                         " close = excluded.close, volume = excluded.volume",
+                                         (theSeriesId,))
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+            logger.debug(f"{self._numberOfBars} bars of '{self._symbol}' loaded into '{self._databaseName}'")
+        finally:
+            self._connection.close()
+            self._connection = None
+
+def writeSymbols(nameOfDatabase : str, theSymbolsDetails : dict) -> None:
+    """insert or update the symbols of a symbol list, theSymbolsDetails = symbol -> row of the symbol list"""
+    theConnection = connect(nameOfDatabase)
+    try:
+        theRows = [(aSymbol, aRow.get('Date from'), aRow.get('Date to'), json.dumps(aRow))
+                   for aSymbol, aRow in theSymbolsDetails.items()]
+        theConnection.execute("BEGIN IMMEDIATE")
+        try:
+            theConnection.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?)"
+                                      " ON CONFLICT (symbol) DO UPDATE SET"
+                                      " date_from = excluded.date_from, date_to = excluded.date_to,"
+                                      " details = excluded.details", theRows)
+            theConnection.execute("COMMIT")
+        except Exception:
+            theConnection.execute("ROLLBACK")
+            raise
+    finally:
+        theConnection.close()
+    logger.info(f"{len(theSymbolsDetails)} symbols saved to '{nameOfDatabase}'")
+
+def readSymbols(nameOfDatabase : str) -> dict:
+    """returns the rows of the symbol list as dict, key = symbol"""
+    theConnection = connect(nameOfDatabase)
+    try:
+        return {aSymbol : json.loads(theDetails)
+                for aSymbol, theDetails in theConnection.execute("SELECT symbol, details FROM symbols ORDER BY symbol")}
+    finally:
+        theConnection.close()
+
+def readBars(nameOfDatabase : str, aSymbol : str, aTimeframe : str = 'M1', aStart : int = None, anEnd : int = None) -> list:
+    """returns the bars of a symbol from aStart to before anEnd, seconds since epoch, None = no limit,
+       as list of tuples (timestamp, open, high, low, close, volume)
+    """
+    theConnection = connect(nameOfDatabase)
+    try:
+        theSeriesId = _getSeriesId(theConnection, aSymbol, aTimeframe.upper())
+        if theSeriesId is None:
+            return []
+        return theConnection.execute("SELECT timestamp, open, high, low, close, volume FROM bars"
+                                     " WHERE series = ? AND timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+                                     (theSeriesId, -2**63 if aStart is None else aStart,
+                                      2**63-1 if anEnd is None else anEnd)).fetchall()
+    finally:
+        theConnection.close()
+
+def getLastTimestamp(nameOfDatabase : str, aSymbol : str, aTimeframe : str):
+    """returns timestamp of the last bar of a symbol, None if there is no bar or no database"""
+    if not os.path.isfile(nameOfDatabase):
+        return None
+    try:
+        theConnection = connect(nameOfDatabase)
+        try:
+            theSeriesId = _getSeriesId(theConnection, aSymbol, aTimeframe)
+            if theSeriesId is None:
+                return None
+            return theConnection.execute("SELECT MAX(timestamp) FROM bars WHERE series = ?", (theSeriesId,)).fetchone()[0]
+        finally:
+            theConnection.close()
+    except sqlite3.Error:
+        return None
+
+def main():
+    logger.info("--- SQLite database of converted quotes and symbols ---")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+aggregate tick exports of Quant Data Manager to bars of any timeframe (requires numpy)
+
+layout of a tick export '<symbol>-TICK-No Session.csv':
+    YYYY.MM.DD,HH:MM:SS.fff,bid,ask,volume   (time 'HH:MM:SS' or 'HH:MM' accepted as well)
+the export is read block by block like the exports of bars, only the last, still growing
+bar is kept between two blocks, so the memory does not depend on the size of the export
+
+price of the bars:
+    bid, ask or mid = (bid + ask) / 2 with one more decimal
+every bar carries the timestamp of its first minute like the bars of Quant Data Manager,
+bars without ticks are not written
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os
+try:
+    import numpy as np
+except ImportError: # numpy is optional, the csv engine works without it
+    np = None
+import core.vectorizedConverter as vectorizedConverter
+import core.outputWriters as outputWriters
+import core.resampler as resampler
+import core.compressedFiles as compressedFiles
+import core.timeIndex as timeIndex
+# ----------------------------------------------------------------------------
+
+theNumberOfTickColumns = 5
+thePrices = ('bid', 'ask', 'mid')
+# bars of timeframes M<n>, H<n>, D<n> and W<n> start at full minutes
+theBarTimeWidth = 5
+
+def checkPrice(aPrice : str) -> None:
+    """raises ValueError, if aPrice is not 'bid', 'ask' or 'mid'"""
+    if aPrice not in thePrices:
+        raise ValueError(f"unknown price '{aPrice}', use one of {', '.join(thePrices)}")
+
+def _parseNumberField(aBlock : bytes, aRawBlock, theStarts, theEnds) -> tuple:
+    """parse a column of numbers, returns values as float64 and the number of decimals,
+       numbers without a fixed number of decimals are parsed one by one
+    """
+    try:
+        return vectorizedConverter._parseDecimalField(aRawBlock, theStarts, theEnds)
+    except ValueError:
+        pass
+    thePadding = vectorizedConverter.thePadding
+    theTexts = [aBlock[aStart-thePadding:anEnd-thePadding] for aStart, anEnd in zip(theStarts, theEnds)]
+    theDecimals = max((len(aText) - aText.find(b'.') - 1 if b'.' in aText else 0 for aText in theTexts), default=0)
+    return np.array(theTexts).astype(np.float64), theDecimals
+
+def parseTickBlock(aBlock : bytes, aPrice : str = 'bid'):
+    """parse complete lines of a tick export into a quoteBlock with one line per tick,
+       open, high, low and close are the price of the tick
+
+       raises ValueError, if the lines do not match the layout 'YYYY.MM.DD,HH:MM:SS.fff,bid,ask,volume'
+    """
+    aRawBlock = np.zeros(vectorizedConverter.thePadding + len(aBlock), dtype=np.uint8)
+    aRawBlock[vectorizedConverter.thePadding:] = np.frombuffer(aBlock, dtype=np.uint8)
+    theStarts, theEnds = vectorizedConverter._getFieldBounds(aRawBlock[vectorizedConverter.thePadding:],
+                                                             theNumberOfTickColumns)
+    theStarts += vectorizedConverter.thePadding
+    theEnds += vectorizedConverter.thePadding
+    theTimestamp, _ = vectorizedConverter.parseDateAndTime(aRawBlock, theStarts, theEnds, (5, 8, 12))
+
+    theBid, theBidDecimals = _parseNumberField(aBlock, aRawBlock, theStarts[:, 2], theEnds[:, 2])
+    theAsk, theAskDecimals = _parseNumberField(aBlock, aRawBlock, theStarts[:, 3], theEnds[:, 3])
+    theVolume, theVolumeDecimals = _parseNumberField(aBlock, aRawBlock, theStarts[:, 4], theEnds[:, 4])
+    if theVolumeDecimals == 0:
+        theVolume = theVolume.astype(np.int64)
+
+    if aPrice == 'bid':
+        thePrice, thePriceDecimals = theBid, theBidDecimals
+    elif aPrice == 'ask':
+        thePrice, thePriceDecimals = theAsk, theAskDecimals
+    else:
+        # the mean of two prices needs one more decimal
+        thePrice, thePriceDecimals = (theBid + theAsk) / 2, max(theBidDecimals, theAskDecimals) + 1
+    return vectorizedConverter.quoteBlock(theTimestamp, thePrice, thePrice, thePrice, thePrice, theVolume,
+                                          (thePriceDecimals,) * 4 + (theVolumeDecimals,), theBarTimeWidth)
+
+def readTickBlocks(nameOfSourceFile : str, aPrice : str = 'bid',
+                   aBlockSize : int = vectorizedConverter.theDefaultBlockSize, aProgress = None):
+    """read ticks from a tick export of Quant Data Manager, returns quoteBlocks with one line per tick,
+       aProgress = progressReporter updated with the bytes read
+    """
+    for aBlock in vectorizedConverter._readLineBlocks(nameOfSourceFile, aBlockSize, aProgress):
+        yield parseTickBlock(aBlock, aPrice)
+
+class tickAggregator:
+    """aggregate quoteBlocks of ticks in ascending order to bars of aTimeframe,
+       the last bar is kept until a tick of a later bar arrives
+    """
+    def __init__(self, aTimeframe : str = 'M1'):
+        resampler.getTimeframeSeconds(aTimeframe) # check timeframe
+        self._timeframe = aTimeframe
+        self._pendingBar = None
+
+    def add(self, aBlock):
+        """add ticks, returns a quoteBlock with the bars completed by them
+
+           raises ValueError, if a tick is older than the bar in progress
+        """
+        theBars = resampler.resampleBlock(aBlock, self._timeframe)
+        if len(theBars) == 0:
+            return theBars
+        if np.any(theBars.timestamp[1:] <= theBars.timestamp[:-1]):
+            raise ValueError("ticks are not in ascending order")
+        theCompleteBars = []
+        if self._pendingBar is not None:
+            if theBars.timestamp[0] < self._pendingBar.timestamp[0]:
+                raise ValueError("ticks are not in ascending order")
+            if theBars.timestamp[0] == self._pendingBar.timestamp[0]:
+                # the first bar continues the last bar of the previous block
+                theFirstBar = resampler._mergeBars(self._pendingBar, theBars.select(slice(0, 1)))
+                if len(theBars) == 1:
+                    self._pendingBar = theFirstBar
+                    return theBars.select(slice(0, 0))
+                theCompleteBars.append(theFirstBar)
+                theBars = theBars.select(slice(1, None))
+            else:
+                theCompleteBars.append(self._pendingBar)
+        theCompleteBars.append(theBars.select(slice(0, -1)))
+        self._pendingBar = theBars.select(slice(-1, None))
+        return _concatenateBars(theCompleteBars)
+
+    def finish(self):
+        """returns the last bar as quoteBlock, None without ticks"""
+        theLastBar, self._pendingBar = self._pendingBar, None
+        return theLastBar
+
+def _concatenateBars(theBlocks : list):
+    """join quoteBlocks of bars, the decimals are the most of all blocks"""
+    if len(theBlocks) == 1:
+        return theBlocks[0]
+    return vectorizedConverter.quoteBlock(*(np.concatenate([getattr(aBlock, aName) for aBlock in theBlocks])
+                                            for aName in ('timestamp',) + vectorizedConverter.theValueColumns),
+                                          tuple(max(theDecimals) for theDecimals in zip(*(aBlock.decimals for aBlock in theBlocks))),
+                                          theBlocks[0].timeWidth)
+
+def _writeBars(aFile, theWriters : list, theBars, theValidator = None) -> int:
+    """write bars to the converted csv-file and the additional outputs, returns the number of written bars"""
+    if theValidator is not None:
+        theBars = theValidator.validateBlock(theBars)
+    if len(theBars) == 0:
+        return 0
+    aFile.write(vectorizedConverter.formatQuoteBlock(theBars))
+    outputWriters.writeBlock(theWriters, theBars)
+    return len(theBars)
+
+def convertTicks(nameOfSourceFile : str, nameOfDestinationFile : str, aTimeframe : str = 'M1',
+                 aPrice : str = 'bid', aBlockSize : int = vectorizedConverter.theDefaultBlockSize,
+                 theOutputs : tuple = (), aProgress = None, aCompressionLevel : int = None,
+                 aCompressionThreads : int = 1, theValidator = None, theTimeZone = None,
+                 anIndexTimeframe : str = None) -> int:
+    """aggregate a tick export of Quant Data Manager to bars of aTimeframe in Zipline compatible format,
+       aPrice = 'bid', 'ask' or 'mid' price of the bars,
+       theOutputs = additional outputs written in the same pass, see outputWriters,
+       aProgress = progressReporter updated with the bytes read,
+       aCompressionLevel, aCompressionThreads = compression of the destination file, see compressedFiles,
+       theValidator = qualityValidator checking the bars before they are written,
+       theTimeZone = timeZoneConverter converting the ticks to UTC before they are aggregated,
+       anIndexTimeframe = interval of the time index written with the destination file, see timeIndex,
+       the destination file is replaced only when complete,
+       returns the number of written bars
+
+       raises ValueError, if the file does not match the layout 'YYYY.MM.DD,HH:MM:SS.fff,bid,ask,volume'
+    """
+    checkPrice(aPrice)
+    theAggregator = tickAggregator(aTimeframe)
+    theNumberOfLines = 0
+    theWriters = outputWriters.openWriters(nameOfDestinationFile, theOutputs, aCompressionLevel=aCompressionLevel)
+    isAborted = True
+    try:
+        with compressedFiles.replaceWhenComplete(nameOfDestinationFile, (timeIndex.theIndexSuffix,)) as nameOfTempFile, \
+             timeIndex.openWrite(nameOfTempFile, anIndexTimeframe, aCompressionLevel,
+                                 aCompressionThreads) as destinationfile:
+            destinationfile.write(vectorizedConverter.theZiplineHeader)
+            for aBlock in readTickBlocks(nameOfSourceFile, aPrice, aBlockSize, aProgress):
+                if theTimeZone is not None:
+                    aBlock = theTimeZone.convertBlock(aBlock)
+                theNumberOfLines += _writeBars(destinationfile, theWriters, theAggregator.add(aBlock), theValidator)
+            theLastBar = theAggregator.finish()
+            if theLastBar is not None:
+                theNumberOfLines += _writeBars(destinationfile, theWriters, theLastBar, theValidator)
+        isAborted = False
+    finally:
+        outputWriters.closeWriters(theWriters, isAborted)
+    return theNumberOfLines
+
+def main():
+    logger.info("--- Aggregate tick exports of Quant Data Manager to bars ---")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+sparse time index of converted csv-files and reading a time range without parsing the whole file
+
+the index '<symbol>-M1.csv.idx' next to a converted csv-file holds the byte offset of the first line
+of every interval, e.g. of every day with the timeframe 'D1', it is built while the file is written:
+the written bytes are not parsed line by line, only the first lines of a new interval are searched
+by bisection, a converted csv-file has ascending timestamps
+
+reading a time range searches the index by bisection and reads from the offset of its interval,
+O(log n + k) instead of O(n), compressed files can not seek and are read from the beginning
+
+the index is JSON and remembers size and modification time of the converted csv-file,
+an outdated index is ignored and built again by reading the file once
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, io, json, bisect
+from datetime import datetime, timezone
+import core.compressedFiles as compressedFiles
+import core.resampler as resampler
+import core.vectorizedConverter as vectorizedConverter
+# ----------------------------------------------------------------------------
+
+theIndexVersion = 1
+# the index is named like the plain converted csv-file with this suffix
+theIndexSuffix = '.idx'
+theDefaultTimeframe = 'D1'
+
+# size of the blocks read while building an index or reading a time range, in bytes
+theReadSize = 4 * 1024 * 1024
+
+def getIndexName(nameOfConvertedFile : str) -> str:
+    """returns the name of the index next to a converted csv-file, 'AAPL-M1.csv' -> 'AAPL-M1.csv.idx'"""
+    return f"{compressedFiles.getPlainFileName(nameOfConvertedFile)}{theIndexSuffix}"
+
+def checkIndexTimeframe(aTimeframe : str) -> None:
+    """raises ValueError, if aTimeframe is no timeframe of resampler like 'H1' or 'D1'"""
+    resampler.getTimeframeSeconds(aTimeframe)
+
+def removeIndex(nameOfConvertedFile : str) -> None:
+    """delete the index of a converted csv-file"""
+    try:
+        os.remove(getIndexName(nameOfConvertedFile))
+    except FileNotFoundError:
+        pass
+
+def _parseTimestamp(aDate : bytes) -> int:
+    """convert a date like b'2019-01-02T09:30Z' to seconds since epoch"""
+    return int(datetime.fromisoformat(aDate.rstrip(b'Z').decode('ascii')).replace(tzinfo=timezone.utc).timestamp())
+
+def _getDateKey(aTimestamp : int) -> bytes:
+    """returns a timestamp as b'YYYY-MM-DDTHH:MM:SS', which compares like the timestamp"""
+    return datetime.fromtimestamp(aTimestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S').encode('ascii')
+
+def _getLineKey(aLine : bytes) -> bytes:
+    """returns the date of a converted line as b'YYYY-MM-DDTHH:MM:SS', 'HH:MM' gets ':00'"""
+    theDate = aLine[:aLine.find(b',')].rstrip(b'Z')
+    return theDate + b':00' if len(theDate) == 16 else theDate
+
+class indexBuilder:
+    """find the first line of every interval of aTimeframe in the bytes of a converted csv-file,
+       fed in pieces of any size, theEntries = index of a file continued at anOffset
+    """
+    def __init__(self,
+        aTimeframe : str = theDefaultTimeframe,
+        theEntries : list = None,
+        anOffset : int = 0
+        ):
+        checkIndexTimeframe(aTimeframe)
+        self._timeframe = aTimeframe.upper()
+        self._entries = list(theEntries or [])
+        self._lastKey = self._entries[-1][0] if self._entries else None
+        self._offset = anOffset
+        self._rest = b''
+        # a new file starts with the header
+        self._isHeaderPending = anOffset == 0
+
+    @property
+    def timeframe(self) -> str:
+        return self._timeframe
+
+    @property
+    def entries(self) -> list:
+        """pairs of [timestamp of the interval, byte offset of its first line]"""
+        return self._entries
+
+    def _getKey(self, aBuffer : bytes, aLineStart : int) -> int:
+        """timestamp of the interval of the line starting at aLineStart"""
+        theEnd = aBuffer.find(b',', aLineStart, aLineStart + 32)
+        if theEnd < 0:
+            raise ValueError(f"{aBuffer[aLineStart:aLineStart+32]} is not a converted line")
+        return int(resampler.getBarTimestamps(_parseTimestamp(aBuffer[aLineStart:theEnd]), self._timeframe))
+
+    def feed(self, aData) -> None:
+        """take the next bytes of the file"""
+        theLastLineEnd = aData.rfind(b'\n')
+        if theLastLineEnd < 0:
+            self._rest += aData
+            return
+        theStart = 0
+        if self._rest:
+            # complete the line started by the previous piece
+            theFirstLineEnd = aData.find(b'\n') + 1
+            theLine = self._rest + aData[:theFirstLineEnd]
+            self._scanLines(theLine, 0, len(theLine), self._offset)
+            self._offset += len(theLine)
+            self._rest = b''
+            theStart = theFirstLineEnd
+        self._scanLines(aData, theStart, theLastLineEnd + 1, self._offset - theStart)
+        self._offset += theLastLineEnd + 1 - theStart
+        self._rest = bytes(aData[theLastLineEnd+1:])
+
+    def _scanLines(self, aBuffer : bytes, aStart : int, anEnd : int, aBase : int) -> None:
+        """add the first lines of new intervals of the complete lines aBuffer[aStart:anEnd],
+           aBase = offset of aBuffer in the file
+        """
+        if self._isHeaderPending and aStart < anEnd:
+            aStart = aBuffer.find(b'\n', aStart, anEnd) + 1
+            self._isHeaderPending = False
+        if aStart >= anEnd:
+            return
+        theLastLineStart = max(aBuffer.rfind(b'\n', aStart, anEnd - 1) + 1, aStart)
+
+        while self._getKey(aBuffer, theLastLineStart) != self._lastKey:
+            # bisect between a line of the current interval and a line of a later one
+            theLow, theHigh = aStart, theLastLineStart
+            if self._getKey(aBuffer, theLow) != self._lastKey:
+                theHigh = theLow
+            while theLow < theHigh:
+                theMiddle = aBuffer.find(b'\n', (theLow + theHigh) // 2, theHigh) + 1
+                if theMiddle >= theHigh:
+                    theMiddle = aBuffer.find(b'\n', theLow, theHigh) + 1
+                if theMiddle >= theHigh:
+                    break # adjacent lines
+                if self._getKey(aBuffer, theMiddle) == self._lastKey:
+                    theLow = theMiddle
+                else:
+                    theHigh = theMiddle
+            self._lastKey = self._getKey(aBuffer, theHigh)
+            self._entries.append([self._lastKey, aBase + theHigh])
+            aStart = theHigh
+
+class indexedWriter(io.BufferedIOBase):
+    """write a converted csv-file and its index, opened by openWrite"""
+    def __init__(self,
+        aFile,
+        nameOfConvertedFile : str,
+        aBuilder : indexBuilder
+        ):
+        super().__init__()
+        self._file = aFile
+        self._convertedFileName = nameOfConvertedFile
+        self._builder = aBuilder
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, aData) -> int:
+        aData = bytes(aData) if isinstance(aData, memoryview) else aData
+        self._file.write(aData)
+        self._builder.feed(aData)
+        return len(aData)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self._file.close()
+            _writeIndex(self._convertedFileName, self._builder)
+        finally:
+            super().close()
+
+def _writeIndex(nameOfConvertedFile : str, aBuilder : indexBuilder) -> None:
+    """write the index of a converted csv-file, replaces the old index only when complete"""
+    theStat = os.stat(nameOfConvertedFile)
+    theIndex = {'version'  : theIndexVersion,
+                'timeframe': aBuilder.timeframe,
+                'size'     : theStat.st_size,
+                'modified' : theStat.st_mtime_ns,
+                'entries'  : aBuilder.entries}
+    nameOfIndex = getIndexName(nameOfConvertedFile)
+    theTempFileName = f"{nameOfIndex}.tmp"
+    with open(theTempFileName, mode='w', encoding='UTF8') as indexfile:
+        json.dump(theIndex, indexfile, separators=(',', ':'))
+    os.replace(theTempFileName, nameOfIndex)
+
+def _loadIndex(nameOfConvertedFile : str) -> dict:
+    """returns the index file of a converted csv-file as written, None if it is missing or not readable"""
+    try:
+        with open(getIndexName(nameOfConvertedFile), mode='r', encoding='UTF8') as indexfile:
+            return json.load(indexfile)
+    except (OSError, ValueError):
+        return None
+
+def readIndex(nameOfConvertedFile : str, aTimeframe : str = None) -> dict:
+    """returns the index of a converted csv-file, None if there is none,
+       it is outdated or, with aTimeframe, of another timeframe
+    """
+    theIndex = _loadIndex(nameOfConvertedFile)
+    try:
+        theStat = os.stat(nameOfConvertedFile)
+    except OSError:
+        return None
+    if theIndex is None or theIndex.get('version') != theIndexVersion or theIndex.get('size') != theStat.st_size \
+       or theIndex.get('modified') != theStat.st_mtime_ns:
+        return None
+    if aTimeframe is not None and theIndex.get('timeframe') != aTimeframe.upper():
+        return None
+    return theIndex
+
+def buildIndex(nameOfConvertedFile : str, aTimeframe : str = theDefaultTimeframe) -> dict:
+    """build the index of an uncompressed converted csv-file by reading it once, returns the index"""
+    theBuilder = indexBuilder(aTimeframe)
+    with open(nameOfConvertedFile, mode='rb') as convertedfile:
+        while True:
+            theBuffer = convertedfile.read(theReadSize)
+            if not theBuffer:
+                break
+            theBuilder.feed(theBuffer)
+    _writeIndex(nameOfConvertedFile, theBuilder)
+    logger.debug(f"index of '{nameOfConvertedFile}' built with {len(theBuilder.entries)} entries")
+    return readIndex(nameOfConvertedFile)
+
+def openWrite(nameOfFile : str, anIndexTimeframe : str = None, aLevel : int = None, aNumberOfThreads : int = 1,
+              isAppend : bool = False):
+    """open a converted csv-file for writing bytes like compressedFiles.openWrite,
+       with anIndexTimeframe the index of an uncompressed file is written at close(),
+       appending continues the index, an outdated index is built again first
+    """
+    if anIndexTimeframe is None or compressedFiles.getCompression(nameOfFile) != 'none':
+        return compressedFiles.openWrite(nameOfFile, aLevel, aNumberOfThreads, isAppend)
+    checkIndexTimeframe(anIndexTimeframe)
+    theBuilder = indexBuilder(anIndexTimeframe)
+    if isAppend and os.path.isfile(nameOfFile):
+        theIndex = readIndex(nameOfFile, anIndexTimeframe) or buildIndex(nameOfFile, anIndexTimeframe)
+        theBuilder = indexBuilder(anIndexTimeframe, theIndex['entries'], theIndex['size'])
+    return indexedWriter(compressedFiles.openWrite(nameOfFile, aLevel, aNumberOfThreads, isAppend),
+                         nameOfFile, theBuilder)
+
+def getIndex(nameOfConvertedFile : str) -> dict:
+    """returns the index of an uncompressed converted csv-file, an outdated index is built again,
+       the file is indexed with the default timeframe, if it has no index
+    """
+    theIndex = readIndex(nameOfConvertedFile)
+    if theIndex is None:
+        # an outdated index is built again with its timeframe
+        theOldIndex = _loadIndex(nameOfConvertedFile) or {}
+        aTimeframe = theOldIndex.get('timeframe', theDefaultTimeframe)
+        logger.info(f"index of '{nameOfConvertedFile}' is missing or outdated, building it with timeframe {aTimeframe}")
+        theIndex = buildIndex(nameOfConvertedFile, aTimeframe)
+    return theIndex
+
+def getRangeOffset(theIndex : dict, aStart : int) -> int:
+    """returns the offset of the first line of the interval containing aStart,
+       0 = from the beginning of the file
+    """
+    # entries compare like lists, [aStart, inf] is behind every entry of the interval of aStart
+    thePosition = bisect.bisect_right(theIndex['entries'], [aStart, float('inf')]) - 1
+    if thePosition < 0:
+        return 0
+    return theIndex['entries'][thePosition][1]
+
+def _readLines(aFile):
+    """returns the lines of an opened file from its position on, without line end"""
+    theRest = b''
+    while True:
+        theBuffer = aFile.read(theReadSize)
+        if not theBuffer:
+            break
+        theLines = (theRest + theBuffer).split(b'\n')
+        theRest = theLines.pop()
+        for aLine in theLines:
+            yield aLine.rstrip(b'\r')
+    if theRest.strip():
+        # last line without line end
+        yield theRest.rstrip(b'\r')
+
+def readLines(nameOfConvertedFile : str, aStart : int = None, anEnd : int = None):
+    """returns the lines of a converted csv-file from aStart to before anEnd without line end,
+       seconds since epoch, None = no limit,
+       an uncompressed file is read from the offset of aStart in its index
+    """
+    theStartKey = _getDateKey(aStart) if aStart is not None else None
+    theEndKey = _getDateKey(anEnd) if anEnd is not None else None
+    theOffset = 0
+    if aStart is not None and compressedFiles.getCompression(nameOfConvertedFile) == 'none':
+        theOffset = getRangeOffset(getIndex(nameOfConvertedFile), aStart)
+
+    with compressedFiles.openRead(nameOfConvertedFile) as (convertedfile, _):
+        if theOffset:
+            convertedfile.seek(theOffset)
+        else:
+            convertedfile.readline() # header
+        for aLine in _readLines(convertedfile):
+            aKey = _getLineKey(aLine)
+            if theStartKey is not None and aKey < theStartKey:
+                continue
+            if theEndKey is not None and aKey >= theEndKey:
+                return
+            yield aLine
+
+def readRows(nameOfConvertedFile : str, aStart : int = None, anEnd : int = None) -> list:
+    """returns the quotes of a converted csv-file from aStart to before anEnd, seconds since epoch,
+       as list of rows [date, open, high, low, close, volume] of strings
+    """
+    return [aLine.decode('UTF8').split(',') for aLine in readLines(nameOfConvertedFile, aStart, anEnd)]
+
+def readBlock(nameOfConvertedFile : str, aStart : int = None, anEnd : int = None):
+    """returns the quotes of a converted csv-file from aStart to before anEnd, seconds since epoch,
+       as quoteBlock of numpy arrays (requires numpy), see vectorizedConverter
+    """
+    # the rows of an export have date and time in separate columns,
+    # empty prices of bars filled by calendarAligner are NaN
+    theRows = [[aRow[0][:10], aRow[0][11:].rstrip('Z')] + [aField or 'nan' for aField in aRow[1:]]
+               for aRow in readRows(nameOfConvertedFile, aStart, anEnd)]
+    return vectorizedConverter.quoteBlockFromRows(theRows)
+
+def main():
+    logger.info("--- Sparse time index of converted csv-files ---")
+
+if __name__ == '__main__':
+    main()
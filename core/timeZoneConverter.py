@@ -0,0 +1,208 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+conversion of exported quotes from the time zone of the exchange or broker to UTC
+
+the UTC offsets are looked up once per local day, a day with a DST transition
+keeps the second at which the offset changes, all timestamps of a block are converted
+with a few array operations instead of a time zone lookup per quote
+
+local times, which exist twice or not at all at a DST transition, are resolved like
+datetime with fold=0: the offset in effect before the transition is taken
+source: https://peps.python.org/pep-0495/
+
+session = regular trading hours 'HH:MM-HH:MM' in local time from Monday to Friday,
+          overnight sessions like '18:00-17:00' belong to the day they end
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, re, zoneinfo
+from datetime import datetime, timedelta
+try:
+    import numpy as np
+except ImportError: # numpy is optional, the csv engine works without it
+    np = None
+import core.vectorizedConverter as vectorizedConverter
+# ----------------------------------------------------------------------------
+
+theSecondsPerDay = 86400
+
+# 1970-01-01 was a Thursday, weekday of day 0 with Monday = 0
+theWeekdayOfEpoch = 3
+
+def parseSession(aSession : str) -> tuple:
+    """returns start and end of a session like '09:30-16:00' in seconds of the day
+
+       raises ValueError, if aSession is not in format 'HH:MM-HH:MM'
+    """
+    theMatch = re.fullmatch(r'(\d\d):(\d\d)-(\d\d):(\d\d)', aSession.strip())
+    if not theMatch:
+        raise ValueError(f"session '{aSession}' is not in format 'HH:MM-HH:MM'")
+    theStartHour, theStartMinute, theEndHour, theEndMinute = map(int, theMatch.groups())
+    theStart = theStartHour * 3600 + theStartMinute * 60
+    theEnd = theEndHour * 3600 + theEndMinute * 60
+    if theStartHour > 23 or theEnd > theSecondsPerDay or theStartMinute > 59 or theEndMinute > 59:
+        raise ValueError(f"session '{aSession}' has an invalid time")
+    if theStart == theEnd:
+        raise ValueError(f"session '{aSession}' is empty")
+    return theStart, theEnd
+
+def checkTimeZone(aTimeZone : str, aSession : str = None) -> None:
+    """raises ValueError, if the time zone is unknown or the session is invalid"""
+    try:
+        zoneinfo.ZoneInfo(aTimeZone)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"unknown time zone '{aTimeZone}'") from None
+    if aSession:
+        parseSession(aSession)
+
+def isConverting(aTimeZone : str, aSession : str = None) -> bool:
+    """check if quotes in aTimeZone with aSession are changed by a conversion"""
+    return bool(aSession) or aTimeZone.upper() != 'UTC'
+
+class timeZoneConverter:
+    """converts timestamps in aTimeZone to UTC and removes quotes outside of aSession"""
+    def __init__(self,
+        aTimeZone : str = 'UTC',
+        aSession : str = None
+        ):
+        checkTimeZone(aTimeZone, aSession)
+        self._timeZone = aTimeZone
+        self._zone = zoneinfo.ZoneInfo(aTimeZone)
+        self._session = parseSession(aSession) if aSession else None
+
+        # UTC offsets of the local days from _firstDay on, see _getOffsetTable()
+        self._firstDay = 0
+        self._offsetsBefore = np.zeros(0, dtype=np.int64)
+        self._transitions = np.zeros(0, dtype=np.int64)
+        self._offsetsAfter = np.zeros(0, dtype=np.int64)
+
+    @property
+    def timeZone(self) -> str:
+        """Get time zone of the exported quotes"""
+        return self._timeZone
+
+    @property
+    def session(self) -> tuple:
+        """Get start and end of the session in seconds of the local day, None = all quotes"""
+        return self._session
+
+    def _getOffset(self, aDay : int, aSecond : int) -> int:
+        """UTC offset in seconds of a local time, aDay = days since epoch"""
+        theLocalTime = datetime(1970, 1, 1) + timedelta(days=aDay, seconds=aSecond)
+        return int(theLocalTime.replace(tzinfo=self._zone).utcoffset().total_seconds())
+
+    def _getDayOffsets(self, aDay : int) -> tuple:
+        """returns offset at the start of a local day, second of the DST transition and offset after it,
+           the second is theSecondsPerDay on days without transition
+        """
+        theOffsetBefore = self._getOffset(aDay, 0)
+        theOffsetAfter = self._getOffset(aDay, theSecondsPerDay - 1)
+        if theOffsetBefore == theOffsetAfter:
+            return theOffsetBefore, theSecondsPerDay, theOffsetAfter
+        # first second with the new offset, found by bisection
+        theLow, theHigh = 0, theSecondsPerDay - 1
+        while theHigh - theLow > 1:
+            theMiddle = (theLow + theHigh) // 2
+            if self._getOffset(aDay, theMiddle) == theOffsetBefore:
+                theLow = theMiddle
+            else:
+                theHigh = theMiddle
+        return theOffsetBefore, theHigh, theOffsetAfter
+
+    def _getOffsetTable(self, aFirstDay : int, aLastDay : int) -> tuple:
+        """returns the offset table of the local days aFirstDay ... aLastDay,
+           the table grows with the days converted so far, every day is looked up only once
+        """
+        theTableEnd = self._firstDay + len(self._transitions)
+        if len(self._transitions) == 0:
+            self._firstDay = theTableEnd = aFirstDay
+        theDaysBefore = [self._getDayOffsets(aDay) for aDay in range(aFirstDay, self._firstDay)]
+        theDaysAfter = [self._getDayOffsets(aDay) for aDay in range(theTableEnd, aLastDay + 1)]
+        if theDaysBefore or theDaysAfter:
+            theTable = np.concatenate([np.array(theDaysBefore, dtype=np.int64).reshape(-1, 3),
+                                       np.stack([self._offsetsBefore, self._transitions, self._offsetsAfter], axis=1),
+                                       np.array(theDaysAfter, dtype=np.int64).reshape(-1, 3)])
+            self._firstDay -= len(theDaysBefore)
+            self._offsetsBefore, self._transitions, self._offsetsAfter = theTable[:, 0], theTable[:, 1], theTable[:, 2]
+        theStart = aFirstDay - self._firstDay
+        theEnd = aLastDay - self._firstDay + 1
+        return (self._offsetsBefore[theStart:theEnd], self._transitions[theStart:theEnd],
+                self._offsetsAfter[theStart:theEnd])
+
+    def toUTC(self, theLocalTimestamps):
+        """convert local timestamps, seconds since epoch as int64, to UTC"""
+        if len(theLocalTimestamps) == 0:
+            return theLocalTimestamps.copy()
+        theDays = theLocalTimestamps // theSecondsPerDay
+        theSeconds = theLocalTimestamps - theDays * theSecondsPerDay
+        theFirstDay = int(theDays.min())
+        theOffsetsBefore, theTransitions, theOffsetsAfter = self._getOffsetTable(theFirstDay, int(theDays.max()))
+        theIndex = theDays - theFirstDay
+        theOffsets = np.where(theSeconds >= theTransitions[theIndex], theOffsetsAfter[theIndex], theOffsetsBefore[theIndex])
+        return theLocalTimestamps - theOffsets
+
+    def getSessionMask(self, theLocalTimestamps):
+        """returns a mask of the local timestamps within the session, None without session"""
+        if self._session is None:
+            return None
+        theStart, theEnd = self._session
+        theDays = theLocalTimestamps // theSecondsPerDay
+        theSeconds = theLocalTimestamps - theDays * theSecondsPerDay
+        if theStart < theEnd:
+            theIsInSession = (theSeconds >= theStart) & (theSeconds < theEnd)
+        else:
+            # overnight session, the evening belongs to the next trading day
+            theIsInSession = (theSeconds >= theStart) | (theSeconds < theEnd)
+            theDays = theDays + (theSeconds >= theStart)
+        return theIsInSession & ((theDays + theWeekdayOfEpoch) % 7 < 5)
+
+    def convertBlock(self, aBlock):
+        """returns a quoteBlock with UTC timestamps and without quotes outside of the session"""
+        theIsInSession = self.getSessionMask(aBlock.timestamp)
+        aBlock = vectorizedConverter.quoteBlock(self.toUTC(aBlock.timestamp),
+                                                aBlock.open, aBlock.high, aBlock.low, aBlock.close,
+                                                aBlock.volume, aBlock.decimals, aBlock.timeWidth)
+        if theIsInSession is None or np.all(theIsInSession):
+            return aBlock
+        return aBlock.select(theIsInSession)
+
+    def convertRows(self, theRows : list) -> list:
+        """convert rows of an export, as returned by csv.reader, returns the rows in the session
+           with date and time in UTC, the values are not changed
+        """
+        if not theRows:
+            return theRows
+        theLocalTimestamps = np.array([f"{aRow[0].replace('.','-')}T{aRow[1]}" for aRow in theRows],
+                                      dtype='datetime64[s]').astype(np.int64)
+        theIsInSession = self.getSessionMask(theLocalTimestamps)
+        theTimes = np.datetime_as_string(self.toUTC(theLocalTimestamps).astype('datetime64[s]'))
+        theResult = []
+        for anIndex, aRow in enumerate(theRows):
+            if theIsInSession is not None and not theIsInSession[anIndex]:
+                continue
+            aTime = theTimes[anIndex]
+            theResult.append([aTime[:10].replace('-','.'), aTime[11:11+len(aRow[1])]] + list(aRow[2:]))
+        return theResult
+
+def main():
+    logger.info("--- Conversion of exported quotes to UTC ---")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,509 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+module for converting QuantDataManager quotes block-wise with numpy arrays
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os
+try:
+    import numpy as np
+except ImportError: # numpy is optional, the csv engine works without it
+    np = None
+import core.outputWriters as outputWriters
+import core.compressedFiles as compressedFiles
+import core.timeIndex as timeIndex
+# ----------------------------------------------------------------------------
+
+# column layout of a QuantDataManager quote export:
+# date, time, open, high, low, close, volume
+theNumberOfColumns = 7
+theValueColumns    = ('open', 'high', 'low', 'close', 'volume')
+
+# header of the Zipline compatible output file, same as the csv engine writes
+theZiplineHeader = b'date,open,high,low,close,volume\r\n'
+
+# default size of a block read from the source file, in bytes
+theDefaultBlockSize = 16 * 1024 * 1024
+
+# most digits of a number, which float64 holds exactly
+theMaximumDigits = 15
+
+# zero bytes in front of a parsed block, longest field the parser accepts
+thePadding = 32
+
+def isAvailable() -> bool:
+    """check if numpy is installed"""
+    return np is not None
+
+class quoteBlock:
+    """typed column arrays of a block of quotes
+
+       timestamp      = seconds since epoch (int64)
+       open ... close = prices (float64)
+       volume         = volume (int64, float64 if the export has decimals)
+       decimals       = number of decimals of open, high, low, close and volume
+       timeWidth      = width of the time column in the export, 5 = 'HH:MM', 8 = 'HH:MM:SS'
+    """
+    def __init__(self, timestamp, open, high, low, close, volume, decimals, timeWidth):
+        self.timestamp = timestamp
+        self.open      = open
+        self.high      = high
+        self.low       = low
+        self.close     = close
+        self.volume    = volume
+        self.decimals  = decimals
+        self.timeWidth = timeWidth
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def select(self, anIndex) -> 'quoteBlock':
+        """returns a quoteBlock with the lines selected by a slice, a mask or a list of indices"""
+        return quoteBlock(self.timestamp[anIndex],
+                          self.open[anIndex], self.high[anIndex], self.low[anIndex], self.close[anIndex],
+                          self.volume[anIndex], self.decimals, self.timeWidth)
+
+def _readLineBlocks(nameOfSourceFile:str, aBlockSize:int, aProgress = None):
+    """read a file in blocks of complete lines, returns bytes, compressed files are decompressed,
+       aProgress = progressReporter updated with the bytes read
+    """
+    with compressedFiles.openRead(nameOfSourceFile) as (sourcefile, rawfile):
+        theRest = b''
+        while True:
+            theBuffer = sourcefile.read(aBlockSize)
+            if not theBuffer:
+                break
+            if aProgress is not None:
+                aProgress.update(rawfile.tell())
+            theBuffer = theRest + theBuffer
+            theLastLineEnd = theBuffer.rfind(b'\n')
+            if theLastLineEnd < 0:
+                theRest = theBuffer
+                continue
+            theRest = theBuffer[theLastLineEnd+1:]
+            yield theBuffer[:theLastLineEnd+1]
+        if theRest.strip():
+            # last line without line end
+            yield theRest + b'\n'
+
+def _getFieldBounds(aRawBlock, aNumberOfColumns : int = theNumberOfColumns):
+    """find start and end of every field in a block of lines with aNumberOfColumns columns,
+       returns two arrays of shape (lines, columns)
+    """
+    theLineEnds = np.flatnonzero(aRawBlock == 10)                         # '\n'
+    theSeparators = np.flatnonzero((aRawBlock == 44) | (aRawBlock == 10)) # ',' or '\n'
+    theNumberOfLines = len(theLineEnds)
+    if len(theSeparators) != theNumberOfLines * aNumberOfColumns:
+        raise ValueError(f"export has not {aNumberOfColumns} columns in every line")
+
+    theEnds = theSeparators.reshape(theNumberOfLines, aNumberOfColumns)
+    if not np.array_equal(theEnds[:, -1], theLineEnds):
+        raise ValueError(f"export has not {aNumberOfColumns} columns in every line")
+    theStarts = np.empty_like(theEnds)
+    theStarts[:, 1:] = theEnds[:, :-1] + 1
+    theStarts[0, 0] = 0
+    theStarts[1:, 0] = theLineEnds[:-1] + 1
+
+    # do not count a carriage return as part of the last column
+    theEnds = theEnds.copy()
+    theEnds[:, -1] -= (aRawBlock[theLineEnds - 1] == 13)
+    return theStarts, theEnds
+
+def _gatherWindows(aRawBlock, theEnds, aWidth : int):
+    """gather the aWidth bytes in front of every end position into a (lines, width) byte matrix,
+       aRawBlock starts with thePadding zero bytes, so windows never start in front of the block
+    """
+    if aWidth > thePadding:
+        raise ValueError("field is too long")
+    # zero-copy view of all windows, only one index per line is gathered
+    theWindows = np.lib.stride_tricks.sliding_window_view(aRawBlock, aWidth)
+    return theWindows[theEnds - aWidth]
+
+def _gatherFixedField(aRawBlock, theStarts, theEnds, aWidth : int):
+    """gather a fixed width field into a (lines, width) byte matrix"""
+    if not np.all(theEnds - theStarts == aWidth):
+        raise ValueError(f"field width differs from {aWidth}")
+    return _gatherWindows(aRawBlock, theEnds, aWidth)
+
+def _parseDecimalField(aRawBlock, theStarts, theEnds):
+    """parse numbers like '-123.45' with the same number of decimals in every line,
+       returns values as float64 and the number of decimals
+
+       raises ValueError, if a number would not be written back identically
+    """
+    theLengths = theEnds - theStarts
+    if len(theLengths) == 0:
+        return np.zeros(0), 0
+    theWidth = int(theLengths.max())
+
+    # number of decimals, taken from the first line
+    theFirstField = aRawBlock[theStarts[0]:theEnds[0]].tobytes()
+    theDot = theFirstField.find(b'.')
+    theDecimals = 0 if theDot < 0 else len(theFirstField) - theDot - 1
+
+    # right aligned window on every field, positions left of the field are padded with '0'
+    thePositions = np.arange(theWidth)
+    theFirst = theWidth - theLengths
+    theChars = np.where(thePositions >= theFirst[:, None], _gatherWindows(aRawBlock, theEnds, theWidth), 48)
+
+    # a minus sign is only allowed at the first position
+    theRows = np.arange(len(theLengths))
+    theIsNegative = theChars[theRows, np.minimum(theFirst, theWidth-1)] == 45 # '-'
+    theChars[theRows[theIsNegative], theFirst[theIsNegative]] = 48
+
+    # the decimal point has to be at the same position in every line
+    theDigits = theChars - np.uint8(48)
+    theDotPosition = theWidth - 1 - theDecimals
+    if theDecimals > 0 and not np.all(theChars[:, theDotPosition] == 46): # '.'
+        raise ValueError("no fixed number of decimals")
+    if theWidth - (theDecimals > 0) > theMaximumDigits:
+        raise ValueError("number has too many digits")
+    if np.any(theDigits[:, :theDotPosition] > 9) or np.any(theDigits[:, theDotPosition+1:] > 9):
+        raise ValueError("number contains invalid characters")
+    if theDecimals == 0 and np.any(theDigits[:, theDotPosition] > 9):
+        raise ValueError("number contains invalid characters")
+
+    # at least one digit in front of the decimal point and no leading zeros
+    theIntegerDigits = theLengths - theIsNegative - (theDecimals > 0) - theDecimals
+    if np.any(theIntegerDigits < 1):
+        raise ValueError("number without digits in front of the decimal point")
+    theLeadingDigit = theDigits[theRows, np.minimum(theFirst + theIsNegative, theWidth-1)]
+    if np.any((theIntegerDigits > 1) & (theLeadingDigit == 0)):
+        raise ValueError("number with leading zeros")
+
+    # the decimal point does not count, digits in front of it are shifted by one position
+    thePowers = 10.0 ** (theWidth - 1 - thePositions - (thePositions < theDotPosition) * (theDecimals > 0))
+    if theDecimals > 0:
+        thePowers[theDotPosition] = 0
+    theValues = (theDigits @ thePowers) / 10.0**theDecimals
+    if np.any(theIsNegative & (theValues == 0)):
+        raise ValueError("negative zero")
+    theValues[theIsNegative] *= -1
+    return theValues, theDecimals
+
+def parseDateAndTime(aRawBlock, theStarts, theEnds, theTimeWidths : tuple = (5, 8)) -> tuple:
+    """parse date 'YYYY.MM.DD' in the first and time 'HH:MM' or 'HH:MM:SS' in the second column,
+       theTimeWidths = allowed widths of the time, 12 = 'HH:MM:SS.fff' of ticks, the milliseconds are dropped,
+       returns seconds since epoch (int64) and the width of the time
+    """
+    # date 'YYYY.MM.DD'
+    theDate = _gatherFixedField(aRawBlock, theStarts[:, 0], theEnds[:, 0], 10).astype(np.int64) - 48
+    if np.any(theDate[:, [4, 7]] != ord('.') - 48) or np.any(np.delete(theDate, [4, 7], axis=1) // 10 != 0):
+        raise ValueError("date is not in format 'YYYY.MM.DD'")
+    theYear  = theDate[:, 0]*1000 + theDate[:, 1]*100 + theDate[:, 2]*10 + theDate[:, 3]
+    theMonth = theDate[:, 5]*10 + theDate[:, 6]
+    theDay   = theDate[:, 8]*10 + theDate[:, 9]
+
+    # time 'HH:MM', 'HH:MM:SS' or 'HH:MM:SS.fff'
+    theTimeWidth = int(theEnds[0, 1] - theStarts[0, 1])
+    if theTimeWidth not in theTimeWidths:
+        raise ValueError(f"unknown time format of width {theTimeWidth}")
+    theTime = _gatherFixedField(aRawBlock, theStarts[:, 1], theEnds[:, 1], theTimeWidth).astype(np.int64) - 48
+    if theTimeWidth == 12:
+        if np.any(theTime[:, 8] != ord('.') - 48) or np.any(theTime[:, 9:] // 10 != 0):
+            raise ValueError("time is not in format 'HH:MM:SS.fff'")
+        theTime = theTime[:, :8]
+    theColons = [2, 5][:theTime.shape[1] // 3]
+    if np.any(theTime[:, theColons] != ord(':') - 48) or np.any(np.delete(theTime, theColons, axis=1) // 10 != 0):
+        raise ValueError("time is not in format 'HH:MM' or 'HH:MM:SS'")
+    theSeconds = (theTime[:, 0]*10 + theTime[:, 1])*3600 + (theTime[:, 3]*10 + theTime[:, 4])*60
+    if theTime.shape[1] == 8:
+        theSeconds += theTime[:, 6]*10 + theTime[:, 7]
+
+    theMonths = ((theYear - 1970)*12 + theMonth - 1).astype('datetime64[M]')
+    theDays = theMonths.astype('datetime64[D]') + (theDay - 1).astype('timedelta64[D]')
+    if (np.any((theMonth < 1) | (theMonth > 12) | (theDay < 1))
+        or np.any(theDays.astype('datetime64[M]') != theMonths)
+        or np.any(theSeconds >= 86400) or np.any(theTime[:, 3] > 5)
+        or (theTime.shape[1] == 8 and np.any(theTime[:, 6] > 5))):
+        raise ValueError("invalid date or time")
+    return theDays.astype(np.int64)*86400 + theSeconds, theTimeWidth
+
+def parseQuoteBlock(aBlock : bytes) -> quoteBlock:
+    """parse complete lines of a QuantDataManager export into a quoteBlock
+
+       raises ValueError, if the lines do not match the layout 'YYYY.MM.DD,HH:MM,o,h,l,c,v'
+    """
+    aRawBlock = np.zeros(thePadding + len(aBlock), dtype=np.uint8)
+    aRawBlock[thePadding:] = np.frombuffer(aBlock, dtype=np.uint8)
+    theStarts, theEnds = _getFieldBounds(aRawBlock[thePadding:])
+    theStarts += thePadding
+    theEnds += thePadding
+    theTimestamp, theTimeWidth = parseDateAndTime(aRawBlock, theStarts, theEnds)
+
+    theColumns = {}
+    theDecimals = []
+    for aColumnIndex, aColumnName in enumerate(theValueColumns, start=2):
+        theValues, aDecimals = _parseDecimalField(aRawBlock, theStarts[:, aColumnIndex], theEnds[:, aColumnIndex])
+        theColumns[aColumnName] = theValues
+        theDecimals.append(aDecimals)
+
+    theVolume = theColumns['volume']
+    if theDecimals[-1] == 0:
+        theVolume = theVolume.astype(np.int64)
+
+    return quoteBlock(theTimestamp,
+                      theColumns['open'], theColumns['high'], theColumns['low'], theColumns['close'],
+                      theVolume, tuple(theDecimals), theTimeWidth)
+
+def readQuoteBlocks(nameOfSourceFile:str, aBlockSize:int = theDefaultBlockSize, aProgress = None):
+    """read quotes from QuantDataManager export, returns quoteBlocks,
+       aProgress = progressReporter updated with the bytes read
+
+       raises ValueError, if the file does not match the layout 'YYYY.MM.DD,HH:MM,o,h,l,c,v'
+    """
+    for aBlock in _readLineBlocks(nameOfSourceFile, aBlockSize, aProgress):
+        yield parseQuoteBlock(aBlock)
+
+def _getDecimalFieldWidth(theValues, aDecimals : int) -> int:
+    """width of the widest number with a fixed number of decimals, incl. sign"""
+    if len(theValues) == 0 or np.all(np.isnan(theValues)):
+        return 0
+    theLargest = int(np.rint(np.nanmax(np.abs(theValues)) * 10.0**aDecimals))
+    return 1 + max(len(str(theLargest)), aDecimals + 1) + (aDecimals > 0)
+
+def _renderDecimalField(theMatrix, aColumn : int, aWidth : int, theValues, aDecimals : int) -> None:
+    """render numbers with a fixed number of decimals right aligned
+       into the columns [aColumn, aColumn + aWidth) of a byte matrix
+    """
+    theIsNegative = theValues < 0
+    theScaled = np.rint(np.abs(theValues) * 10.0**aDecimals)
+    # 32 bit division is much faster than 64 bit division
+    theScaled = theScaled.astype(np.uint32 if len(theScaled) == 0 or theScaled.max() < 2**32 else np.uint64)
+    theNumberOfDigits = aWidth - 1 - (aDecimals > 0)
+
+    # digits from right to left, at least one digit in front of the decimal point
+    thePosition = aColumn + aWidth - 1
+    for aDigit in range(theNumberOfDigits):
+        if aDigit == aDecimals and aDecimals > 0:
+            theMatrix[:, thePosition] = 46 # '.'
+            thePosition -= 1
+        theScaled, theDigit = np.divmod(theScaled, 10)
+        theDigit += 48
+        if aDigit > aDecimals:
+            # no leading zeros, the remaining value is 0 in front of the first digit
+            theDigit *= (theScaled > 0) | (theDigit > 48)
+        theMatrix[:, thePosition] = theDigit
+        thePosition -= 1
+
+    if np.any(theIsNegative):
+        theRows = np.flatnonzero(theIsNegative)
+        # the sign is the first unused position in front of the digits
+        theUsed = theMatrix[theRows, aColumn:aColumn+aWidth] != 0
+        theMatrix[theRows, aColumn + aWidth - 1 - theUsed.sum(axis=1)] = 45 # '-'
+
+def _renderTimestamp(theMatrix, theTimestamp, aTimeWidth : int) -> int:
+    """render timestamps as 'YYYY-MM-DDTHH:MM[:SS]Z' at the beginning of a byte matrix,
+       returns the width of the rendered timestamp
+    """
+    if len(theTimestamp) == 0:
+        return 4 + aTimeWidth + 8
+    theDays = theTimestamp // 86400
+    theSeconds = theTimestamp - theDays * 86400
+
+    # dates and times are looked up in small tables instead of rendering every line
+    theFirstDay = int(theDays.min())
+    theDayRange = np.arange(theFirstDay, int(theDays.max()) + 1).astype('datetime64[D]')
+    theDateTable = np.datetime_as_string(theDayRange).astype('S10').view(np.uint8).reshape(-1, 10)
+    theMatrix[:, 0:10] = theDateTable[theDays - theFirstDay]
+    theMatrix[:, 10] = ord('T')
+
+    if aTimeWidth == 8:
+        theTimeTable = np.arange(0, 86400).astype('datetime64[s]')
+        theTimeIndex = theSeconds
+    else:
+        theTimeTable = np.arange(0, 86400, 60).astype('datetime64[s]')
+        theTimeIndex = theSeconds // 60
+    theTimeTable = np.datetime_as_string(theTimeTable).astype('S19').view(np.uint8).reshape(-1, 19)
+    theMatrix[:, 11:11+aTimeWidth] = theTimeTable[theTimeIndex, 11:11+aTimeWidth]
+    theMatrix[:, 11+aTimeWidth] = ord('Z')
+    return 12 + aTimeWidth
+
+def formatQuoteBlock(aBlock : quoteBlock) -> bytes:
+    """render a quoteBlock as lines of the Zipline compatible CSV format"""
+    theNumberOfLines = len(aBlock)
+    theWidths = [_getDecimalFieldWidth(getattr(aBlock, aColumnName), aDecimals)
+                 for aColumnName, aDecimals in zip(theValueColumns, aBlock.decimals)]
+    theTimestampWidth = 4 + aBlock.timeWidth + 8 # 'YYYY-MM-DD' 'T' time 'Z'
+
+    # unused positions stay 0 and are removed at the end
+    theMatrix = np.zeros((theNumberOfLines, theTimestampWidth + sum(theWidths) + len(theWidths) + 2), dtype=np.uint8)
+    thePosition = _renderTimestamp(theMatrix, aBlock.timestamp, aBlock.timeWidth)
+    for aColumnName, aDecimals, aWidth in zip(theValueColumns, aBlock.decimals, theWidths):
+        theMatrix[:, thePosition] = 44 # ','
+        theValues = getattr(aBlock, aColumnName)
+        theIsMissing = np.isnan(theValues) if theValues.dtype.kind == 'f' else None
+        if theIsMissing is not None and np.any(theIsMissing):
+            # missing values, e.g. of bars filled by calendarAligner, are empty fields
+            _renderDecimalField(theMatrix, thePosition + 1, aWidth, np.where(theIsMissing, 0.0, theValues), aDecimals)
+            theMatrix[np.flatnonzero(theIsMissing), thePosition + 1:thePosition + 1 + aWidth] = 0
+        else:
+            _renderDecimalField(theMatrix, thePosition + 1, aWidth, theValues, aDecimals)
+        thePosition += 1 + aWidth
+    theMatrix[:, thePosition]   = 13 # '\r\n' like csv.writer
+    theMatrix[:, thePosition+1] = 10
+
+    # row by row without the unused positions
+    return theMatrix[theMatrix != 0].tobytes()
+
+def quoteBlockFromRows(theRows : list) -> quoteBlock:
+    """convert rows of a QuantDataManager export, as returned by csv.reader, into a quoteBlock"""
+    theTimestamp = np.array([f"{aRow[0].replace('.','-')}T{aRow[1]}" for aRow in theRows],
+                            dtype='datetime64[s]').astype(np.int64)
+    theColumns = {}
+    theDecimals = []
+    for aColumnIndex, aColumnName in enumerate(theValueColumns, start=2):
+        theTexts = [aRow[aColumnIndex] for aRow in theRows]
+        aDecimals = max((len(aText) - aText.find('.') - 1 if '.' in aText else 0 for aText in theTexts), default=0)
+        theColumns[aColumnName] = np.array(theTexts, dtype=np.float64)
+        theDecimals.append(aDecimals)
+
+    theVolume = theColumns['volume']
+    if theDecimals[-1] == 0:
+        theVolume = theVolume.astype(np.int64)
+    theTimeWidth = len(theRows[0][1]) if theRows else 5
+
+    return quoteBlock(theTimestamp,
+                      theColumns['open'], theColumns['high'], theColumns['low'], theColumns['close'],
+                      theVolume, tuple(theDecimals), theTimeWidth)
+
+def convertQuotes(nameOfSourceFile:str, nameOfDestinationFile:str, aBlockSize:int = theDefaultBlockSize,
+                  theOutputs:tuple = (), aProgress = None, aCompressionLevel:int = None,
+                  aCompressionThreads:int = 1, theValidator = None, theTimeZone = None,
+                  anIndexTimeframe:str = None, theAligner = None) -> int:
+    """convert quotes from QuantDataManager Format to Zipline compatible format with numpy,
+       theOutputs = additional outputs written in the same pass, see outputWriters,
+       aProgress = progressReporter updated with the bytes read,
+       aCompressionLevel, aCompressionThreads = compression of the destination file, see compressedFiles,
+       theValidator = qualityValidator checking every block before it is written,
+       theTimeZone = timeZoneConverter converting every block to UTC before it is checked,
+       anIndexTimeframe = interval of the time index written with the destination file, see timeIndex,
+       theAligner = calendarAligner aligning every checked block to a trading calendar,
+       the destination file is replaced only when complete,
+       returns the number of converted lines
+
+       raises ValueError, if the file does not match the layout 'YYYY.MM.DD,HH:MM,o,h,l,c,v'
+    """
+    theNumberOfLines = 0
+    theWriters = outputWriters.openWriters(nameOfDestinationFile, theOutputs, aCompressionLevel=aCompressionLevel)
+    isAborted = True
+    try:
+        with compressedFiles.replaceWhenComplete(nameOfDestinationFile, (timeIndex.theIndexSuffix,)) as nameOfTempFile, \
+             timeIndex.openWrite(nameOfTempFile, anIndexTimeframe, aCompressionLevel,
+                                 aCompressionThreads) as destinationfile:
+            destinationfile.write(theZiplineHeader)
+            for aBlock in readQuoteBlocks(nameOfSourceFile, aBlockSize, aProgress):
+                if theTimeZone is not None:
+                    aBlock = theTimeZone.convertBlock(aBlock)
+                if theValidator is not None:
+                    aBlock = theValidator.validateBlock(aBlock)
+                if theAligner is not None:
+                    aBlock = theAligner.alignBlock(aBlock)
+                destinationfile.write(formatQuoteBlock(aBlock))
+                outputWriters.writeBlock(theWriters, aBlock)
+                theNumberOfLines += len(aBlock)
+            if theAligner is not None:
+                # the calendar continues to the end of the session of the last bar
+                aBlock = theAligner.finish()
+                if aBlock is not None and len(aBlock):
+                    destinationfile.write(formatQuoteBlock(aBlock))
+                    outputWriters.writeBlock(theWriters, aBlock)
+                    theNumberOfLines += len(aBlock)
+        isAborted = False
+    finally:
+        outputWriters.closeWriters(theWriters, isAborted)
+    return theNumberOfLines
+
+def parseZiplineDate(aDate : str) -> int:
+    """convert a date like '2019-01-02T09:30Z' to seconds since epoch"""
+    return int(np.datetime64(aDate.rstrip('Z'), 's').astype(np.int64))
+
+def appendQuotes(nameOfSourceFile:str, nameOfDestinationFile:str, aFirstLine:str, aLastLine:str,
+                 aBlockSize:int = theDefaultBlockSize, theOutputs:tuple = (), aProgress = None,
+                 aCompressionLevel:int = None, aCompressionThreads:int = 1, theValidator = None,
+                 theTimeZone = None, anIndexTimeframe:str = None):
+    """append quotes newer than aLastLine to a converted file with numpy,
+       aFirstLine and aLastLine are the first and the last converted line, without line end,
+       theOutputs = additional outputs, which end with the same bar as the converted file,
+       aProgress = progressReporter updated with the bytes read,
+       aCompressionLevel, aCompressionThreads = compression of the appended lines, see compressedFiles,
+       theValidator = qualityValidator checking the new quotes before they are appended,
+       theTimeZone = timeZoneConverter converting every block to UTC, before it is compared,
+       anIndexTimeframe = interval of the time index continued with the appended lines, see timeIndex
+
+       returns the number of appended lines, None without writing anything,
+       if the export does not start with aFirstLine or does not contain aLastLine
+
+       raises ValueError, if the file does not match the layout 'YYYY.MM.DD,HH:MM,o,h,l,c,v'
+    """
+    theFirstLine = (aFirstLine + '\r\n').encode('UTF8')
+    theLastLine = (aLastLine + '\r\n').encode('UTF8')
+    theLastTimestamp = parseZiplineDate(aLastLine.split(',')[0])
+
+    isFirstBlock = True
+    isLastLineFound = False
+    theNumberOfLines = 0
+    theWriters = outputWriters.openWriters(nameOfDestinationFile, theOutputs, isAppend=True,
+                                           aCompressionLevel=aCompressionLevel)
+    isAborted = True
+    try:
+        with timeIndex.openWrite(nameOfDestinationFile, anIndexTimeframe, aCompressionLevel, aCompressionThreads,
+                                 isAppend=True) as destinationfile:
+            for aBlock in readQuoteBlocks(nameOfSourceFile, aBlockSize, aProgress):
+                if theTimeZone is not None:
+                    aBlock = theTimeZone.convertBlock(aBlock)
+                if isFirstBlock and len(aBlock):
+                    if formatQuoteBlock(aBlock.select(slice(0, 1))) != theFirstLine:
+                        return None
+                    isFirstBlock = False
+
+                # the last converted line has to be exported unchanged
+                theIsLastLine = aBlock.timestamp == theLastTimestamp
+                if np.any(theIsLastLine):
+                    anIndex = int(np.argmax(theIsLastLine))
+                    if formatQuoteBlock(aBlock.select(slice(anIndex, anIndex+1))) != theLastLine:
+                        return None
+                    isLastLineFound = True
+
+                theIsNew = aBlock.timestamp > theLastTimestamp
+                if not np.any(theIsNew):
+                    continue
+                if not isLastLineFound:
+                    return None
+                theNewBlock = aBlock.select(theIsNew)
+                if theValidator is not None:
+                    theNewBlock = theValidator.validateBlock(theNewBlock)
+                destinationfile.write(formatQuoteBlock(theNewBlock))
+                outputWriters.writeBlock(theWriters, theNewBlock)
+                theNumberOfLines += len(theNewBlock)
+        # an export not continuing the converted file leaves the outputs unchanged
+        isAborted = not isLastLineFound
+    finally:
+        outputWriters.closeWriters(theWriters, isAborted)
+
+    if not isLastLineFound:
+        return None
+    return theNumberOfLines
+
+def main():
+    logger.info("--- Module for converting QuantDataManager quotes with numpy ---")
+
+if __name__ == '__main__':
+    main()
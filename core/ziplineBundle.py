@@ -0,0 +1,148 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+Zipline bundle of converted quotes
+
+register the bundle at ~/.zipline/extension.py:
+    from zipline.data.bundles import register
+    import core.ziplineBundle as ziplineBundle
+    register('quantdata', ziplineBundle.quantDataBundle('data/symbols.csv', 'data'), calendar_name='NYSE')
+
+the asset metadata is taken from the symbol list, the bars are read one symbol
+at a time from the bar store '<symbol>-<timeframe>.bars' or, if there is none,
+from the converted csv-file '<symbol>-<timeframe>.csv', which may be compressed, e.g. '.csv.gz'
+source: https://zipline.ml4trading.io/bundles.html#writing-a-new-bundle
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+# ----------------------------------------------------------------------------
+import sys, os, pathlib
+try:
+    import pandas as pd
+except ImportError: # pandas is optional, required only by Zipline
+    pd = None
+import core.quantDataConverter as dataConverter
+import core.barStore as barStore
+import core.compressedFiles as compressedFiles
+# ----------------------------------------------------------------------------
+
+theBarColumns = ['open', 'high', 'low', 'close', 'volume']
+theDefaultExchange = 'QDM'
+
+def isAvailable() -> bool:
+    """check if pandas is installed"""
+    return pd is not None
+
+def getQuotesFileName(aDataDirectory : str, aSymbol : str, aTimeframe : str = 'M1') -> str:
+    """returns full path and name of the converted csv-file of a symbol, which may be compressed"""
+    return compressedFiles.findFile(os.path.join(aDataDirectory, f"{aSymbol}-{aTimeframe.upper()}.csv"))
+
+def getAssetMetadata(theSymbolsDetails : dict, anExchange : str = theDefaultExchange):
+    """returns the asset metadata of all symbols as DataFrame, index = sid,
+       taken from columns 'Date from' and 'Date to' of the symbol list without reading any bars
+    """
+    theSymbols = list(theSymbolsDetails)
+    theStartDates = pd.to_datetime([theSymbolsDetails[aSymbol]['Date from'] for aSymbol in theSymbols])
+    theEndDates = pd.to_datetime([theSymbolsDetails[aSymbol]['Date to'] for aSymbol in theSymbols])
+    return pd.DataFrame({'symbol'         : theSymbols,
+                         'asset_name'     : theSymbols,
+                         'start_date'     : theStartDates,
+                         'end_date'       : theEndDates,
+                         'auto_close_date': theEndDates + pd.Timedelta(days=1),
+                         'exchange'       : anExchange})
+
+def hasBars(aDataDirectory : str, aSymbol : str, aTimeframe : str = 'M1') -> bool:
+    """check if a symbol was converted"""
+    nameOfConvertedFile = getQuotesFileName(aDataDirectory, aSymbol, aTimeframe)
+    return pathlib.Path(nameOfConvertedFile).is_file() or \
+           pathlib.Path(barStore.getStoreName(nameOfConvertedFile), barStore.theHeaderFileName).is_file()
+
+def readBars(aDataDirectory : str, aSymbol : str, aTimeframe : str = 'M1'):
+    """returns the bars of a symbol as DataFrame with UTC DatetimeIndex,
+       the bar store is preferred, its timestamps are used without parsing
+    """
+    nameOfConvertedFile = getQuotesFileName(aDataDirectory, aSymbol, aTimeframe)
+    nameOfStore = barStore.getStoreName(nameOfConvertedFile)
+    if pathlib.Path(nameOfStore, barStore.theHeaderFileName).is_file():
+        theColumns = barStore.openStore(nameOfStore)
+        theIndex = pd.DatetimeIndex(pd.to_datetime(theColumns['timestamp'], unit='s', utc=True), name='date')
+        return pd.DataFrame({aColumn : theColumns[aColumn] for aColumn in theBarColumns}, index=theIndex)
+
+    theBars = pd.read_csv(nameOfConvertedFile, usecols=['date'] + theBarColumns)
+    theBars.index = pd.DatetimeIndex(pd.to_datetime(theBars.pop('date'), utc=True), name='date')
+    return theBars
+
+def generateBars(theSymbols : list, aDataDirectory : str, aTimeframe : str = 'M1', showProgress : bool = False):
+    """yields (sid, DataFrame) for all symbols, only one symbol is held in memory,
+       sid = position of the symbol in theSymbols
+    """
+    for aSid, aSymbol in enumerate(theSymbols):
+        theBars = readBars(aDataDirectory, aSymbol, aTimeframe)
+        if showProgress:
+            logger.info(f"ingest {len(theBars)} bars of '{aSymbol}' ({aSid+1}/{len(theSymbols)})")
+        yield aSid, theBars
+
+def quantDataBundle(nameOfSymbolList : str, aDataDirectory : str, aTimeframe : str = 'M1',
+                    anExchange : str = theDefaultExchange):
+    """returns a Zipline ingest function for the converted quotes in aDataDirectory,
+       aTimeframe 'D1' is written as daily bars, any other timeframe as minute bars
+    """
+    if pd is None:
+        raise ImportError("the Zipline bundle requires pandas")
+
+    def ingest(environ, asset_db_writer, minute_bar_writer, daily_bar_writer, adjustment_writer,
+               calendar, start_session, end_session, cache, show_progress, output_dir):
+        theSymbolsDetails = dataConverter.getSymbolsDetails(nameOfSymbolList)
+        for aSymbol in list(theSymbolsDetails):
+            if not hasBars(aDataDirectory, aSymbol, aTimeframe):
+                logger.warning(f"no converted quotes of '{aSymbol}', symbol skipped")
+                del theSymbolsDetails[aSymbol]
+        if not theSymbolsDetails:
+            raise ValueError(f"no converted quotes of the symbols at '{nameOfSymbolList}'")
+        logger.info(f"ingest {len(theSymbolsDetails)} symbols from '{aDataDirectory}'")
+
+        theMetadata = getAssetMetadata(theSymbolsDetails, anExchange)
+        asset_db_writer.write(equities=theMetadata,
+                              exchanges=pd.DataFrame({'exchange'      : [anExchange],
+                                                      'canonical_name': [anExchange],
+                                                      'country_code'  : ['US']}))
+
+        theBars = generateBars(list(theSymbolsDetails), aDataDirectory, aTimeframe, show_progress)
+        if aTimeframe.upper() == 'D1':
+            daily_bar_writer.write(theBars, show_progress=show_progress)
+        else:
+            minute_bar_writer.write(theBars, show_progress=show_progress)
+
+        # no splits and dividends available
+        adjustment_writer.write()
+
+    return ingest
+
+def quantDataBundleFromConfig(aConfig, aTimeframe : str = 'M1', anExchange : str = theDefaultExchange):
+    """returns a Zipline ingest function for symbol list and data directory of a config file,
+       aConfig = core.basicConfigReader.defaultConfig
+    """
+    theDataDirectory = os.path.join(os.getcwd(), aConfig.getValue("data", "path"))
+    theSymbolListFileName = os.path.join(theDataDirectory, aConfig.getValue("data", "symbollist"))
+    return quantDataBundle(theSymbolListFileName, theDataDirectory, aTimeframe, anExchange)
+
+def main():
+    logger.info("--- Zipline bundle of converted quotes ---")
+
+if __name__ == '__main__':
+    main()
@@ -21,17 +21,19 @@ Convert intraday stock and forex quotes from QuantDataManager to format readable
 import logging
 logger = logging.getLogger(__name__)
 # ----------------------------------------------------------------------------
-import sys, os, argparse 
+import sys, os, argparse, signal, threading
 from datetime import datetime
 import core.basicLogger as minilog
 import core.basicConfigReader as miniConfig
 import core.batchCaller as quantBatchCaller
+import core.runProfiler as runProfiler
+import core.quantDataConverter as dataConverter
 # ----------------------------------------------------------------------------
 
 def main():
     # -------------------------------------------
-    # initiate logging
-    minilog.initiate(logging.INFO)
+    # initiate logging, console and log file are written by a background thread
+    minilog.initiate(logging.INFO, isQueued=True)
 
     # program start message
     logger.info(f"""--- START '{sys.argv[0]}' on {datetime.now().strftime("%Y-%b-%d")} ---""")
@@ -47,6 +49,23 @@ def main():
     
     # add long and short command line arguments
     parser.add_argument("--configfile", "-c", help="name of config file")
+    parser.add_argument("--force", "-f", action="store_true",
+                        help="export all symbols, even if their date range did not change")
+    parser.add_argument("--resume", "-r", action="store_true",
+                        help="continue an interrupted run from the run journal, symbols converted by it are skipped, "
+                             "see option 'journal' at section 'data' in config file")
+    parser.add_argument("--watch", "-w", action="store_true",
+                        help="stay running and convert every export in the data directory as soon as it is complete, "
+                             "stop with Ctrl+C")
+    parser.add_argument("--merge", "-m", nargs='+', metavar="FILE",
+                        help="merge sorted exports or converted csv-files FILE... into the first FILE, "
+                             "which may be one of them, without Quant Data Manager, see section 'merge' in config file")
+    parser.add_argument("--panel", action="store_true",
+                        help="only build the panel of all converted symbols on a common time grid, "
+                             "see section 'panel' in config file")
+    parser.add_argument("--profile", "-p", type=int, nargs='?', const=1, metavar="N",
+                        help="profile every stage and every N-th conversion (default 1 = all) with cProfile "
+                             "and tracemalloc, files are written to 'log/profile-<date>-<time>'")
         
 
     # read arguments from the command line
@@ -61,32 +80,92 @@ def main():
     logger.info(f"Taking configuration from '{theConfig.configFileName}'")
     logger.info(" ")
     # -------------------------------------------
-    # connecting to Quant Data Manager
-    theDataManager = quantBatchCaller.callQuantDataManager(theConfig)
+    # merge of files, e.g. exports in date range chunks, runs without Quant Data Manager
+    if args.merge:
+        if len(args.merge) < 2:
+            parser.error("argument --merge: expected a destination and at least one source file")
+        isOk = dataConverter.mergeQuotes(args.merge[1:], args.merge[0],
+                                         theConfig.getOptionalValue("merge","duplicates","latest").lower(),
+                                         anIndexTimeframe=theConfig.getOptionalValue("converter","index","").strip().upper() or None)
+        logger.info(f"--- END '{os.path.basename(sys.argv[0])}' ---")
+        sys.exit(0 if isOk else 1)
 
+    # profiles of the stages and of sampled conversions
+    theProfiler = None
+    if args.profile is not None:
+        if args.profile < 1:
+            parser.error(f"argument --profile: has to be a number > 0, not {args.profile}")
+        theProfiler = runProfiler.runProfiler(minilog.getLogDirectory(), args.profile)
+        logger.info(f"profiling stages and 1 of {args.profile} conversions to '{theProfiler.directory}'")
     # -------------------------------------------
-    logger.info("--- STEP 1 of 3: updating list of symbols  ---")
-    isOk = theDataManager.updateSymbolsList()
-    if not isOk:
-        logger.critical("update of symbols list failed")
-        sys.exit(1)  
-    logger.info(" ")
-    
-    # -------------------------------------------
-    logger.info("--- STEP 2 of 3: updating quotes  ---")
-    isOk = theDataManager.updateQuotes()
-    if not isOk:
-        logger.critical("update of quotes failed")
-        sys.exit(1)      
-    logger.info(" ")
-    # -------------------------------------------    
-    
-    logger.info("--- STEP 3 of 3: exporting to csv  ---")
-    isOk = theDataManager.exportQuotes()    
-    if not isOk:
-        logger.critical("export to CSV failed")
-        sys.exit(1)      
-    logger.info(" ")
+    # connecting to Quant Data Manager
+    theDataManager = quantBatchCaller.callQuantDataManager(theConfig, theProfiler)
+
+    if args.watch:
+        # Ctrl+C or a termination request let the running conversions finish
+        theStopEvent = threading.Event()
+        for aSignal in ('SIGINT', 'SIGTERM', 'SIGBREAK'):
+            if hasattr(signal, aSignal):
+                signal.signal(getattr(signal, aSignal), lambda theSignal, theFrame: theStopEvent.set())
+        try:
+            logger.info("--- WATCH: converting exports on arrival ---")
+            isOk = theDataManager.watchExports(aStopEvent=theStopEvent)
+        finally:
+            theDataManager.writeRunReport()
+        logger.info(f"--- END '{os.path.basename(sys.argv[0])}' ---")
+        sys.exit(0 if isOk else 1)
+
+    if args.panel:
+        try:
+            logger.info("--- PANEL: building the panel of converted symbols ---")
+            isOk = theDataManager.buildPanel()
+        finally:
+            theDataManager.writeRunReport()
+        logger.info(f"--- END '{os.path.basename(sys.argv[0])}' ---")
+        sys.exit(0 if isOk else 1)
+
+    # an interrupted run continues with the export, quotes and symbol list are updated already
+    isResumed = args.resume and theDataManager.canResume()
+    if args.resume and not isResumed:
+        logger.info("no interrupted run to resume, starting a new run")
+    try:
+        if not isResumed:
+            # -------------------------------------------
+            logger.info("--- STEP 1 of 3: updating quotes  ---")
+            isOk = theDataManager.updateQuotes()
+            if not isOk:
+                logger.critical("update of quotes failed")
+                sys.exit(1)      
+            logger.info(" ")
+
+            # -------------------------------------------
+            # the date range of every symbol has to include the updated quotes
+            logger.info("--- STEP 2 of 3: updating list of symbols  ---")
+            isOk = theDataManager.updateSymbolsList()
+            if not isOk:
+                logger.critical("update of symbols list failed")
+                sys.exit(1)  
+            logger.info(" ")
+        # -------------------------------------------    
+        
+        logger.info(f"--- STEP 3 of 3: {'resuming export' if isResumed else 'exporting'} to csv  ---")
+        isOk = theDataManager.exportQuotes(isForced=args.force, isResumed=isResumed)
+        if not isOk:
+            logger.critical("export to CSV failed")
+            sys.exit(1)      
+        logger.info(" ")
+
+        # -------------------------------------------
+        if theDataManager.PanelBuild:
+            logger.info("--- PANEL: building the panel of converted symbols ---")
+            isOk = theDataManager.buildPanel()
+            if not isOk:
+                logger.critical("panel of converted symbols failed")
+                sys.exit(1)
+            logger.info(" ")
+    finally:
+        # runtime metrics, also of failed runs
+        theDataManager.writeRunReport()
 
     # -------------------------------------------
     # program end message
@@ -0,0 +1,138 @@
+# -*- coding: UTF-8 -*-
+#
+#
+# Copyright 2019 Heinrich Gerull
+#
+# Licensed under the GNU GENERAL PUBLIC LICENSE version 3
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+"""
+ingest of the Zipline bundle with stub writers instead of Zipline (requires pandas),
+python -m unittest discover tests
+"""
+
+import os, sys, tempfile, unittest
+from unittest import mock
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import core.ziplineBundle as ziplineBundle
+
+theSymbolList = ('Symbol,Date from,Date to\n'
+                 'AAA,2024-07-01,2024-07-02\n'
+                 'NONE,2024-01-01,2024-07-02\n'
+                 'BBB,2024-06-03,2024-07-01\n')
+theConvertedQuotes = {'AAA': ('date,open,high,low,close,volume\n'
+                              '2024-07-01T13:30Z,1.00,2.00,0.50,1.50,10\n'
+                              '2024-07-02T13:30Z,1.50,2.50,1.00,2.00,20\n'),
+                      'BBB': ('date,open,high,low,close,volume\n'
+                              '2024-07-01T13:30Z,5.00,6.00,4.00,5.50,30\n')}
+
+class stubAssetDBWriter:
+    """remembers the written asset metadata"""
+    def __init__(self):
+        self.equities = None
+        self.exchanges = None
+
+    def write(self, equities=None, exchanges=None, **theTables):
+        self.equities = equities
+        self.exchanges = exchanges
+
+class stubBarWriter:
+    """consumes the bars like the bar writers of Zipline, appends ('write', sid, bars) to theEvents"""
+    def __init__(self, theEvents : list):
+        self._events = theEvents
+        self.isWritten = False
+
+    def write(self, theBars, show_progress=False):
+        self.isWritten = True
+        for aSid, aDataFrame in theBars:
+            self._events.append(('write', aSid, aDataFrame))
+
+class stubAdjustmentWriter:
+    """remembers, if the adjustments were written"""
+    def __init__(self):
+        self.isWritten = False
+
+    def write(self, **theTables):
+        self.isWritten = True
+
+@unittest.skipUnless(ziplineBundle.isAvailable(), "the Zipline bundle requires pandas")
+class testQuantDataBundle(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.dataDirectory = self._directory.name
+        self.symbolListFileName = os.path.join(self.dataDirectory, 'symbols.csv')
+        with open(self.symbolListFileName, mode='w', encoding='UTF8') as symbolfile:
+            symbolfile.write(theSymbolList)
+        for aSymbol, theQuotes in theConvertedQuotes.items():
+            with open(os.path.join(self.dataDirectory, f"{aSymbol}-M1.csv"), mode='w', encoding='UTF8') as quotesfile:
+                quotesfile.write(theQuotes)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _ingest(self, aTimeframe : str = 'M1') -> tuple:
+        """run the ingest function with stub writers, returns the writers and the events of reading and writing"""
+        theEvents = []
+        theAssetDBWriter = stubAssetDBWriter()
+        theMinuteBarWriter = stubBarWriter(theEvents)
+        theDailyBarWriter = stubBarWriter(theEvents)
+        theAdjustmentWriter = stubAdjustmentWriter()
+        readBars = ziplineBundle.readBars
+
+        def readBarsLogged(aDataDirectory, aSymbol, aTimeframe='M1'):
+            theEvents.append(('read', aSymbol))
+            return readBars(aDataDirectory, aSymbol, aTimeframe)
+
+        theIngest = ziplineBundle.quantDataBundle(self.symbolListFileName, self.dataDirectory, aTimeframe)
+        with mock.patch.object(ziplineBundle, 'readBars', readBarsLogged):
+            theIngest({}, theAssetDBWriter, theMinuteBarWriter, theDailyBarWriter, theAdjustmentWriter,
+                      None, None, None, None, False, self.dataDirectory)
+        return theAssetDBWriter, theMinuteBarWriter, theDailyBarWriter, theAdjustmentWriter, theEvents
+
+    def test_metadata(self):
+        theAssetDBWriter, _, _, theAdjustmentWriter, _ = self._ingest()
+        theMetadata = theAssetDBWriter.equities
+        # symbols without converted quotes are skipped
+        self.assertEqual(list(theMetadata['symbol']), ['AAA', 'BBB'])
+        self.assertEqual([str(aDate.date()) for aDate in theMetadata['start_date']], ['2024-07-01', '2024-06-03'])
+        self.assertEqual([str(aDate.date()) for aDate in theMetadata['end_date']], ['2024-07-02', '2024-07-01'])
+        self.assertEqual([str(aDate.date()) for aDate in theMetadata['auto_close_date']], ['2024-07-03', '2024-07-02'])
+        self.assertEqual(list(theAssetDBWriter.exchanges['exchange']), [ziplineBundle.theDefaultExchange])
+        self.assertTrue(theAdjustmentWriter.isWritten)
+
+    def test_sidOrder(self):
+        theAssetDBWriter, _, _, _, theEvents = self._ingest()
+        theWrites = [anEvent for anEvent in theEvents if anEvent[0] == 'write']
+        # sid = row of the asset metadata
+        self.assertEqual([anEvent[1] for anEvent in theWrites], list(theAssetDBWriter.equities.index))
+        self.assertEqual([len(anEvent[2]) for anEvent in theWrites], [2, 1])
+        self.assertEqual(list(theWrites[0][2].columns), ziplineBundle.theBarColumns)
+        self.assertEqual(str(theWrites[1][2].index[0]), '2024-07-01 13:30:00+00:00')
+
+    def test_oneSymbolAtATime(self):
+        _, theMinuteBarWriter, theDailyBarWriter, _, theEvents = self._ingest()
+        # every symbol is read only when the writer asks for it
+        self.assertEqual([anEvent[:2] for anEvent in theEvents],
+                         [('read', 'AAA'), ('write', 0), ('read', 'BBB'), ('write', 1)])
+        self.assertTrue(theMinuteBarWriter.isWritten)
+        self.assertFalse(theDailyBarWriter.isWritten)
+
+    def test_dailyBars(self):
+        for aSymbol, theQuotes in theConvertedQuotes.items():
+            with open(os.path.join(self.dataDirectory, f"{aSymbol}-D1.csv"), mode='w', encoding='UTF8') as quotesfile:
+                quotesfile.write(theQuotes)
+        _, theMinuteBarWriter, theDailyBarWriter, _, _ = self._ingest('D1')
+        self.assertTrue(theDailyBarWriter.isWritten)
+        self.assertFalse(theMinuteBarWriter.isWritten)
+
+if __name__ == '__main__':
+    unittest.main()